@@ -121,7 +121,19 @@ CREATE TABLE IF NOT EXISTS public.swift_settings (
     folder_in text,
     folder_out text,
     folder_unprocessed text,
-    server text
+    server text,
+    xsd_folder text,
+    cancel_state_code text,
+    trn_processes boolean DEFAULT false,
+    retention_months integer,
+    purge_batch_size integer DEFAULT 1000,
+    profile text,
+    profile_folder text,
+    priority_classes text,
+    priority_aging_seconds integer,
+    run_max_files integer,
+    run_max_bytes bigint,
+    run_max_seconds numeric(10,1)
 );
 
 -- ============================================================================
@@ -130,11 +142,11 @@ CREATE TABLE IF NOT EXISTS public.swift_settings (
 
 -- Process Types
 INSERT INTO public.process_type (code, name_en, name_ru, name_combined, resource_url, attributes_table) VALUES
-('pacs.008', 'Customer Credit Transfer', 'Клиентский кредитовый перевод', 'Customer Credit Transfer (Клиентский кредитовый перевод)', '/aoa/ObjectTask?object=swiftInput&form=editForm&objectKey={id}', 'swift_input'),
-('pacs.009', 'Financial Institution Credit Transfer (COV)', 'Межбанковский кредитовый перевод (покрытие)', 'Financial Institution Credit Transfer (COV) (Межбанковский кредитовый перевод (покрытие))', '/aoa/ObjectTask?object=swiftInput&form=editForm&objectKey={id}', 'swift_input'),
-('camt.053', 'Bank to Customer Statement', 'Банковская выписка клиенту', 'Bank to Customer Statement (Банковская выписка клиенту)', '/aoa/ObjectTask?object=swiftInput&form=editForm&objectKey={id}', 'swift_input'),
-('camt.054', 'Bank to Customer Debit/Credit Notification', 'Уведомление о дебете/кредите', 'Bank to Customer Debit/Credit Notification (Уведомление о дебете/кредите)', '/aoa/ObjectTask?object=swiftInput&form=editForm&objectKey={id}', 'swift_input'),
-('camt.056', 'FI to FI Payment Cancellation Request', 'Запрос на отмену платежа', 'FI to FI Payment Cancellation Request (Запрос на отмену платежа)', '/aoa/ObjectTask?object=swiftInput&form=editForm&objectKey={id}', 'swift_input'),
+('pacs.008', 'Customer Credit Transfer', 'Клиентский кредитовый перевод', 'Customer Credit Transfer (Клиентский кредитовый перевод)', '/aoa/ObjectTask?object=swiftInput&form=editForm&objectKey={id}', 'swift_input_pacs008'),
+('pacs.009', 'Financial Institution Credit Transfer (COV)', 'Межбанковский кредитовый перевод (покрытие)', 'Financial Institution Credit Transfer (COV) (Межбанковский кредитовый перевод (покрытие))', '/aoa/ObjectTask?object=swiftInput&form=editForm&objectKey={id}', 'swift_input_pacs009'),
+('camt.053', 'Bank to Customer Statement', 'Банковская выписка клиенту', 'Bank to Customer Statement (Банковская выписка клиенту)', '/aoa/ObjectTask?object=swiftInput&form=editForm&objectKey={id}', 'swift_input_camt053'),
+('camt.054', 'Bank to Customer Debit/Credit Notification', 'Уведомление о дебете/кредите', 'Bank to Customer Debit/Credit Notification (Уведомление о дебете/кредите)', '/aoa/ObjectTask?object=swiftInput&form=editForm&objectKey={id}', 'swift_input_camt054'),
+('camt.056', 'FI to FI Payment Cancellation Request', 'Запрос на отмену платежа', 'FI to FI Payment Cancellation Request (Запрос на отмену платежа)', '/aoa/ObjectTask?object=swiftInput&form=editForm&objectKey={id}', 'swift_input_camt056'),
 ('TRN', 'Transaction', 'Транзакция (строка выписки)', 'Транзакция (строка выписки)', ' ', 'swift_stmt_ntry')
 ON CONFLICT (code) DO NOTHING;
 
@@ -157,7 +169,7 @@ INSERT INTO public.process_state (id, type_code, code, name_en, name_ru, name_co
 ('895acd9f-b1d8-4844-ade2-713c9b92ebfd', 'camt.056', 'LOADED', 'Loaded', 'Загружен', 'Loaded (Загружен)', '#FF8C00', true, true, true),
 ('815c1662-3351-488a-8f40-ddee60b0a3a3', 'camt.056', 'PROCESSED', 'Processed', 'Обработан', 'Processed (Обработан)', '#8B0000', false, false, false),
 -- TRN states
-('09835826-3239-4cde-8fdd-112f8e39c494', 'TRN', 'LOADED', 'Loaded', 'Загружена', 'Загружена', '#FF8C00', NULL, NULL, false),
+('09835826-3239-4cde-8fdd-112f8e39c494', 'TRN', 'LOADED', 'Loaded', 'Загружена', 'Загружена', '#FF8C00', NULL, NULL, true),
 ('27b572c3-8bdf-42b7-bd43-999c3df7ba7d', 'TRN', 'PROCESSED', 'Processed', 'Обработана', 'Обработана', '#dbbbb8', NULL, NULL, false)
 ON CONFLICT (id) DO NOTHING;
 
@@ -175,7 +187,7 @@ INSERT INTO public.process_operation (id, type_code, code, name_en, name_ru, nam
 ('ae4c638d-f954-4f3e-ac7a-c2ca7cd9ccb4', 'camt.056', 'CANCEL_PROCESSING', 'Cancel Processing', 'Отменить обработку', 'Cancel Processing (Отменить обработку)', 'undo', NULL, '{"target_state": "LOADED", "available_in_states": ["PROCESSED"]}', true, NULL, 'to_state="LOADED"', NULL, NULL),
 ('cd28fb8c-d732-4195-8c62-93001648552e', 'pacs.008', 'CANCEL_PAYMENT', 'Cancel Payment Creation', 'Отменить создание платежа', 'Cancel Payment Creation (Отменить создание платежа)', 'cancel', NULL, '{"target_state": "LOADED", "available_in_states": ["PAYMENT_CREATED"]}', true, NULL, 'to_state="LOADED"', NULL, NULL),
 ('2808dd8d-23c6-466d-b50a-d999268255ab', 'pacs.008', 'CREATE_PAYMENT', 'Create Payment', 'Создать платеж', 'Create Payment (Создать платеж)', 'payment', 'declare  p_dep_id int := 100;  p_id varchar2(250) := :id;  p_test_xml varchar2(4000):= :xml;begin  :out_payment_pk := p_dep_id||'',''||p_id;end;', '{"target_state": "PAYMENT_CREATED", "available_in_states": ["LOADED"]}', false, NULL, 'to_state="PAYMENT_CREATED"', 'type_008_payment', 'colvir_cbs'),
-('4742683f-144d-4e7d-9596-0e0f9debf090', 'TRN', 'PROCESS', 'Process', 'Обработать транзакцию', 'Обработать транзакцию', NULL, '1', NULL, false, NULL, 'to_state = "PROCESSED"', '1', '1'),
+('4742683f-144d-4e7d-9596-0e0f9debf090', 'TRN', 'PROCESS', 'Process', 'Обработать транзакцию', 'Обработать транзакцию', NULL, NULL, NULL, false, NULL, 'to_state = "PROCESSED"', NULL, NULL),
 ('b07e6901-aacf-49bb-85c0-34c0fee379f3', 'TRN', 'UNDO_PROCESS', 'Undo Process', 'Отмена обработки транзакции', 'Отмена обработки транзакции', NULL, NULL, NULL, false, NULL, 'to_state = "LOADED"', NULL, NULL)
 ON CONFLICT (id) DO NOTHING;
 
@@ -191,7 +203,9 @@ INSERT INTO public.process_operation_states (operation_id, state_id) VALUES
 ('eae080aa-61a6-4bd8-8056-1e53019188b5', '00c57ee4-58ea-47b3-9804-497773cdd339'),
 ('ae4c638d-f954-4f3e-ac7a-c2ca7cd9ccb4', '815c1662-3351-488a-8f40-ddee60b0a3a3'),
 ('cd28fb8c-d732-4195-8c62-93001648552e', '088d04ed-28d0-4447-b7f6-defb08cbce1a'),
-('2808dd8d-23c6-466d-b50a-d999268255ab', 'f8c40da3-cf4e-42ec-a641-53eeb7208448')
+('2808dd8d-23c6-466d-b50a-d999268255ab', 'f8c40da3-cf4e-42ec-a641-53eeb7208448'),
+('4742683f-144d-4e7d-9596-0e0f9debf090', '09835826-3239-4cde-8fdd-112f8e39c494'),
+('b07e6901-aacf-49bb-85c0-34c0fee379f3', '27b572c3-8bdf-42b7-bd43-999c3df7ba7d')
 ON CONFLICT (operation_id, state_id) DO NOTHING;
 
 -- Swift Settings (default configuration)
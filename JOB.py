@@ -1,45 +1,373 @@
+import io
+import json
 import os
+import queue
+import re
 import subprocess
 import logging
+import tempfile
+import threading
+from logging.handlers import QueueHandler, QueueListener
+import time
 import shutil
 import traceback
+import uuid
+import zlib
+from collections import deque
 from datetime import datetime
 from decimal import Decimal, InvalidOperation
 from xml.etree import ElementTree as ET
 from apng_core.db import initDbSession, fetchall
 from apng_core.exceptions import UserException
 
+# Optional: XSD validation is skipped when lxml is not installed
+try:
+    from lxml import etree as LET
+except ImportError:
+    LET = None
+
 # Initialize logger
 logger = logging.getLogger('cron')
 
-# IMMEDIATE TEST - CRITICAL is the highest level!
-logger.critical('💀💀💀 CRITICAL: JOB STARTED - THIS MUST APPEAR!!! 💀💀💀')
-logger.critical('🚨🚨🚨 CRITICAL LEVEL - HIGHEST PRIORITY 🚨🚨🚨')
-logger.critical('🔴🔴🔴 DATE: 2025-10-26 TIME: NOW!!! 🔴🔴🔴')
-logger.critical('⚡⚡⚡ IF YOU DON\'T SEE THIS - NOTHING WORKS ⚡⚡⚡')
-
 # Global variables for folder paths from settings
 FOLDER_IN = None
 FOLDER_OUT = None
 
-# Switch to work from memory instead of filesystem
-# Set to True when folder access is unavailable - all operations will be in memory
-# Set to False to restore original behavior with file system operations
-WORK_FROM_MEMORY = True  # Set to False to work with files on disk
+# Switch to work from memory instead of filesystem (env SWIFT_WORK_FROM_MEMORY=1)
+# True: files are taken from the MEMORY_FILES spool, filled by a producer
+# False: files are read from folder_in and moved to folder_out
+WORK_FROM_MEMORY = os.environ.get('SWIFT_WORK_FROM_MEMORY', '').lower() in ('1', 'true', 'yes')
+
+# Memory spool limit: compressed bytes held (env SWIFT_SPOOL_MAX_MB) and zlib level
+MEMORY_SPOOL_MAX_BYTES = int(float(os.environ.get('SWIFT_SPOOL_MAX_MB') or 256) * 2**20)
+MEMORY_SPOOL_LEVEL = 1
+
+class SpoolFull(Exception):
+    """MemorySpool has no room for a file (non-blocking put, timeout or file larger than the spool)."""
+
+class SpoolStream:
+    """Read-only binary stream of a spooled file, inflated chunk by chunk (for iterparse)."""
+
+    def __init__(self, compressed, chunk_bytes=64 * 1024):
+        self._compressed = compressed
+        self._pos = 0
+        self._chunk_bytes = chunk_bytes
+        self._inflate = zlib.decompressobj()
+
+    def read(self, size=-1):
+        # iterparse feeds whatever it gets, so one inflated chunk is returned regardless of size
+        while self._pos < len(self._compressed):
+            chunk = self._compressed[self._pos:self._pos + self._chunk_bytes]
+            self._pos += len(chunk)
+            data = self._inflate.decompress(chunk)
+            if data:
+                return data
+        return self._inflate.flush()
+
+    def close(self):
+        self._compressed = b''
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class MemorySpool:
+    """Bounded spool of files waiting for import in WORK_FROM_MEMORY mode.
+
+    Content is held zlib-compressed and the compressed size counts against
+    max_bytes. Files come out highest priority first, FIFO within a
+    priority. put() blocks while the spool is full (block=False or an
+    expired timeout raise SpoolFull), so a burst becomes producer latency
+    instead of unbounded memory. The read side is dict-like (keys, get,
+    [name], pop), spool[name] = xml is a non-blocking put.
+    """
+
+    def __init__(self, max_bytes=None, level=None):
+        self.max_bytes = max_bytes or MEMORY_SPOOL_MAX_BYTES
+        self.level = MEMORY_SPOOL_LEVEL if level is None else level
+        self._cond = threading.Condition()
+        self._queues = {}  # priority -> {filename: None}, arrival order
+        self._items = {}   # filename -> (priority, compressed, raw size, enqueued at)
+        self.bytes = 0
+        self.raw_bytes = 0
+        self.high_water_bytes = 0
+        self.accepted = 0
+        self.refused = 0
+        self.blocked_seconds = 0.0
+
+    def put(self, filename, content, priority=0, block=True, timeout=None):
+        """Add a file (str or UTF-8 bytes); waits for room unless block=False.
+
+        A file of the same name is replaced only once the new content is
+        accepted; its bytes count as free room. A refused put leaves it in place.
+        """
+        data = content.encode('utf-8') if isinstance(content, str) else content
+        compressed = zlib.compress(data, self.level)
+        need = len(compressed)
+
+        def has_room():
+            replaced = self._items.get(filename)
+            return self.bytes - (len(replaced[1]) if replaced else 0) + need <= self.max_bytes
+
+        with self._cond:
+            if need > self.max_bytes:
+                self.refused += 1
+                raise SpoolFull(f'{filename}: {need} compressed bytes, spool holds {self.max_bytes}')
+            if not has_room():
+                if not block:
+                    self.refused += 1
+                    raise SpoolFull(f'{filename}: spool full ({self.bytes} of {self.max_bytes} bytes)')
+                started = time.monotonic()
+                try:
+                    if not self._cond.wait_for(has_room, timeout):
+                        self.refused += 1
+                        raise SpoolFull(f'{filename}: spool still full after {timeout} s')
+                finally:
+                    self.blocked_seconds += time.monotonic() - started
+            self._discard(filename)
+            self._queues.setdefault(priority, {})[filename] = None
+            self._items[filename] = (priority, compressed, len(data), time.time())
+            self.bytes += need
+            self.raw_bytes += len(data)
+            self.high_water_bytes = max(self.high_water_bytes, self.bytes)
+            self.accepted += 1
+
+    def _discard(self, filename):
+        item = self._items.pop(filename, None)
+        if item is not None:
+            priority, compressed, size, _ = item
+            queue_ = self._queues[priority]
+            del queue_[filename]
+            if not queue_:
+                del self._queues[priority]
+            self.bytes -= len(compressed)
+            self.raw_bytes -= size
+            self._cond.notify_all()
+        return item
+
+    def discard(self, filename):
+        """Remove a processed file and wake blocked producers."""
+        with self._cond:
+            self._discard(filename)
+
+    def keys(self):
+        """Filenames in processing order: priority descending, then arrival."""
+        with self._cond:
+            return [name for priority in sorted(self._queues, reverse=True) for name in self._queues[priority]]
+
+    def get(self, filename, default=None):
+        with self._cond:
+            item = self._items.get(filename)
+        if item is None:
+            return default
+        return zlib.decompress(item[1]).decode('utf-8')
+
+    def open(self, filename):
+        """SpoolStream of the file (KeyError if absent)."""
+        with self._cond:
+            return SpoolStream(self._items[filename][1])
+
+    def pop(self, filename, default=None):
+        with self._cond:
+            item = self._discard(filename)
+        if item is None:
+            return default
+        return zlib.decompress(item[1]).decode('utf-8')
+
+    def probe(self, filename, head_bytes):
+        """(first head_bytes as text, size, enqueued at, priority) without inflating the whole file; None if absent."""
+        with self._cond:
+            item = self._items.get(filename)
+        if item is None:
+            return None
+        priority, compressed, size, enqueued = item
+        head = zlib.decompressobj().decompress(compressed, head_bytes)
+        return head.decode('utf-8', 'ignore'), size, enqueued, priority
+
+    def size(self, filename):
+        """Uncompressed size in bytes (0 if absent)."""
+        with self._cond:
+            item = self._items.get(filename)
+        return item[2] if item else 0
+
+    def update(self, files):
+        for filename, content in files.items():
+            self.put(filename, content, block=False)
+
+    def clear(self):
+        with self._cond:
+            self._queues.clear()
+            self._items.clear()
+            self.bytes = 0
+            self.raw_bytes = 0
+            self._cond.notify_all()
+
+    def metrics(self):
+        """Depth, bytes and backpressure counters."""
+        with self._cond:
+            oldest = min((item[3] for item in self._items.values()), default=None)
+            return {
+                'depth': len(self._items),
+                'bytes': self.bytes,
+                'raw_bytes': self.raw_bytes,
+                'max_bytes': self.max_bytes,
+                'high_water_bytes': self.high_water_bytes,
+                'accepted': self.accepted,
+                'refused': self.refused,
+                'blocked_ms': round(self.blocked_seconds * 1000, 1),
+                'oldest_age_s': round(time.time() - oldest, 3) if oldest is not None else None,
+                'by_priority': {priority: len(names) for priority, names in sorted(self._queues.items(), reverse=True)},
+            }
+
+    def __getitem__(self, filename):
+        content = self.get(filename)
+        if content is None:
+            raise KeyError(filename)
+        return content
+
+    def __setitem__(self, filename, content):
+        self.put(filename, content, block=False)
+
+    def __contains__(self, filename):
+        return filename in self._items
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(self.keys())
+
+# Files waiting for import when WORK_FROM_MEMORY=True; filled by the producer
+# (put() from another thread, or e.g. bench.traffic.TrafficGenerator.fill)
+MEMORY_FILES = MemorySpool()
+
+# Folder with CBPR+ schemas named <MsgDefIdr>.xsd (e.g. pacs.008.001.08.xsd)
+# Validation is off when swift_settings.xsd_folder is empty
+XSD_FOLDER = None
+
+# Compiled schemas for the lifetime of the process: MsgDefIdr -> XMLSchema or None
+XSD_VALIDATORS = {}
+
+# Max schema errors recorded per message
+XSD_MAX_ERRORS = 20
+
+# State the original pacs.008/pacs.009 process is moved to when a camt.056
+# for it arrives (swift_settings.cancel_state_code); None = only record the link
+CANCEL_STATE_CODE = None
+
+# Create a TRN process for every camt.053 entry (swift_settings.trn_processes)
+TRN_PROCESSES = False
+
+# Messages imported more than this many months ago are purged
+# (swift_settings.retention_months); None = keep forever
+RETENTION_MONTHS = None
+
+# Non-partitioned purge: rows deleted per transaction and batches per run
+PURGE_BATCH_SIZE = 1000
+PURGE_MAX_BATCHES = 100
+
+# Profile one import run: 'cpu' (cProfile), 'memory' (tracemalloc) or 'cpu,memory'
+# (swift_settings.profile, env SWIFT_PROFILE wins); None = off.
+# Stats files go to PROFILE_FOLDER as import-run-<swift_import_run.id>.prof/.tracemalloc
+PROFILE = None
+PROFILE_FOLDER = None
+PROFILE_TOP = 20
+PROFILE_FRAMES = 5
+
+# swift_import_run.id of the last read_and_import_files() run (None if not recorded)
+LAST_IMPORT_RUN_ID = None
+
+# Processing order by message type, most urgent first; ',' = same class
+# (swift_settings.priority_classes, env SWIFT_PRIORITY_CLASSES wins).
+# Types not listed and files over PRIORITY_BULK_BYTES go to the last class
+PRIORITY_CLASSES = 'camt.056 > pacs.008, pacs.009, pacs.002 > camt.054 > camt.053'
+
+# A waiting file moves up one class per this many seconds (swift_settings.priority_aging_seconds)
+PRIORITY_AGING_SECONDS = 300
+
+# Classification reads only the head of a file; the input is listed again
+# during a run at most this often so urgent arrivals overtake waiting bulk
+PRIORITY_SNIFF_BYTES = 4096
+PRIORITY_BULK_BYTES = 5 * 2**20
+PRIORITY_RESCAN_SECONDS = 5
+
+# Run budget (swift_settings.run_max_files/run_max_bytes/run_max_seconds, env
+# SWIFT_RUN_MAX_FILES/SWIFT_RUN_MAX_BYTES/SWIFT_RUN_MAX_SECONDS win; None = no limit).
+# A run that reaches it commits, records a checkpoint and leaves the rest to the next run
+RUN_MAX_FILES = None
+RUN_MAX_BYTES = None
+RUN_MAX_SECONDS = 240
+
+# pg advisory lock key: one import run at a time across overlapping schedules
+IMPORT_LOCK_KEY = 0x5357494654  # 'SWIFT'
+
+# Checkpoint of the last run, None if it imported everything that was waiting
+LAST_IMPORT_CHECKPOINT = None
+
+# Per-entry debug lines (balances, entries, transaction details, batch
+# transactions) are sampled: the 1st, then every LOG_SAMPLE-th; 1 = all.
+# Per-entry errors are sampled the same way, their total is in the file summary
+LOG_SAMPLE = max(1, int(os.environ.get('SWIFT_LOG_SAMPLE') or 100))
+
+def log_sampled(n, level=logging.DEBUG):
+    """True when the line for the n-th (1-based) entry should be logged at level."""
+    return (n - 1) % LOG_SAMPLE == 0 and logger.isEnabledFor(level)
+
+class DeferredQueueHandler(QueueHandler):
+    """QueueHandler for a listener in the same process.
+
+    The stock prepare() formats the message and traceback in the calling
+    thread so the record can be pickled; here the record is queued as is
+    and formatting happens in the listener thread.
+    """
+
+    def prepare(self, record):
+        return record
+
+def start_log_queue():
+    """Put the cron logger's handlers behind a queue; returns the listener (None if nothing to move).
+
+    The import loop then only appends records to the queue; file/console
+    I/O of the platform handlers runs in the listener thread.
+    """
+    handlers = logger.handlers
+    propagate = logger.propagate
+    if not handlers and propagate:
+        handlers = logging.getLogger().handlers
+    if not handlers or any(isinstance(h, QueueHandler) for h in handlers):
+        return None
 
-# Memory storage for test files when WORK_FROM_MEMORY=True
-MEMORY_FILES = {}
+    listener = QueueListener(queue.SimpleQueue(), *handlers, respect_handler_level=True)
+    listener.restore = (list(logger.handlers), propagate)
+    logger.handlers = [DeferredQueueHandler(listener.queue)]
+    logger.propagate = False
+    listener.start()
+    return listener
+
+def stop_log_queue(listener):
+    """Flush the queue and give the cron logger its handlers back."""
+    if listener is None:
+        return
+    listener.stop()
+    logger.handlers, logger.propagate = listener.restore
 
 def load_settings_from_db():
     """Load settings from swift_settings table"""
-    global FOLDER_IN, FOLDER_OUT, WORK_FROM_MEMORY
+    global FOLDER_IN, FOLDER_OUT, WORK_FROM_MEMORY, XSD_FOLDER, CANCEL_STATE_CODE, TRN_PROCESSES
+    global RETENTION_MONTHS, PURGE_BATCH_SIZE, PROFILE, PROFILE_FOLDER
+    global PRIORITY_CLASSES, PRIORITY_AGING_SECONDS, RUN_MAX_FILES, RUN_MAX_BYTES, RUN_MAX_SECONDS
 
     logger.info('=== Starting load_settings_from_db ===')
     logger.info('Loading settings from swift_settings table...')
-    logger.info(f'WORK_FROM_MEMORY mode: {WORK_FROM_MEMORY}')
+    logger.info('WORK_FROM_MEMORY mode: %s', WORK_FROM_MEMORY)
 
     sql = """
-        SELECT folder_in, folder_out, server
+        SELECT folder_in, folder_out, server, xsd_folder, cancel_state_code, trn_processes,
+               retention_months, purge_batch_size, profile, profile_folder,
+               priority_classes, priority_aging_seconds,
+               run_max_files, run_max_bytes, run_max_seconds
         FROM swift_settings
         LIMIT 1
     """
@@ -59,6 +387,27 @@ def load_settings_from_db():
             FOLDER_IN = settings.get('folder_in')
             FOLDER_OUT = settings.get('folder_out')
             server = settings.get('server')
+            XSD_FOLDER = settings.get('xsd_folder')
+            CANCEL_STATE_CODE = settings.get('cancel_state_code')
+            TRN_PROCESSES = bool(settings.get('trn_processes'))
+            RETENTION_MONTHS = settings.get('retention_months') or None
+            PURGE_BATCH_SIZE = settings.get('purge_batch_size') or PURGE_BATCH_SIZE
+            PROFILE = os.environ.get('SWIFT_PROFILE') or settings.get('profile') or None
+            PROFILE_FOLDER = (
+                os.environ.get('SWIFT_PROFILE_DIR') or settings.get('profile_folder')
+                or os.path.join(tempfile.gettempdir(), 'swift-profiles')
+            )
+            PRIORITY_CLASSES = (
+                os.environ.get('SWIFT_PRIORITY_CLASSES') or settings.get('priority_classes') or PRIORITY_CLASSES
+            )
+            PRIORITY_AGING_SECONDS = settings.get('priority_aging_seconds') or PRIORITY_AGING_SECONDS
+            RUN_MAX_FILES = int(os.environ.get('SWIFT_RUN_MAX_FILES') or settings.get('run_max_files') or 0) or None
+            RUN_MAX_BYTES = int(os.environ.get('SWIFT_RUN_MAX_BYTES') or settings.get('run_max_bytes') or 0) or None
+            # 0 (env or swift_settings) = no limit, NULL keeps the default
+            run_max_seconds = os.environ.get('SWIFT_RUN_MAX_SECONDS') or settings.get('run_max_seconds')
+            if run_max_seconds is None:
+                run_max_seconds = RUN_MAX_SECONDS
+            RUN_MAX_SECONDS = float(run_max_seconds or 0) or None
 
             if not FOLDER_IN:
                 raise UserException({
@@ -74,9 +423,20 @@ def load_settings_from_db():
 
             logger.info('='*60)
             logger.info('SETTINGS LOADED FROM DATABASE:')
-            logger.info(f'  folder_in:  {FOLDER_IN}')
-            logger.info(f'  folder_out: {FOLDER_OUT}')
-            logger.info(f'  server:     {server or "not set"}')
+            logger.info('  folder_in:  %s', FOLDER_IN)
+            logger.info('  folder_out: %s', FOLDER_OUT)
+            logger.info('  server:     %s', server or 'not set')
+            logger.info('  xsd_folder: %s', XSD_FOLDER or 'not set (validation off)')
+            logger.info('  cancel_state_code: %s', CANCEL_STATE_CODE or 'not set')
+            logger.info('  trn_processes: %s', TRN_PROCESSES)
+            logger.info('  retention_months: %s', RETENTION_MONTHS or 'not set (keep forever)')
+            if PROFILE:
+                logger.info('  profile: %s -> %s', PROFILE, PROFILE_FOLDER)
+            logger.info('  priority_classes: %s (aging %s s)', PRIORITY_CLASSES, PRIORITY_AGING_SECONDS)
+            logger.info(
+                '  run budget: %s file(s), %s bytes, %s s',
+                RUN_MAX_FILES or '-', RUN_MAX_BYTES or '-', RUN_MAX_SECONDS or '-'
+            )
             logger.info('='*60)
 
             # Check and create folders ONLY if NOT in memory mode
@@ -84,18 +444,18 @@ def load_settings_from_db():
                 logger.debug('Checking folders (filesystem mode)...')
                 for folder_path, folder_name in [(FOLDER_IN, 'folder_in'), (FOLDER_OUT, 'folder_out')]:
                     if not os.path.exists(folder_path):
-                        logger.warning(f'{folder_name} does not exist: {folder_path}')
-                        logger.debug(f'Creating {folder_name}: {folder_path}')
+                        logger.warning('%s does not exist: %s', folder_name, folder_path)
+                        logger.debug('Creating %s: %s', folder_name, folder_path)
                         try:
                             os.makedirs(folder_path, exist_ok=True)
-                            logger.debug(f'✓ Created {folder_name}: {folder_path}')
+                            logger.debug('✓ Created %s: %s', folder_name, folder_path)
                         except Exception as e:
                             raise UserException({
                                 'message': f'Cannot create {folder_name}: {folder_path}',
                                 'description': str(e)
                             })
                     else:
-                        logger.debug(f'✓ {folder_name} exists: {folder_path}')
+                        logger.debug('✓ %s exists: %s', folder_name, folder_path)
             else:
                 logger.info('MEMORY MODE: Skipping folder creation/checks')
 
@@ -106,7 +466,7 @@ def load_settings_from_db():
     except UserException:
         raise
     except Exception as e:
-        logger.error(f'Error loading settings from database: {e}')
+        logger.error('Error loading settings from database: %s', e)
         raise UserException({
             'message': 'Error loading SWIFT settings from database',
             'description': str(e)
@@ -146,59 +506,376 @@ def _find_all_by_localname(parent, localname):
             results.append(el)
     return results
 
+def _extract_payment_refs(root, result):
+    """Fill msg_id, instr_id and uetr of a pacs.008/pacs.009 into result."""
+    grp_hdr = _find_first_by_localname(root, 'GrpHdr')
+    result['msg_id'] = _find_child_text_local(grp_hdr, 'MsgId')
+
+    pmt_id = _find_first_by_localname(root, 'PmtId')
+    result['instr_id'] = _find_child_text_local(pmt_id, 'InstrId')
+    uetr_text = _find_child_text_local(pmt_id, 'UETR')
+    if uetr_text:
+        try:
+            uuid.UUID(uetr_text)
+            result['uetr'] = uetr_text
+        except ValueError:
+            result['uetr'] = None
+
+def _project_element(el):
+    """Convert element to JSON-ready value: leaf -> text, otherwise dict by localname.
+
+    Attributes become '@Name' keys (text of such leaf goes to '#text'),
+    names met more than once under the same parent become lists.
+    """
+    attrs = {
+        '@' + name.rsplit('}', 1)[-1]: value
+        for name, value in el.attrib.items()
+        if not name.startswith('{http://www.w3.org/2001/XMLSchema-instance}')
+    }
+    children = [child for child in el if isinstance(child.tag, str)]
+    text = (el.text or '').strip() or None
+    if not children:
+        if not attrs:
+            return text
+        if text is not None:
+            attrs['#text'] = text
+        return attrs
+
+    node = attrs
+    for child in children:
+        name = child.tag.rsplit('}', 1)[-1]
+        value = _project_element(child)
+        if name not in node:
+            node[name] = value
+        elif isinstance(node[name], list):
+            node[name].append(value)
+        else:
+            node[name] = [node[name], value]
+    return node
+
+def build_projection(root):
+    """Compact JSON of the parsed message for swift_input.parsed, keyed by localname.
+
+    The envelope is dropped, so a file gives {"AppHdr": ..., "Document": ...};
+    a bare Document root is kept under its own name.
+    """
+    if root is None:
+        return None
+    projection = _project_element(root)
+    if root.tag.rsplit('}', 1)[-1] == 'Document':
+        projection = {'Document': projection}
+    if not isinstance(projection, dict):
+        return None
+    return json.dumps(projection, ensure_ascii=False, separators=(',', ':'))
+
 def detect_message_type(xml_text):
     """Detect message type from MsgDefIdr in AppHdr.
 
+    Only the text up to MsgDefIdr is parsed: this is not a well-formedness
+    check. The rest is checked by the full parse of a single message (its
+    extractor records the parse error) or by the streaming pass of a batch.
+
     Returns: 'pacs.008', 'pacs.009', 'camt.053', 'camt.054', 'camt.056', or None
     """
     logger.info('=== Starting detect_message_type ===')
-    logger.info(f'  XML content length: {len(xml_text) if xml_text else 0} chars')
+    logger.debug('  XML content length: %s chars', len(xml_text) if xml_text else 0)
     
     try:
-        root = ET.fromstring(xml_text)
+        # Stream only up to MsgDefIdr (in AppHdr) instead of building the whole tree
+        msg_def_idr_el = None
+        for _, el in ET.iterparse(io.StringIO(xml_text)):
+            if isinstance(el.tag, str) and (el.tag.endswith('}MsgDefIdr') or el.tag == 'MsgDefIdr'):
+                msg_def_idr_el = el
+                break
         logger.debug('  XML parsed successfully')
-        
-        msg_def_idr_el = _find_first_by_localname(root, 'MsgDefIdr')
 
         if msg_def_idr_el is not None:
             msg_def_idr = (msg_def_idr_el.text or '').strip()
-            logger.debug(f'  Found MsgDefIdr: {msg_def_idr}')
+            logger.debug('  Found MsgDefIdr: %s', msg_def_idr)
             
             # Extract type: "pacs.008.001.08" -> "pacs.008"
             if msg_def_idr:
                 parts = msg_def_idr.split('.')
                 if len(parts) >= 2:
                     msg_type = f"{parts[0]}.{parts[1]}"
-                    logger.info(f'  ✓ Detected message type: {msg_type} (from {msg_def_idr})')
+                    logger.debug('  ✓ Detected message type: %s (from %s)', msg_type, msg_def_idr)
                     return msg_type
                 else:
-                    logger.debug(f'  Invalid MsgDefIdr format: {msg_def_idr}')
+                    logger.debug('  Invalid MsgDefIdr format: %s', msg_def_idr)
 
         logger.debug('  ✗ Message type not detected (no MsgDefIdr found)')
         return None
 
     except Exception as e:
-        logger.error(f'  ✗ Error detecting message type: {e}')
-        logger.error(f'  Traceback: {traceback.format_exc()}')
+        logger.error('  ✗ Error detecting message type: %s', e, exc_info=True)
+        return None
+
+def xml_parser():
+    """lxml parser for incoming files: no entity expansion (XXE), no network access."""
+    return LET.XMLParser(resolve_entities=False, no_network=True)
+
+def get_xsd_validator(msg_def_idr):
+    """Return compiled schema for MsgDefIdr, loading it once per process.
+
+    Returns None when validation is off, lxml is missing or there is no schema file.
+    """
+    if not XSD_FOLDER or LET is None or not msg_def_idr:
+        return None
+
+    if msg_def_idr in XSD_VALIDATORS:
+        return XSD_VALIDATORS[msg_def_idr]
+
+    schema = None
+    xsd_path = os.path.join(XSD_FOLDER, f'{msg_def_idr}.xsd')
+    if os.path.exists(xsd_path):
+        try:
+            schema = LET.XMLSchema(LET.parse(xsd_path, xml_parser()))
+            logger.info('  Loaded XSD for %s: %s', msg_def_idr, xsd_path)
+        except Exception as e:
+            logger.error('  Error loading XSD %s: %s', xsd_path, e)
+    else:
+        logger.warning('  No XSD for %s in %s, skipping validation', msg_def_idr, XSD_FOLDER)
+
+    # Cache misses too, so a missing schema is reported once per process
+    XSD_VALIDATORS[msg_def_idr] = schema
+    return schema
+
+def _xsd_errors(schema, element, part):
+    errors = []
+    if not schema.validate(element):
+        for err in list(schema.error_log)[:XSD_MAX_ERRORS]:
+            errors.append(f'{part} line {err.line}: {err.message}')
+    return errors
+
+def validate_message(content):
+    """Validate AppHdr and Document against their XSDs.
+
+    Returns error text, or None when valid or validation is off.
+    """
+    if not XSD_FOLDER or LET is None:
+        return None
+
+    try:
+        root = LET.fromstring(content.encode('utf-8') if isinstance(content, str) else content, xml_parser())
+    except Exception as e:
+        return f'XSD validation: XML parse error: {e}'
+
+    errors = []
+    for el in root.iter():
+        if not isinstance(el.tag, str):
+            continue
+        qname = LET.QName(el)
+        if qname.localname not in ('AppHdr', 'Document') or not qname.namespace:
+            continue
+        # urn:iso:std:iso:20022:tech:xsd:pacs.008.001.08 -> pacs.008.001.08
+        msg_def_idr = qname.namespace.rsplit(':', 1)[-1]
+        schema = get_xsd_validator(msg_def_idr)
+        if schema is not None:
+            errors.extend(_xsd_errors(schema, el, qname.localname))
+
+    if not errors:
         return None
+    return 'XSD validation:\n' + '\n'.join(errors[:XSD_MAX_ERRORS])
+
+# ISO 20022 amounts have at most 5 fraction digits, so 10^5 units are exact
+AMOUNT_SCALE_DIGITS = 5
+
+def _amount_to_units(amt_text):
+    """Convert '1234.5' to integer units of 10^-5 without Decimal; None if not a number."""
+    if not amt_text:
+        return None
+    whole, _, frac = amt_text.partition('.')
+    if not whole.isdigit() or (frac and not frac.isdigit()) or len(frac) > AMOUNT_SCALE_DIGITS:
+        return None
+    return int(whole) * 10 ** AMOUNT_SCALE_DIGITS + int(frac.ljust(AMOUNT_SCALE_DIGITS, '0') or 0)
+
+def _format_units(units):
+    sign = '-' if units < 0 else ''
+    whole, frac = divmod(abs(units), 10 ** AMOUNT_SCALE_DIGITS)
+    return f'{sign}{whole}.{str(frac).rjust(AMOUNT_SCALE_DIGITS, "0").rstrip("0") or "0"}'
+
+def _units_to_decimal(units):
+    return Decimal(units).scaleb(-AMOUNT_SCALE_DIGITS)
+
+def _extract_account_id(parent):
+    """Account of a Stmt/Ntfctn: Acct/Id/IBAN or Acct/Id/Othr/Id."""
+    acct_el = _find_first_by_localname(parent, 'Acct')
+    if acct_el is None:
+        return None
+    iban = _find_child_text_local(acct_el, 'IBAN')
+    if iban:
+        return iban
+    return _find_child_text_local(_find_first_by_localname(acct_el, 'Othr'), 'Id')
+
+def update_ledger_from_statement(cursor, swift_input_id, acct_id, balances, balance_dates, entry_totals):
+    """Store the statement day per currency and make it the booked position.
+
+    Intraday camt.054 deltas dated after the statement stay on top of the
+    new booked balance; deltas up to the statement date are covered by it.
+    """
+    if not acct_id:
+        logger.debug('  Ledger skipped: statement has no account')
+        return
+    for (tp_cd, ccy), closing in balances.items():
+        if tp_cd != 'CLBD' or not balance_dates.get((tp_cd, ccy)):
+            continue
+        bal_date = balance_dates[(tp_cd, ccy)][:10]
+        opening = balances.get(('OPBD', ccy), balances.get(('PRCD', ccy)))
+        params = {
+            'acct_id': acct_id,
+            'ccy': ccy,
+            'bal_date': bal_date,
+            'opening': _units_to_decimal(opening) if opening is not None else None,
+            'movement': _units_to_decimal(entry_totals.get(ccy, 0)),
+            'closing': _units_to_decimal(closing),
+            'swift_input_id': swift_input_id,
+        }
+        cursor.execute("""
+            INSERT INTO swift_account_ledger AS l
+                (acct_id, ccy, bal_date, opening_bal, stmt_movement, closing_bal, stmt_swift_input_id, updated)
+            VALUES (%(acct_id)s, %(ccy)s, %(bal_date)s, %(opening)s, %(movement)s, %(closing)s, %(swift_input_id)s, now())
+            ON CONFLICT (acct_id, ccy, bal_date) DO UPDATE SET
+                opening_bal = excluded.opening_bal,
+                stmt_movement = excluded.stmt_movement,
+                closing_bal = excluded.closing_bal,
+                stmt_swift_input_id = excluded.stmt_swift_input_id,
+                updated = now()
+        """, params)
+        # A late statement for an older day does not move the position back
+        cursor.execute("""
+            INSERT INTO swift_account_position AS p
+                (acct_id, ccy, booked_date, booked_bal, intraday_delta, position, updated)
+            SELECT %(acct_id)s, %(ccy)s, %(bal_date)s, %(closing)s, d.delta, %(closing)s + d.delta, now()
+            FROM (
+                SELECT coalesce(sum(intraday_delta), 0) AS delta
+                FROM swift_account_ledger
+                WHERE acct_id = %(acct_id)s AND ccy = %(ccy)s AND bal_date > %(bal_date)s::date
+            ) d
+            ON CONFLICT (acct_id, ccy) DO UPDATE SET
+                booked_date = excluded.booked_date,
+                booked_bal = excluded.booked_bal,
+                intraday_delta = excluded.intraday_delta,
+                position = excluded.position,
+                updated = now()
+            WHERE p.booked_date IS NULL OR p.booked_date <= excluded.booked_date
+        """, params)
+        logger.debug('  Ledger: %s %s booked %s on %s', acct_id, ccy, params['closing'], bal_date)
+
+def update_ledger_from_notification(cursor, swift_input_id, movements):
+    """Add camt.054 booked movements to the ledger day and, if newer than the
+    last statement, to the account position.
+
+    Every movement is recorded once in swift_account_movement under its key;
+    movements already there (the same notification imported or processed
+    again) are not added a second time.
+
+    Args:
+        movements: list of (acct_id, ccy, date, movement key, signed units)
+    """
+    if not movements:
+        return
+    cursor.execute("""
+        INSERT INTO swift_account_movement (acct_id, ccy, movement_key, bal_date, amount, swift_input_id)
+        SELECT m.acct_id, m.ccy, m.movement_key, m.bal_date, m.amount, %(swift_input_id)s
+        FROM unnest(%(acct_id)s::text[], %(ccy)s::text[], %(movement_key)s::text[], %(bal_date)s::date[], %(amount)s::numeric[])
+            AS m(acct_id, ccy, movement_key, bal_date, amount)
+        ON CONFLICT (acct_id, ccy, movement_key) DO NOTHING
+        RETURNING acct_id, ccy, bal_date, amount
+    """, {
+        'swift_input_id': swift_input_id,
+        'acct_id': [m[0] for m in movements],
+        'ccy': [m[1] for m in movements],
+        'movement_key': [m[3] for m in movements],
+        'bal_date': [m[2] for m in movements],
+        'amount': [_units_to_decimal(m[4]) for m in movements],
+    })
+    # (acct_id, ccy, date) -> sum of the movements new to the ledger
+    deltas = {}
+    applied = fetchall(cursor)
+    for row in applied:
+        key = (row.get('acct_id'), row.get('ccy'), str(row.get('bal_date'))[:10])
+        deltas[key] = deltas.get(key, 0) + row.get('amount')
+    if len(applied) < len(movements):
+        logger.info('  Ledger: %s of %s movement(s) already applied, skipped', len(movements) - len(applied), len(movements))
+
+    for (acct_id, ccy, bal_date), delta in deltas.items():
+        params = {'acct_id': acct_id, 'ccy': ccy, 'bal_date': bal_date, 'delta': delta}
+        cursor.execute("""
+            INSERT INTO swift_account_ledger AS l (acct_id, ccy, bal_date, intraday_delta, updated)
+            VALUES (%(acct_id)s, %(ccy)s, %(bal_date)s, %(delta)s, now())
+            ON CONFLICT (acct_id, ccy, bal_date) DO UPDATE SET
+                intraday_delta = l.intraday_delta + excluded.intraday_delta,
+                updated = now()
+        """, params)
+        cursor.execute("""
+            INSERT INTO swift_account_position AS p (acct_id, ccy, intraday_delta, position, updated)
+            VALUES (%(acct_id)s, %(ccy)s, %(delta)s, %(delta)s, now())
+            ON CONFLICT (acct_id, ccy) DO UPDATE SET
+                intraday_delta = p.intraday_delta + excluded.intraday_delta,
+                position = p.position + excluded.intraday_delta,
+                updated = now()
+            WHERE p.booked_date IS NULL OR p.booked_date < %(bal_date)s::date
+        """, params)
+
+def check_statement_balance(balances, entry_totals):
+    """Compare opening balance + booked entries with closing balance per currency.
+
+    Args:
+        balances: dict (balance type code, currency) -> signed units
+        entry_totals: dict currency -> signed units of booked entries
 
-def process_camt053(content, swift_input_id, cursor):
+    Returns:
+        tuple (status, details): 'OK' or 'MISMATCH' with per-currency text,
+        (None, None) when the statement has no OPBD/PRCD and CLBD to compare
+    """
+    currencies = sorted({ccy for _, ccy in balances} | set(entry_totals))
+    details = []
+    status = None
+    for ccy in currencies:
+        opening = balances.get(('OPBD', ccy), balances.get(('PRCD', ccy)))
+        closing = balances.get(('CLBD', ccy))
+        if opening is None or closing is None:
+            continue
+        movement = entry_totals.get(ccy, 0)
+        diff = opening + movement - closing
+        if diff:
+            status = 'MISMATCH'
+            details.append(
+                f'{ccy}: opening {_format_units(opening)} + entries {_format_units(movement)}'
+                f' - closing {_format_units(closing)} = {_format_units(diff)}'
+            )
+        elif status is None:
+            status = 'OK'
+    return status, '\n'.join(details) or None
+
+def process_camt053(content, swift_input_id, cursor, root=None):
     """Process camt.053 statement and insert balances, entries, and transaction details.
 
     Args:
         content: XML content as string
         swift_input_id: UUID of the swift_input record
         cursor: Database cursor
+        root: already parsed document to use instead of content
+
+    Opening balance + booked entries = closing balance is checked per currency
+    on the fly and the result is stored in swift_input.balance_check; the
+    closing balance becomes the booked position in the account ledger.
 
     Returns:
-        dict with counts: {'balances': N, 'entries': N, 'tx_details': N}
+        dict with counts: {'balances': N, 'entries': N, 'tx_details': N, 'balance_check': status}
     """
-    logger.debug(f'  Processing camt.053 for swift_input_id={swift_input_id}')
+    logger.debug('  Processing camt.053 for swift_input_id=%s', swift_input_id)
+
+    counts = {'balances': 0, 'entries': 0, 'tx_details': 0, 'errors': 0, 'balance_check': None}
 
-    counts = {'balances': 0, 'entries': 0, 'tx_details': 0}
+    # Signed integer units for the balance check: (tp_cd, ccy) -> units, ccy -> units
+    balance_units = {}
+    balance_dates = {}
+    entry_units = {}
 
     try:
-        root = ET.fromstring(content)
+        if root is None:
+            root = ET.fromstring(content)
 
         # Find Stmt element
         stmt = _find_first_by_localname(root, 'Stmt')
@@ -208,7 +885,7 @@ def process_camt053(content, swift_input_id, cursor):
 
         # Process Balances (Bal)
         bal_elements = _find_all_by_localname(stmt, 'Bal')
-        logger.debug(f'  Found {len(bal_elements)} balance(s)')
+        logger.debug('  Found %s balance(s)', len(bal_elements))
 
         for bal_el in bal_elements:
             try:
@@ -243,6 +920,11 @@ def process_camt053(content, swift_input_id, cursor):
                             dt_text = (child_dt.text or '').strip()
                             break
 
+                units = _amount_to_units(amt_text)
+                if tp_cd and units is not None:
+                    balance_units[(tp_cd, amt_ccy)] = -units if cdt_dbt_ind == 'DBIT' else units
+                    balance_dates[(tp_cd, amt_ccy)] = dt_text
+
                 # Insert balance
                 if tp_cd and amt is not None and cdt_dbt_ind and dt_text:
                     cursor.execute("""
@@ -251,15 +933,18 @@ def process_camt053(content, swift_input_id, cursor):
                         VALUES (%s, %s, %s, %s, %s, %s)
                     """, (swift_input_id, tp_cd, amt, amt_ccy, cdt_dbt_ind, dt_text))
                     counts['balances'] += 1
-                    logger.debug(f'    Inserted balance: {tp_cd} = {amt} {amt_ccy} ({cdt_dbt_ind})')
+                    if log_sampled(counts['balances']):
+                        logger.debug('    Inserted balance: %s = %s %s (%s)', tp_cd, amt, amt_ccy, cdt_dbt_ind)
 
             except Exception as bal_err:
-                logger.error(f'    Error processing balance: {bal_err}')
+                counts['errors'] += 1
+                if log_sampled(counts['errors'], logging.ERROR):
+                    logger.error('    Error processing balance: %s', bal_err)
                 continue
 
         # Process Entries (Ntry)
         ntry_elements = _find_all_by_localname(stmt, 'Ntry')
-        logger.debug(f'  Found {len(ntry_elements)} entry/entries')
+        logger.debug('  Found %s entry/entries', len(ntry_elements))
 
         for ntry_el in ntry_elements:
             try:
@@ -349,13 +1034,22 @@ def process_camt053(content, swift_input_id, cursor):
                     ntry_id = ntry_id_result
 
                 counts['entries'] += 1
-                logger.debug(f'    Inserted entry: ntry_id={ntry_id}, amt={amt} {amt_ccy}, status={sts_cd}')
+                sampled = log_sampled(counts['entries'])
+                if sampled:
+                    logger.debug('    Inserted entry: ntry_id=%s, amt=%s %s, status=%s', ntry_id, amt, amt_ccy, sts_cd)
+
+                # Only booked entries move the booked balance
+                if sts_cd == 'BOOK':
+                    units = _amount_to_units(amt_text)
+                    if units is not None:
+                        entry_units[amt_ccy] = entry_units.get(amt_ccy, 0) + (-units if cdt_dbt_ind == 'DBIT' else units)
 
                 # Process Transaction Details (TxDtls)
                 ntry_dtls = _find_first_by_localname(ntry_el, 'NtryDtls')
                 if ntry_dtls:
                     tx_dtls_elements = _find_all_by_localname(ntry_dtls, 'TxDtls')
-                    logger.debug(f'      Found {len(tx_dtls_elements)} transaction detail(s)')
+                    if sampled:
+                        logger.debug('      Found %s transaction detail(s)', len(tx_dtls_elements))
 
                     for tx_dtls_el in tx_dtls_elements:
                         try:
@@ -372,7 +1066,6 @@ def process_camt053(content, swift_input_id, cursor):
                                 if uetr_text:
                                     try:
                                         # Validate UUID format
-                                        import uuid
                                         uuid.UUID(uetr_text)
                                         uetr = uetr_text
                                     except:
@@ -411,38 +1104,62 @@ def process_camt053(content, swift_input_id, cursor):
                                   tx_cdt_dbt_ind, intr_bk_sttlm_dt))
 
                             counts['tx_details'] += 1
-                            logger.debug(f'        Inserted tx_detail: end_to_end={end_to_end_id}, amt={tx_amt}')
+                            if sampled:
+                                logger.debug('        Inserted tx_detail: end_to_end=%s, amt=%s', end_to_end_id, tx_amt)
 
                         except Exception as tx_err:
-                            logger.error(f'        Error processing transaction detail: {tx_err}')
+                            counts['errors'] += 1
+                            if log_sampled(counts['errors'], logging.ERROR):
+                                logger.error('        Error processing transaction detail: %s', tx_err)
                             continue
 
             except Exception as ntry_err:
-                logger.error(f'    Error processing entry: {ntry_err}')
+                counts['errors'] += 1
+                if log_sampled(counts['errors'], logging.ERROR):
+                    logger.error('    Error processing entry: %s', ntry_err)
                 continue
 
-        logger.debug(f'  camt.053 processing complete: {counts["balances"]} balances, {counts["entries"]} entries, {counts["tx_details"]} tx_details')
+        status, details = check_statement_balance(balance_units, entry_units)
+        counts['balance_check'] = status
+        if status == 'MISMATCH':
+            logger.warning('  ✗ Statement balance mismatch:\n%s', details)
+        elif status is None:
+            logger.debug('  Balance check skipped: no opening/closing balance pair')
+        cursor.execute("""
+            UPDATE swift_input SET balance_check = %s, balance_check_details = %s WHERE id = %s
+        """, (status, details, swift_input_id))
+
+        update_ledger_from_statement(
+            cursor, swift_input_id, _extract_account_id(stmt), balance_units, balance_dates, entry_units
+        )
+
+        logger.debug(
+            '  camt.053 processing complete: %s balances, %s entries, %s tx_details, %s error(s)',
+            counts['balances'], counts['entries'], counts['tx_details'], counts['errors']
+        )
         return counts
 
     except Exception as e:
-        logger.error(f'  Error processing camt.053: {e}')
-        logger.error(f'  Traceback: {traceback.format_exc()}')
+        logger.error('  Error processing camt.053: %s', e, exc_info=True)
         return counts
 
-def process_pacs008(content, swift_input_id=None, cursor=None):
+def process_pacs008(content, swift_input_id=None, cursor=None, root=None):
     """Process pacs.008 (Customer Credit Transfer) - extract fields for swift_input table.
 
     Args:
         content: XML content as string
         swift_input_id: UUID of swift_input record (not used for pacs.008)
         cursor: Database cursor (not used for pacs.008)
+        root: already parsed element to extract from instead of content
+            (batch ingestion passes GrpHdr + one CdtTrfTxInf)
 
-    Returns dict with keys: snd_name, rcv_name, amount, currency_code, dval, code, message,
+    Returns dict with keys: snd_name, rcv_name, amount, currency_code, dval, code,
+    msg_id, instr_id, uetr, message,
     snd_acc, rcv_acc, snd_bank, snd_bank_name, snd_mid_bank, snd_mid_bank_name,
     snd_mid_bank_acc, rcv_bank, rcv_bank_name, error.
     """
     logger.debug('=== Starting process_pacs008 ===')
-    logger.debug(f'  Content length: {len(content)} chars')
+    logger.debug('  Content length: %s chars', len(content) if content else 0)
     
     result = {
         'snd_name': None,
@@ -451,6 +1168,9 @@ def process_pacs008(content, swift_input_id=None, cursor=None):
         'currency_code': None,
         'dval': None,
         'code': None,
+        'msg_id': None,
+        'instr_id': None,
+        'uetr': None,
         'message': None,
         'snd_acc': None,
         'rcv_acc': None,
@@ -465,7 +1185,8 @@ def process_pacs008(content, swift_input_id=None, cursor=None):
     }
 
     try:
-        root = ET.fromstring(content)
+        if root is None:
+            root = ET.fromstring(content)
     except Exception as e:
         tb = traceback.format_exc()
         result['error'] = f'XML parse error: {e}\\n\\nTraceback:\\n{tb}'
@@ -528,6 +1249,12 @@ def process_pacs008(content, swift_input_id=None, cursor=None):
     except Exception as e:
         pass
 
+    # References used for reconciliation and cancellation matching
+    try:
+        _extract_payment_refs(root, result)
+    except Exception as e:
+        pass
+
     # Message (Remittance Information)
     try:
         ustrd_el = _find_first_by_localname(root, 'Ustrd')
@@ -628,16 +1355,18 @@ def process_pacs008(content, swift_input_id=None, cursor=None):
 
     return result
 
-def process_pacs009(content, swift_input_id=None, cursor=None):
+def process_pacs009(content, swift_input_id=None, cursor=None, root=None):
     """Process pacs.009 (FI Credit Transfer / Cover Payment) - extract fields for swift_input table.
 
     Args:
         content: XML content as string
         swift_input_id: UUID of swift_input record (not used for pacs.009)
         cursor: Database cursor (not used for pacs.009)
+        root: already parsed element to extract from instead of content
+            (batch ingestion passes GrpHdr + one CdtTrfTxInf)
 
     Returns dict with keys: snd_name (bank BIC), rcv_name (bank BIC), amount, currency_code, dval,
-    code, message, snd_bank, rcv_bank, instd_agt, instd_agt_name,
+    code, msg_id, instr_id, uetr, message, snd_bank, rcv_bank, instd_agt, instd_agt_name,
     underlying_dbtr_name, underlying_dbtr_acc, underlying_dbtr_agt,
     underlying_cdtr_name, underlying_cdtr_acc, underlying_cdtr_agt, error.
     """
@@ -649,6 +1378,9 @@ def process_pacs009(content, swift_input_id=None, cursor=None):
         'currency_code': None,
         'dval': None,
         'code': None,
+        'msg_id': None,
+        'instr_id': None,
+        'uetr': None,
         'message': None,
         
         # Bank participants
@@ -669,7 +1401,8 @@ def process_pacs009(content, swift_input_id=None, cursor=None):
     }
 
     try:
-        root = ET.fromstring(content)
+        if root is None:
+            root = ET.fromstring(content)
     except Exception as e:
         tb = traceback.format_exc()
         result['error'] = f'XML parse error: {e}\\n\\nTraceback:\\n{tb}'
@@ -688,7 +1421,7 @@ def process_pacs009(content, swift_input_id=None, cursor=None):
                 bic = _find_child_text_local(fin_instn_id, 'BICFI')
                 result['snd_name'] = bic  # Bank BIC, not customer name
     except Exception as e:
-        logger.debug(f'Error extracting Dbtr bank: {e}')
+        logger.debug('Error extracting Dbtr bank: %s', e)
 
     # Creditor (Bank) - FinInstnId
     try:
@@ -699,7 +1432,7 @@ def process_pacs009(content, swift_input_id=None, cursor=None):
                 bic = _find_child_text_local(fin_instn_id, 'BICFI')
                 result['rcv_name'] = bic  # Bank BIC, not customer name
     except Exception as e:
-        logger.debug(f'Error extracting Cdtr bank: {e}')
+        logger.debug('Error extracting Cdtr bank: %s', e)
 
     # Instructed Agent
     try:
@@ -712,7 +1445,7 @@ def process_pacs009(content, swift_input_id=None, cursor=None):
                 name = _find_child_text_local(fin_instn_id, 'Nm')
                 result['instd_agt_name'] = name
     except Exception as e:
-        logger.debug(f'Error extracting InstdAgt: {e}')
+        logger.debug('Error extracting InstdAgt: %s', e)
 
     # Debtor Agent
     try:
@@ -723,7 +1456,7 @@ def process_pacs009(content, swift_input_id=None, cursor=None):
                 bic = _find_child_text_local(fin_instn_id, 'BICFI')
                 result['snd_bank'] = bic
     except Exception as e:
-        logger.debug(f'Error extracting DbtrAgt: {e}')
+        logger.debug('Error extracting DbtrAgt: %s', e)
 
     # Creditor Agent
     try:
@@ -734,7 +1467,7 @@ def process_pacs009(content, swift_input_id=None, cursor=None):
                 bic = _find_child_text_local(fin_instn_id, 'BICFI')
                 result['rcv_bank'] = bic
     except Exception as e:
-        logger.debug(f'Error extracting CdtrAgt: {e}')
+        logger.debug('Error extracting CdtrAgt: %s', e)
 
     # Amount and currency
     try:
@@ -776,6 +1509,12 @@ def process_pacs009(content, swift_input_id=None, cursor=None):
     except Exception as e:
         pass
 
+    # References used for cancellation matching
+    try:
+        _extract_payment_refs(root, result)
+    except Exception as e:
+        pass
+
     # ========================================================================
     # UNDERLYING CUSTOMER CREDIT TRANSFER (real customer info!)
     # ========================================================================
@@ -789,7 +1528,7 @@ def process_pacs009(content, swift_input_id=None, cursor=None):
                 if dbtr:
                     result['underlying_dbtr_name'] = _find_child_text_local(dbtr, 'Nm')
             except Exception as e:
-                logger.debug(f'Error extracting underlying debtor name: {e}')
+                logger.debug('Error extracting underlying debtor name: %s', e)
 
             # Underlying Debtor Account
             try:
@@ -805,7 +1544,7 @@ def process_pacs009(content, swift_input_id=None, cursor=None):
                             if othr_id:
                                 result['underlying_dbtr_acc'] = othr_id
             except Exception as e:
-                logger.debug(f'Error extracting underlying debtor account: {e}')
+                logger.debug('Error extracting underlying debtor account: %s', e)
 
             # Underlying Debtor Agent
             try:
@@ -816,7 +1555,7 @@ def process_pacs009(content, swift_input_id=None, cursor=None):
                         bic = _find_child_text_local(fin_instn_id, 'BICFI')
                         result['underlying_dbtr_agt'] = bic
             except Exception as e:
-                logger.debug(f'Error extracting underlying debtor agent: {e}')
+                logger.debug('Error extracting underlying debtor agent: %s', e)
 
             # Underlying Creditor (real customer)
             try:
@@ -824,7 +1563,7 @@ def process_pacs009(content, swift_input_id=None, cursor=None):
                 if cdtr:
                     result['underlying_cdtr_name'] = _find_child_text_local(cdtr, 'Nm')
             except Exception as e:
-                logger.debug(f'Error extracting underlying creditor name: {e}')
+                logger.debug('Error extracting underlying creditor name: %s', e)
 
             # Underlying Creditor Account
             try:
@@ -840,7 +1579,7 @@ def process_pacs009(content, swift_input_id=None, cursor=None):
                             if othr_id:
                                 result['underlying_cdtr_acc'] = othr_id
             except Exception as e:
-                logger.debug(f'Error extracting underlying creditor account: {e}')
+                logger.debug('Error extracting underlying creditor account: %s', e)
 
             # Underlying Creditor Agent
             try:
@@ -851,45 +1590,54 @@ def process_pacs009(content, swift_input_id=None, cursor=None):
                         bic = _find_child_text_local(fin_instn_id, 'BICFI')
                         result['underlying_cdtr_agt'] = bic
             except Exception as e:
-                logger.debug(f'Error extracting underlying creditor agent: {e}')
+                logger.debug('Error extracting underlying creditor agent: %s', e)
 
     except Exception as e:
-        logger.error(f'Error processing UndrlygCstmrCdtTrf: {e}')
+        logger.error('Error processing UndrlygCstmrCdtTrf: %s', e)
         result['error'] = (result['error'] or '') + f' | underlying customer error: {e}'
 
     return result
 
-def process_camt054(content, swift_input_id, cursor):
+def process_camt054(content, swift_input_id, cursor, root=None):
     """Process camt.054 notification and insert notification entries and transaction details.
 
     Args:
         content: XML content as string
         swift_input_id: UUID of the swift_input record
         cursor: Database cursor
+        root: already parsed document to use instead of content
+
+    Booked entries are summed per account, currency and booking date and
+    applied to the account ledger as intraday deltas.
 
     Returns:
         dict with counts: {'entries': N, 'tx_details': N}
     """
-    logger.debug(f'  Processing camt.054 for swift_input_id={swift_input_id}')
+    logger.debug('  Processing camt.054 for swift_input_id=%s', swift_input_id)
+
+    counts = {'entries': 0, 'tx_details': 0, 'errors': 0}
 
-    counts = {'entries': 0, 'tx_details': 0}
+    # (acct_id, ccy, date, movement key, signed integer units) of booked entries
+    ledger_movements = []
 
     try:
-        root = ET.fromstring(content)
+        if root is None:
+            root = ET.fromstring(content)
 
         # Find all Ntfctn elements
         ntfctn_elements = _find_all_by_localname(root, 'Ntfctn')
-        logger.debug(f'  Found {len(ntfctn_elements)} notification(s)')
+        logger.debug('  Found %s notification(s)', len(ntfctn_elements))
 
         for ntfctn_el in ntfctn_elements:
             # Extract notification ID
             ntfctn_id = _find_child_text_local(ntfctn_el, 'Id')
+            acct_id = _extract_account_id(ntfctn_el)
             
             # Process Entries (Ntry) within this notification
             ntry_elements = _find_all_by_localname(ntfctn_el, 'Ntry')
-            logger.debug(f'  Found {len(ntry_elements)} entry/entries in notification')
+            logger.debug('  Found %s entry/entries in notification', len(ntry_elements))
 
-            for ntry_el in ntry_elements:
+            for ntry_idx, ntry_el in enumerate(ntry_elements, 1):
                 try:
                     # Extract entry fields
                     ntry_ref = _find_child_text_local(ntry_el, 'NtryRef')
@@ -976,13 +1724,26 @@ def process_camt054(content, swift_input_id, cursor):
                         ntry_id = ntry_id_result
 
                     counts['entries'] += 1
-                    logger.debug(f'    Inserted notification entry: ntry_id={ntry_id}, amt={amt} {amt_ccy}')
+                    sampled = log_sampled(counts['entries'])
+                    if sampled:
+                        logger.debug('    Inserted notification entry: ntry_id=%s, amt=%s %s', ntry_id, amt, amt_ccy)
+
+                    if sts_cd == 'BOOK' and acct_id:
+                        units = _amount_to_units(amt_text)
+                        if units is not None:
+                            bal_date = (bookg_dt or val_dt or datetime.now().strftime('%Y-%m-%d'))[:10]
+                            # Same key when the notification comes again, whatever its swift_input_id
+                            movement_key = f'{ntfctn_id or swift_input_id}/{ntry_ref or acct_svcr_ref or ntry_idx}'
+                            ledger_movements.append(
+                                (acct_id, amt_ccy, bal_date, movement_key, -units if cdt_dbt_ind == 'DBIT' else units)
+                            )
 
                     # Process Transaction Details (TxDtls)
                     ntry_dtls = _find_first_by_localname(ntry_el, 'NtryDtls')
                     if ntry_dtls:
                         tx_dtls_elements = _find_all_by_localname(ntry_dtls, 'TxDtls')
-                        logger.debug(f'      Found {len(tx_dtls_elements)} transaction detail(s)')
+                        if sampled:
+                            logger.debug('      Found %s transaction detail(s)', len(tx_dtls_elements))
 
                         for tx_dtls_el in tx_dtls_elements:
                             try:
@@ -999,7 +1760,6 @@ def process_camt054(content, swift_input_id, cursor):
                                     if uetr_text:
                                         try:
                                             # Validate UUID format
-                                            import uuid
                                             uuid.UUID(uetr_text)
                                             uetr = uetr_text
                                         except:
@@ -1038,31 +1798,41 @@ def process_camt054(content, swift_input_id, cursor):
                                       tx_cdt_dbt_ind, intr_bk_sttlm_dt))
 
                                 counts['tx_details'] += 1
-                                logger.debug(f'        Inserted tx_detail: end_to_end={end_to_end_id}, amt={tx_amt}')
+                                if sampled:
+                                    logger.debug('        Inserted tx_detail: end_to_end=%s, amt=%s', end_to_end_id, tx_amt)
 
                             except Exception as tx_err:
-                                logger.error(f'        Error processing transaction detail: {tx_err}')
+                                counts['errors'] += 1
+                                if log_sampled(counts['errors'], logging.ERROR):
+                                    logger.error('        Error processing transaction detail: %s', tx_err)
                                 continue
 
                 except Exception as ntry_err:
-                    logger.error(f'    Error processing notification entry: {ntry_err}')
+                    counts['errors'] += 1
+                    if log_sampled(counts['errors'], logging.ERROR):
+                        logger.error('    Error processing notification entry: %s', ntry_err)
                     continue
 
-        logger.debug(f'  camt.054 processing complete: {counts["entries"]} entries, {counts["tx_details"]} tx_details')
+        update_ledger_from_notification(cursor, swift_input_id, ledger_movements)
+
+        logger.debug(
+            '  camt.054 processing complete: %s entries, %s tx_details, %s error(s)',
+            counts['entries'], counts['tx_details'], counts['errors']
+        )
         return counts
 
     except Exception as e:
-        logger.error(f'  Error processing camt.054: {e}')
-        logger.error(f'  Traceback: {traceback.format_exc()}')
+        logger.error('  Error processing camt.054: %s', e, exc_info=True)
         return counts
 
-def process_camt056(content, swift_input_id=None, cursor=None):
+def process_camt056(content, swift_input_id=None, cursor=None, root=None):
     """Process camt.056 (Payment Cancellation Request) - extract fields for swift_input table.
 
     Args:
         content: XML content as string
         swift_input_id: UUID of swift_input record (not used for camt.056)
         cursor: Database cursor (not used for camt.056)
+        root: already parsed element to extract from instead of content
 
     Returns dict with keys: case_id, case_assgnr, orgnl_msg_id, orgnl_msg_nm_id,
     orgnl_instr_id, orgnl_end_to_end_id, orgnl_tx_id, orgnl_uetr,
@@ -1083,7 +1853,8 @@ def process_camt056(content, swift_input_id=None, cursor=None):
     }
 
     try:
-        root = ET.fromstring(content)
+        if root is None:
+            root = ET.fromstring(content)
     except Exception as e:
         tb = traceback.format_exc()
         result['error'] = f'XML parse error: {e}\\n\\nTraceback:\\n{tb}'
@@ -1108,7 +1879,7 @@ def process_camt056(content, swift_input_id=None, cursor=None):
                     if fin_instn_id:
                         result['case_assgnr'] = _find_child_text_local(fin_instn_id, 'BICFI')
     except Exception as e:
-        logger.debug(f'Error extracting case assignment: {e}')
+        logger.debug('Error extracting case assignment: %s', e)
 
     # Extract Underlying reference
     try:
@@ -1130,10 +1901,9 @@ def process_camt056(content, swift_input_id=None, cursor=None):
                 uetr_text = _find_child_text_local(tx_inf, 'OrgnlUETR')
                 if uetr_text:
                     try:
-                        import uuid
                         uuid.UUID(uetr_text)
                         result['orgnl_uetr'] = uetr_text
-                    except:
+                    except ValueError:
                         result['orgnl_uetr'] = None
 
                 # Cancellation Reason
@@ -1145,423 +1915,1258 @@ def process_camt056(content, swift_input_id=None, cursor=None):
                     result['cxl_rsn_addtl_inf'] = _find_child_text_local(cxl_rsn_inf, 'AddtlInf')
 
     except Exception as e:
-        logger.error(f'Error extracting underlying reference: {e}')
+        logger.error('Error extracting underlying reference: %s', e)
         result['error'] = (result['error'] or '') + f' | underlying error: {e}'
 
     return result
 
-def create_test_file():
-    """Create test files in the folder_in directory or in memory"""
-    global FOLDER_IN, WORK_FROM_MEMORY, MEMORY_FILES
-    
-    if WORK_FROM_MEMORY:
-        logger.debug('create_test_file: Working from MEMORY mode')
-        # Clear memory storage
-        MEMORY_FILES.clear()
-        logger.debug('Memory storage cleared')
-    else:
-        logger.debug(f'create_test_file: Starting with path {FOLDER_IN}')
+def process_pacs002(content, swift_input_id=None, cursor=None, root=None):
+    """Process pacs.002 (FI to FI Payment Status Report) - extract statuses of original payments.
 
-        # Check if directory exists
-        try:
-            if not os.path.exists(FOLDER_IN):
-                logger.debug(f'Directory {FOLDER_IN} does not exist, creating it...')
-                os.makedirs(FOLDER_IN, exist_ok=True)
-                logger.debug(f'Directory created: {FOLDER_IN}')
-            else:
-                logger.debug(f'Directory exists: {FOLDER_IN}')
-
-            # CLEAN DIRECTORY
-            try:
-                contents_before = os.listdir(FOLDER_IN)
-                if contents_before:
-                    logger.debug(f'Cleaning directory: found {len(contents_before)} files to remove')
-                    for filename in contents_before:
-                        file_path = os.path.join(FOLDER_IN, filename)
-                        if os.path.isfile(file_path):
-                            try:
-                                os.remove(file_path)
-                                logger.debug(f'  Removed: {filename}')
-                            except Exception as e:
-                                logger.error(f'  Error removing {filename}: {e}')
-                    logger.debug('Directory cleaned successfully')
-                else:
-                    logger.debug('Directory is already empty')
-            except Exception as e:
-                logger.error(f'Cannot clean directory: {e}')
+    Args:
+        content: XML content as string
+        swift_input_id: UUID of swift_input record (not used for pacs.002)
+        cursor: Database cursor (not used for pacs.002)
+        root: already parsed element to extract from instead of content
 
-            # Check if directory is writable
-            if not os.access(FOLDER_IN, os.W_OK):
-                logger.error(f'Input directory is not writable: {FOLDER_IN}')
-                raise UserException({
-                    'message': 'Input directory is not writable',
-                    'description': f'Path: {FOLDER_IN}'
-                })
-            else:
-                logger.debug(f'Directory is writable')
-        except Exception as e:
-            logger.error(f'Error checking/creating input directory: {e}')
-            raise UserException({
-                'message': 'Error checking/creating input directory',
-                'description': f'Path: {FOLDER_IN}'
-            }).withError(e)
+    Returns dict with keys: msg_id, orgnl_msg_id, grp_sts, error and statuses -
+    list of dicts (orgnl_msg_id, orgnl_instr_id, orgnl_end_to_end_id, orgnl_uetr,
+    tx_sts, sts_rsn_cd, sts_rsn_addtl_inf), one per TxInfAndSts.
+    """
+    result = {
+        'msg_id': None,
+        'orgnl_msg_id': None,
+        'grp_sts': None,
+        'statuses': [],
+        'error': None,
+    }
 
-    # Create pacs.008 XML example file
-    logger.debug('Creating pacs.008 XML test file...')
-    filename = 'pacs008_example.xml'
     try:
-        xml_content = '''<?xml version="1.0" encoding="UTF-8"?>
-<Envelope xmlns="urn:swift:xsd:envelope">
-	<head:AppHdr xmlns:head="urn:iso:std:iso:20022:tech:xsd:head.001.001.02">
-		<head:Fr><head:FIId><head:FinInstnId><head:BICFI>DSBAHKHH</head:BICFI></head:FinInstnId></head:FIId></head:Fr>
-		<head:To><head:FIId><head:FinInstnId><head:BICFI>ID521122</head:BICFI></head:FinInstnId></head:FIId></head:To>
-		<head:BizMsgIdr>pacs8bizmsgidr02</head:BizMsgIdr>
-		<head:MsgDefIdr>pacs.008.001.08</head:MsgDefIdr>
-		<head:BizSvc>swift.cbprplus.02</head:BizSvc>
-		<head:CreDt>2022-10-20T10:25:00+01:00</head:CreDt>
-	</head:AppHdr>
-	<pacs:Document xmlns:pacs="urn:iso:std:iso:20022:tech:xsd:pacs.008.001.08">
-		<pacs:FIToFICstmrCdtTrf>
-			<pacs:GrpHdr><pacs:MsgId>pacs8bizmsgidr02</pacs:MsgId><pacs:CreDtTm>2022-10-20T10:25:00+01:00</pacs:CreDtTm><pacs:NbOfTxs>1</pacs:NbOfTxs><pacs:SttlmInf><pacs:SttlmMtd>INDA</pacs:SttlmMtd></pacs:SttlmInf></pacs:GrpHdr>
-			<pacs:CdtTrfTxInf>
-				<pacs:PmtId><pacs:InstrId>pacs8bizmsgidr02</pacs:InstrId><pacs:EndToEndId>pacs008EndToEndId-001</pacs:EndToEndId><pacs:UETR>7a562c67-ca16-48ba-b074-65581be6f001</pacs:UETR></pacs:PmtId>
-				<pacs:IntrBkSttlmAmt Ccy="USD">98725497</pacs:IntrBkSttlmAmt>
-				<pacs:IntrBkSttlmDt>2022-10-20</pacs:IntrBkSttlmDt>
-				<pacs:InstgAgt><pacs:FinInstnId><pacs:BICFI>MIDBANK01</pacs:BICFI><pacs:Nm>Intermediary Bank Name</pacs:Nm><pacs:ClrSysMmbId><pacs:MmbId>MIDACC123</pacs:MmbId></pacs:ClrSysMmbId></pacs:FinInstnId></pacs:InstgAgt>
-				<pacs:Dbtr><pacs:Nm>A Capone</pacs:Nm></pacs:Dbtr>
-				<pacs:DbtrAcct><pacs:Id><pacs:Othr><pacs:Id>ACPN-2569874</pacs:Id></pacs:Othr></pacs:Id></pacs:DbtrAcct>
-				<pacs:DbtrAgt><pacs:FinInstnId><pacs:BICFI>DSBAHKHH</pacs:BICFI><pacs:Nm>Debtor Bank Name</pacs:Nm></pacs:FinInstnId></pacs:DbtrAgt>
-				<pacs:CdtrAgt><pacs:FinInstnId><pacs:BICFI>ID521122</pacs:BICFI><pacs:Nm>Creditor Bank Name</pacs:Nm></pacs:FinInstnId></pacs:CdtrAgt>
-				<pacs:Cdtr><pacs:Nm>J Smith</pacs:Nm></pacs:Cdtr>
-				<pacs:CdtrAcct><pacs:Id><pacs:Othr><pacs:Id>65479512</pacs:Id></pacs:Othr></pacs:Id></pacs:CdtrAcct>
-				<pacs:RmtInf><pacs:Ustrd>Payment for invoice #12345</pacs:Ustrd></pacs:RmtInf>
-			</pacs:CdtTrfTxInf>
-		</pacs:FIToFICstmrCdtTrf>
-	</pacs:Document>
-</Envelope>'''
-        
-        if WORK_FROM_MEMORY:
-            MEMORY_FILES[filename] = xml_content
-            logger.debug(f'Successfully stored pacs.008 XML in memory: {filename}')
-        else:
-            pacs008_file_path = os.path.join(FOLDER_IN, filename)
-            with open(pacs008_file_path, 'w', encoding='utf-8') as f:
-                f.write(xml_content)
-            logger.debug(f'Successfully created pacs.008 XML file: {pacs008_file_path}')
+        if root is None:
+            root = ET.fromstring(content)
     except Exception as e:
-        logger.error(f'Error creating pacs.008 XML: {e}')
+        tb = traceback.format_exc()
+        result['error'] = f'XML parse error: {e}\\n\\nTraceback:\\n{tb}'
+        return result
 
-    # Create camt.053 XML example file
-    logger.debug('Creating camt.053 XML test file...')
-    filename = 'camt053_example.xml'
     try:
-        xml_content = '''<?xml version="1.0" encoding="UTF-8"?>
-<Envelope xmlns="urn:swift:xsd:envelope">
-	<head:AppHdr xmlns:head="urn:iso:std:iso:20022:tech:xsd:head.001.001.02">
-		<head:Fr><head:FIId><head:FinInstnId><head:BICFI>DNBANOKK</head:BICFI></head:FinInstnId></head:FIId></head:Fr>
-		<head:To><head:FIId><head:FinInstnId><head:BICFI>GUCRNOK1</head:BICFI></head:FinInstnId></head:FIId></head:To>
-		<head:BizMsgIdr>cmt053bizmsgidr-001</head:BizMsgIdr>
-		<head:MsgDefIdr>camt.053.001.08</head:MsgDefIdr>
-		<head:BizSvc>swift.cbprplus.02</head:BizSvc>
-		<head:CreDt>2021-06-03T18:00:00+02:00</head:CreDt>
-	</head:AppHdr>
-	<camt:Document xmlns:camt="urn:iso:std:iso:20022:tech:xsd:camt.053.001.08">
-		<camt:BkToCstmrStmt>
-			<camt:GrpHdr><camt:MsgId>cmt053bizmsgidr-001</camt:MsgId><camt:CreDtTm>2021-06-03T18:00:00+02:00</camt:CreDtTm></camt:GrpHdr>
-			<camt:Stmt>
-				<camt:Id>STMNTID</camt:Id>
-				<camt:StmtPgntn><camt:PgNb>1</camt:PgNb><camt:LastPgInd>true</camt:LastPgInd></camt:StmtPgntn>
-				<camt:ElctrncSeqNb>32145</camt:ElctrncSeqNb>
-				<camt:Acct><camt:Id><camt:Othr><camt:Id>123654786</camt:Id></camt:Othr></camt:Id><camt:Ccy>NOK</camt:Ccy></camt:Acct>
-				<camt:Bal>
-					<camt:Tp><camt:CdOrPrtry><camt:Cd>OPBD</camt:Cd></camt:CdOrPrtry></camt:Tp>
-					<camt:Amt Ccy="NOK">4645498.54</camt:Amt>
-					<camt:CdtDbtInd>CRDT</camt:CdtDbtInd>
-					<camt:Dt><camt:Dt>2021-06-03</camt:Dt></camt:Dt>
-				</camt:Bal>
-				<camt:Bal>
-					<camt:Tp><camt:CdOrPrtry><camt:Cd>CLBD</camt:Cd></camt:CdOrPrtry></camt:Tp>
-					<camt:Amt Ccy="NOK">7010498.54</camt:Amt>
-					<camt:CdtDbtInd>CRDT</camt:CdtDbtInd>
-					<camt:Dt><camt:Dt>2021-06-03</camt:Dt></camt:Dt>
-				</camt:Bal>
-				<camt:Ntry>
-					<camt:Amt Ccy="NOK">2365000</camt:Amt>
-					<camt:CdtDbtInd>CRDT</camt:CdtDbtInd>
-					<camt:Sts><camt:Cd>BOOK</camt:Cd></camt:Sts>
-					<camt:BookgDt><camt:Dt>2021-06-03</camt:Dt></camt:BookgDt>
-					<camt:ValDt><camt:Dt>2021-06-03</camt:Dt></camt:ValDt>
-					<camt:BkTxCd><camt:Domn><camt:Cd>PMNT</camt:Cd><camt:Fmly><camt:Cd>RCDT</camt:Cd><camt:SubFmlyCd>XBCT</camt:SubFmlyCd></camt:Fmly></camt:Domn></camt:BkTxCd>
-					<camt:NtryDtls>
-						<camt:TxDtls>
-							<camt:Refs><camt:InstrId>pacs8bizmsgidr01</camt:InstrId><camt:EndToEndId>E2E04044506271305</camt:EndToEndId><camt:UETR>174c245f-2682-4291-ad67-2a41e530cd27</camt:UETR></camt:Refs>
-							<camt:Amt Ccy="NOK">2365000</camt:Amt>
-							<camt:CdtDbtInd>CRDT</camt:CdtDbtInd>
-						</camt:TxDtls>
-					</camt:NtryDtls>
-				</camt:Ntry>
-			</camt:Stmt>
-		</camt:BkToCstmrStmt>
-	</camt:Document>
-</Envelope>'''
-        if WORK_FROM_MEMORY:
-            MEMORY_FILES[filename] = xml_content
-            logger.debug(f'Successfully stored camt.053 XML in memory: {filename}')
-        else:
-            camt053_file_path = os.path.join(FOLDER_IN, filename)
-            with open(camt053_file_path, 'w', encoding='utf-8') as f:
-                f.write(xml_content)
-            logger.debug(f'Successfully created camt.053 XML file: {camt053_file_path}')
+        grp_hdr = _find_first_by_localname(root, 'GrpHdr')
+        if grp_hdr is not None:
+            result['msg_id'] = _find_child_text_local(grp_hdr, 'MsgId')
+
+        # Group status applies to transactions that carry no TxSts of their own
+        orgnl_grp_inf = _find_first_by_localname(root, 'OrgnlGrpInfAndSts')
+        if orgnl_grp_inf is not None:
+            result['orgnl_msg_id'] = _find_child_text_local(orgnl_grp_inf, 'OrgnlMsgId')
+            result['grp_sts'] = _find_child_text_local(orgnl_grp_inf, 'GrpSts')
+
+        for tx_el in _find_all_by_localname(root, 'TxInfAndSts'):
+            orgnl_msg_id = None
+            tx_grp_inf = _find_first_by_localname(tx_el, 'OrgnlGrpInf')
+            if tx_grp_inf is not None:
+                orgnl_msg_id = _find_child_text_local(tx_grp_inf, 'OrgnlMsgId')
+
+            uetr = _find_child_text_local(tx_el, 'OrgnlUETR')
+            status = {
+                'orgnl_msg_id': orgnl_msg_id or result['orgnl_msg_id'],
+                'orgnl_instr_id': _find_child_text_local(tx_el, 'OrgnlInstrId'),
+                'orgnl_end_to_end_id': _find_child_text_local(tx_el, 'OrgnlEndToEndId'),
+                'orgnl_uetr': uetr.lower() if uetr else None,
+                'tx_sts': _find_child_text_local(tx_el, 'TxSts') or result['grp_sts'],
+                'sts_rsn_cd': None,
+                'sts_rsn_addtl_inf': None,
+            }
+
+            sts_rsn_inf = _find_first_by_localname(tx_el, 'StsRsnInf')
+            if sts_rsn_inf is not None:
+                rsn = _find_first_by_localname(sts_rsn_inf, 'Rsn')
+                if rsn is not None:
+                    status['sts_rsn_cd'] = _find_child_text_local(rsn, 'Cd') or _find_child_text_local(rsn, 'Prtry')
+                status['sts_rsn_addtl_inf'] = _find_child_text_local(sts_rsn_inf, 'AddtlInf')
+
+            if result['orgnl_msg_id'] is None:
+                result['orgnl_msg_id'] = status['orgnl_msg_id']
+            result['statuses'].append(status)
+
     except Exception as e:
-        logger.error(f'Error creating camt.053 XML: {e}')
+        logger.error('Error extracting payment statuses: %s', e)
+        result['error'] = (result['error'] or '') + f' | status error: {e}'
 
-    # Create pacs.009 XML example file
-    logger.debug('Creating pacs.009 XML test file...')
-    filename = 'pacs009_example.xml'
-    try:
-        xml_content = '''<?xml version="1.0" encoding="UTF-8"?>
-<Envelope xmlns="urn:swift:xsd:envelope">
-	<head:AppHdr xmlns:head="urn:iso:std:iso:20022:tech:xsd:head.001.001.02">
-		<head:Fr><head:FIId><head:FinInstnId><head:BICFI>MYMBGB2LXXX</head:BICFI></head:FinInstnId></head:FIId></head:Fr>
-		<head:To><head:FIId><head:FinInstnId><head:BICFI>INGBROBUXXX</head:BICFI></head:FinInstnId></head:FIId></head:To>
-		<head:BizMsgIdr>pacs9bizmsgidr01</head:BizMsgIdr>
-		<head:MsgDefIdr>pacs.009.001.08</head:MsgDefIdr>
-		<head:BizSvc>swift.cbprplus.cov.02</head:BizSvc>
-		<head:CreDt>2022-10-20T09:15:00+00:00</head:CreDt>
-	</head:AppHdr>
-	<pacs:Document xmlns:pacs="urn:iso:std:iso:20022:tech:xsd:pacs.009.001.08">
-		<pacs:FICdtTrf>
-			<pacs:GrpHdr>
-				<pacs:MsgId>pacs9bizmsgidr01</pacs:MsgId>
-				<pacs:CreDtTm>2022-10-20T09:15:00+00:00</pacs:CreDtTm>
-				<pacs:NbOfTxs>1</pacs:NbOfTxs>
-				<pacs:SttlmInf><pacs:SttlmMtd>INDA</pacs:SttlmMtd></pacs:SttlmInf>
-			</pacs:GrpHdr>
-			<pacs:CdtTrfTxInf>
-				<pacs:PmtId>
-					<pacs:InstrId>pacs9bizmsgidr01</pacs:InstrId>
-					<pacs:EndToEndId>pcs008bzmsgidr-1</pacs:EndToEndId>
-					<pacs:UETR>7a562c67-ca16-48ba-b074-65581be6f001</pacs:UETR>
-				</pacs:PmtId>
-				<pacs:IntrBkSttlmAmt Ccy="RON">591636</pacs:IntrBkSttlmAmt>
-				<pacs:IntrBkSttlmDt>2022-10-20</pacs:IntrBkSttlmDt>
-				<pacs:InstgAgt><pacs:FinInstnId><pacs:BICFI>MYMBGB2LXXX</pacs:BICFI></pacs:FinInstnId></pacs:InstgAgt>
-				<pacs:InstdAgt><pacs:FinInstnId><pacs:BICFI>INGBROBUXXX</pacs:BICFI></pacs:FinInstnId></pacs:InstdAgt>
-				<pacs:Dbtr><pacs:FinInstnId><pacs:BICFI>MYMBGB2LXXX</pacs:BICFI></pacs:FinInstnId></pacs:Dbtr>
-				<pacs:DbtrAgt><pacs:FinInstnId><pacs:BICFI>INGBROBUXXX</pacs:BICFI></pacs:FinInstnId></pacs:DbtrAgt>
-				<pacs:CdtrAgt><pacs:FinInstnId><pacs:BICFI>RZBRROBUXXX</pacs:BICFI></pacs:FinInstnId></pacs:CdtrAgt>
-				<pacs:Cdtr><pacs:FinInstnId><pacs:BICFI>GEBABEBBXXX</pacs:BICFI></pacs:FinInstnId></pacs:Cdtr>
-				<pacs:UndrlygCstmrCdtTrf>
-					<pacs:Dbtr><pacs:Nm>Debtor Co</pacs:Nm></pacs:Dbtr>
-					<pacs:DbtrAcct><pacs:Id><pacs:Othr><pacs:Id>25698745</pacs:Id></pacs:Othr></pacs:Id></pacs:DbtrAcct>
-					<pacs:DbtrAgt><pacs:FinInstnId><pacs:BICFI>MYMBGB2LXXX</pacs:BICFI></pacs:FinInstnId></pacs:DbtrAgt>
-					<pacs:CdtrAgt><pacs:FinInstnId><pacs:BICFI>GEBABEBBXXX</pacs:BICFI></pacs:FinInstnId></pacs:CdtrAgt>
-					<pacs:Cdtr><pacs:Nm>Ardent Finance</pacs:Nm></pacs:Cdtr>
-					<pacs:CdtrAcct><pacs:Id><pacs:Othr><pacs:Id>65479512</pacs:Id></pacs:Othr></pacs:Id></pacs:CdtrAcct>
-				</pacs:UndrlygCstmrCdtTrf>
-			</pacs:CdtTrfTxInf>
-		</pacs:FICdtTrf>
-	</pacs:Document>
-</Envelope>'''
-        if WORK_FROM_MEMORY:
-            MEMORY_FILES[filename] = xml_content
-            logger.debug(f'Successfully stored pacs.009 XML in memory: {filename}')
+    return result
+
+# Statement/notification tx details reconciled against incoming pacs.008:
+# (item_type, tx details table, entry table)
+RECON_SOURCES = (
+    ('camt.053', 'swift_entry_tx_dtls', 'swift_stmt_ntry'),
+    ('camt.054', 'swift_ntfctn_tx_dtls', 'swift_ntfctn_ntry'),
+)
+
+# Match keys in priority order: (match_key, tx details / queue column, swift_input column, type).
+# swift_input.uetr and the queue are uuid; the tx details UETR is cast (it comes from text columns)
+RECON_KEYS = (
+    ('UETR', 'uetr', 'uetr', 'uuid'),
+    ('END_TO_END_ID', 'end_to_end_id', 'code', 'text'),
+)
+
+# Reference values that identify nothing (EndToEndId is mandatory, senders fill in NOTPROVIDED)
+NO_REFERENCE = ('', 'NOTPROVIDED')
+RECON_NO_REF = '(' + ', '.join(f"'{value}'" for value in NO_REFERENCE) + ')'
+
+def _fetch_links(cursor):
+    return [(r.get('payment_id'), r.get('tx_source'), r.get('tx_dtls_id')) for r in fetchall(cursor)]
+
+def reconcile_imported(cursor, swift_input_ids):
+    """Link tx details and pacs.008 payments imported in this run.
+
+    Only the new rows probe the indexes: new tx details look up payments in
+    swift_input by UETR/EndToEndId, new payments look up the unmatched queue.
+    A link is made only when exactly one pacs.008 carries the reference;
+    ambiguous items and NOTPROVIDED references stay unmatched. Whatever stays
+    unmatched is queued in swift_recon_unmatched, so the counterpart finds it
+    when it arrives in a later run.
+
+    Returns:
+        dict with counts: {'links': N, 'queued': N}
+    """
+    logger.debug('=== Starting reconcile_imported for %s document(s) ===', len(swift_input_ids))
+    ids = [str(i) for i in swift_input_ids]
+    links = []
+    queued = 0
+
+    # New tx details -> payments
+    for source, dtls_table, ntry_table in RECON_SOURCES:
+        for match_key, dtls_col, input_col, key_type in RECON_KEYS:
+            cursor.execute(f"""
+                INSERT INTO swift_recon_link (payment_id, tx_source, tx_dtls_id, match_key, amount_match)
+                SELECT p.id, %(source)s, d.id, %(match_key)s,
+                       (p.amount = d.amt AND p.currency_code = d.amt_ccy)
+                FROM {dtls_table} d
+                JOIN {ntry_table} n ON n.id = d.ntry_id
+                JOIN swift_input p ON p.{input_col} = d.{dtls_col}::{key_type} AND p.msg_type = 'pacs.008'
+                WHERE n.swift_input_id = ANY(%(ids)s::uuid[])
+                  AND d.{dtls_col}::text NOT IN {RECON_NO_REF}
+                  AND (
+                      SELECT count(*) FROM swift_input p2
+                      WHERE p2.{input_col} = d.{dtls_col}::{key_type} AND p2.msg_type = 'pacs.008'
+                  ) = 1
+                ON CONFLICT (tx_source, tx_dtls_id) DO NOTHING
+                RETURNING payment_id, tx_source, tx_dtls_id
+            """, {'source': source, 'match_key': match_key, 'ids': ids})
+            links.extend(_fetch_links(cursor))
+
+        cursor.execute(f"""
+            INSERT INTO swift_recon_unmatched
+                (item_type, item_id, swift_input_id, uetr, end_to_end_id, amt, amt_ccy)
+            SELECT %(source)s, d.id, n.swift_input_id, d.uetr::uuid, d.end_to_end_id, d.amt, d.amt_ccy
+            FROM {dtls_table} d
+            JOIN {ntry_table} n ON n.id = d.ntry_id
+            WHERE n.swift_input_id = ANY(%(ids)s::uuid[])
+              AND NOT EXISTS (
+                  SELECT 1 FROM swift_recon_link l
+                  WHERE l.tx_source = %(source)s AND l.tx_dtls_id = d.id
+              )
+            ON CONFLICT (item_type, item_id) DO NOTHING
+        """, {'source': source, 'ids': ids})
+        queued += cursor.rowcount
+
+    # New payments -> tx details still waiting in the queue
+    for match_key, queue_col, input_col, _ in RECON_KEYS:
+        cursor.execute(f"""
+            INSERT INTO swift_recon_link (payment_id, tx_source, tx_dtls_id, match_key, amount_match)
+            SELECT p.id, u.item_type, u.item_id, %(match_key)s,
+                   (p.amount = u.amt AND p.currency_code = u.amt_ccy)
+            FROM swift_input p
+            JOIN swift_recon_unmatched u ON u.{queue_col} = p.{input_col} AND u.item_type <> 'pacs.008'
+            WHERE p.id = ANY(%(ids)s::uuid[]) AND p.msg_type = 'pacs.008'
+              AND p.{input_col}::text NOT IN {RECON_NO_REF}
+              AND (
+                  SELECT count(*) FROM swift_input p2
+                  WHERE p2.{input_col} = p.{input_col} AND p2.msg_type = 'pacs.008'
+              ) = 1
+            ON CONFLICT (tx_source, tx_dtls_id) DO NOTHING
+            RETURNING payment_id, tx_source, tx_dtls_id
+        """, {'match_key': match_key, 'ids': ids})
+        links.extend(_fetch_links(cursor))
+
+    cursor.execute("""
+        INSERT INTO swift_recon_unmatched
+            (item_type, item_id, swift_input_id, uetr, end_to_end_id, amt, amt_ccy)
+        SELECT 'pacs.008', p.id, p.id, p.uetr, p.code, p.amount, p.currency_code
+        FROM swift_input p
+        WHERE p.id = ANY(%(ids)s::uuid[]) AND p.msg_type = 'pacs.008'
+          AND NOT EXISTS (SELECT 1 FROM swift_recon_link l WHERE l.payment_id = p.id)
+        ON CONFLICT (item_type, item_id) DO NOTHING
+    """, {'ids': ids})
+    queued += cursor.rowcount
+
+    # Drop both sides of the new links from the queue (payments from earlier runs too)
+    if links:
+        cursor.execute("""
+            DELETE FROM swift_recon_unmatched u
+            USING unnest(%(types)s::text[], %(item_ids)s::uuid[]) AS k(item_type, item_id)
+            WHERE u.item_type = k.item_type AND u.item_id = k.item_id
+        """, {
+            'types': ['pacs.008'] * len(links) + [source for _, source, _ in links],
+            'item_ids': [str(p) for p, _, _ in links] + [str(t) for _, _, t in links],
+        })
+
+    logger.info('  Reconciliation: %s link(s) created, %s item(s) queued as unmatched', len(links), queued)
+    return {'links': len(links), 'queued': queued}
+
+# camt.056 -> original payment lookups in priority order: (match_key, SQL condition, fields)
+CANCEL_MATCH_KEYS = (
+    ('UETR', 'uetr = %s', ('orgnl_uetr',)),
+    ('END_TO_END_ID', 'code = %s', ('orgnl_end_to_end_id',)),
+    ('MSG_ID_INSTR_ID', 'msg_id = %s AND instr_id = %s', ('orgnl_msg_id', 'orgnl_instr_id')),
+)
+
+def match_cancellation(cursor, swift_input_id, fields):
+    """Resolve a camt.056 to its original pacs.008/pacs.009 and record the link.
+
+    Each key is a single index probe on swift_input. A key is used only when
+    it matches exactly one payment; NOTPROVIDED/empty references are skipped.
+    When CANCEL_STATE_CODE is configured, the original's process is moved to
+    that state in the same transaction as the import.
+
+    Returns:
+        dict {'id', 'msg_type', 'match_key'} of the original, or None
+    """
+    original = None
+    for match_key, condition, field_names in CANCEL_MATCH_KEYS:
+        values = tuple((fields.get(name) or '').strip() for name in field_names)
+        if any(value.upper() in NO_REFERENCE for value in values):
+            continue
+        cursor.execute(f"""
+            SELECT id, msg_type
+            FROM swift_input
+            WHERE {condition} AND msg_type IN ('pacs.008', 'pacs.009')
+            LIMIT 2
+        """, values)
+        rows = fetchall(cursor)
+        if len(rows) == 1:
+            original = {'id': rows[0].get('id'), 'msg_type': rows[0].get('msg_type'), 'match_key': match_key}
+            break
+        if rows:
+            logger.warning('  camt.056 %s matches several payments, not used', match_key)
+
+    if original is None:
+        # Matched again when a payment with its references is imported (rematch_cancellations)
+        logger.warning('  ✗ Original payment for camt.056 not found')
+        return None
+
+    cursor.execute("""
+        UPDATE swift_input_camt056
+        SET orgnl_swift_input_id = %s, orgnl_match_key = %s
+        WHERE id = %s
+    """, (original['id'], original['match_key'], swift_input_id))
+    logger.info('  ✓ camt.056 linked to %s id=%s by %s', original['msg_type'], original['id'], original['match_key'])
+
+    if CANCEL_STATE_CODE:
+        cursor.execute("""
+            UPDATE process p
+            SET state_id = ps.id
+            FROM process_state ps
+            WHERE p.doc_id = %s
+              AND ps.type_code = %s
+              AND ps.code = %s
+              AND p.state_id <> ps.id
+        """, (original['id'], original['msg_type'], CANCEL_STATE_CODE))
+        if cursor.rowcount:
+            logger.info('  ✓ Original process moved to %s', CANCEL_STATE_CODE)
         else:
-            pacs009_file_path = os.path.join(FOLDER_IN, filename)
-            with open(pacs009_file_path, 'w', encoding='utf-8') as f:
-                f.write(xml_content)
-            logger.debug(f'Successfully created pacs.009 XML file: {pacs009_file_path}')
-    except Exception as e:
-        logger.error(f'Error creating pacs.009 XML: {e}')
+            logger.warning('  State %s not applied to %s process', CANCEL_STATE_CODE, original['msg_type'])
 
-    # Create camt.054 XML example file
-    logger.debug('Creating camt.054 XML test file...')
-    filename = 'camt054_example.xml'
+    return original
+
+def rematch_cancellations(cursor, swift_input_ids):
+    """Match camt.056 still without an original against payments imported in this run.
+
+    With the default priority classes a camt.056 is imported before the
+    pacs.008/pacs.009 of the same run, and an original can arrive runs after
+    its cancellation. The new payments probe the unmatched camt.056 by each
+    CANCEL_MATCH_KEYS reference (partial indexes on the unmatched rows), and
+    every candidate goes through match_cancellation again.
+
+    Returns:
+        number of camt.056 linked
+    """
+    ids = [str(i) for i in swift_input_ids]
+    cursor.execute("""
+        SELECT a.id, a.orgnl_uetr, a.orgnl_end_to_end_id, a.orgnl_instr_id, si.orgnl_msg_id
+        FROM swift_input_camt056 a
+        JOIN swift_input si ON si.id = a.id
+        WHERE a.orgnl_swift_input_id IS NULL
+          AND a.id IN (
+              SELECT c.id FROM swift_input p
+              JOIN swift_input_camt056 c ON lower(c.orgnl_uetr) = p.uetr::text AND c.orgnl_swift_input_id IS NULL
+              WHERE p.id = ANY(%(ids)s::uuid[]) AND p.msg_type IN ('pacs.008', 'pacs.009')
+              UNION
+              SELECT c.id FROM swift_input p
+              JOIN swift_input_camt056 c ON c.orgnl_end_to_end_id = p.code AND c.orgnl_swift_input_id IS NULL
+              WHERE p.id = ANY(%(ids)s::uuid[]) AND p.msg_type IN ('pacs.008', 'pacs.009')
+              UNION
+              SELECT c.id FROM swift_input p
+              JOIN swift_input_camt056 c ON c.orgnl_instr_id = p.instr_id AND c.orgnl_swift_input_id IS NULL
+              WHERE p.id = ANY(%(ids)s::uuid[]) AND p.msg_type IN ('pacs.008', 'pacs.009')
+          )
+    """, {'ids': ids})
+    linked = 0
+    for row in fetchall(cursor):
+        if match_cancellation(cursor, row.get('id'), row):
+            linked += 1
+    if linked:
+        logger.info('  Cancellations: %s camt.056 linked to payments imported in this run', linked)
+    return linked
+
+# pacs.002 statuses that are never overwritten by a non-final one arriving later
+FINAL_TX_STATUSES = ('ACSC', 'ACCC', 'RJCT', 'CANC')
+
+def tx_status_rank(tx_sts):
+    """1 for a final pacs.002 status, 0 for an interim one (ACSP, PDNG, ...)."""
+    return 1 if tx_sts in FINAL_TX_STATUSES else 0
+
+def store_payment_statuses(cursor, swift_input_id, statuses):
+    """Insert all TxInfAndSts of one pacs.002 into swift_pmt_sts with one statement."""
+    if not statuses:
+        return 0
+    cursor.execute("""
+        INSERT INTO swift_pmt_sts (
+            swift_input_id, orgnl_msg_id, orgnl_instr_id, orgnl_end_to_end_id,
+            orgnl_uetr, tx_sts, sts_rsn_cd, sts_rsn_addtl_inf
+        )
+        SELECT %s, s.*
+        FROM unnest(%s::text[], %s::text[], %s::text[], %s::text[], %s::text[], %s::text[], %s::text[])
+            AS s(orgnl_msg_id, orgnl_instr_id, orgnl_end_to_end_id, orgnl_uetr, tx_sts, sts_rsn_cd, sts_rsn_addtl_inf)
+    """, (
+        swift_input_id,
+        [s['orgnl_msg_id'] for s in statuses],
+        [s['orgnl_instr_id'] for s in statuses],
+        [s['orgnl_end_to_end_id'] for s in statuses],
+        [s['orgnl_uetr'] for s in statuses],
+        [s['tx_sts'] for s in statuses],
+        [s['sts_rsn_cd'] for s in statuses],
+        [s['sts_rsn_addtl_inf'] for s in statuses],
+    ))
+    return len(statuses)
+
+def apply_payment_statuses(cursor, pending):
+    """Apply pacs.002 statuses of this run to outgoing payments in swift_out_fields.
+
+    Statuses are collapsed to one per payment, then applied with one
+    UPDATE ... FROM unnest by UETR and one by EndToEndId for the rest, both on
+    indexed columns. A final status (FINAL_TX_STATUSES) is never replaced by a
+    non-final one: not while collapsing, whatever the arrival order, and not in
+    the UPDATE, so a later run cannot downgrade it either.
+
+    Args:
+        pending: list of (swift_input_id, status dict) in arrival order
+
+    Returns:
+        dict with counts: {'statuses': N, 'updated': N, 'unmatched': N}
+    """
+    # Latest status per original transaction, files are imported in order;
+    # an interim status (ACSP, PDNG, ...) arriving after a final one is dropped
+    latest = {}
+    for swift_input_id, status in pending:
+        if not status.get('tx_sts'):
+            continue
+        key = status['orgnl_uetr'] or ('E2E', status['orgnl_end_to_end_id'])
+        if key == ('E2E', None):
+            continue
+        current = latest.get(key)
+        if current and tx_status_rank(current[1]['tx_sts']) > tx_status_rank(status['tx_sts']):
+            continue
+        latest[key] = (swift_input_id, status)
+
+    counts = {'statuses': len(latest), 'updated': 0, 'unmatched': 0}
+    if not latest:
+        return counts
+
+    def _params(items):
+        return {
+            'uetrs': [s['orgnl_uetr'] for _, s in items],
+            'e2e_ids': [s['orgnl_end_to_end_id'] for _, s in items],
+            'stss': [s['tx_sts'] for _, s in items],
+            'rsns': [s['sts_rsn_cd'] for _, s in items],
+            'input_ids': [str(i) for i, _ in items],
+            'final': list(FINAL_TX_STATUSES),
+        }
+
+    update_sql = """
+        UPDATE swift_out_fields o
+        SET tx_sts = s.tx_sts,
+            tx_sts_rsn = s.sts_rsn,
+            sts_swift_input_id = s.swift_input_id::uuid,
+            sts_updated = now()
+        FROM unnest(%(uetrs)s::text[], %(e2e_ids)s::text[], %(stss)s::text[], %(rsns)s::text[], %(input_ids)s::text[])
+            AS s(uetr, end_to_end_id, tx_sts, sts_rsn, swift_input_id)
+        WHERE {match}
+          AND NOT (coalesce(o.tx_sts, '') = ANY(%(final)s) AND s.tx_sts <> ALL(%(final)s))
+        RETURNING s.uetr, s.end_to_end_id
+    """
+
+    with_uetr = [item for item in latest.values() if item[1]['orgnl_uetr']]
+    matched = set()
+    if with_uetr:
+        cursor.execute(update_sql.format(match='o.uetr = s.uetr'), _params(with_uetr))
+        matched.update(r.get('uetr') for r in fetchall(cursor))
+
+    # EndToEndId is not unique: only used when one side has no UETR
+    rest = [item for item in latest.values()
+            if item[1]['orgnl_uetr'] not in matched and item[1]['orgnl_end_to_end_id']]
+    matched_e2e = set()
+    if rest:
+        cursor.execute(
+            update_sql.format(match='o.end_to_end_id = s.end_to_end_id AND (s.uetr IS NULL OR o.uetr IS NULL)'),
+            _params(rest)
+        )
+        matched_e2e.update((r.get('uetr'), r.get('end_to_end_id')) for r in fetchall(cursor))
+
+    counts['updated'] = len(matched) + len(matched_e2e)
+    counts['unmatched'] = counts['statuses'] - counts['updated']
+    return counts
+
+# Type-specific attributes: msg_type -> (table, columns). The table is
+# process_type.attributes_table of the type; swift_input keeps the columns
+# lists, matching and every form share (amount, references, errors, ...)
+ATTRIBUTE_TABLES = {
+    'pacs.008': ('swift_input_pacs008', (
+        'snd_name', 'rcv_name', 'message', 'snd_acc', 'rcv_acc',
+        'snd_bank', 'snd_bank_name', 'rcv_bank', 'rcv_bank_name',
+    )),
+    'pacs.009': ('swift_input_pacs009', (
+        'snd_name', 'rcv_name', 'message', 'snd_bank', 'rcv_bank',
+        'instd_agt', 'instd_agt_name',
+        'underlying_dbtr_name', 'underlying_dbtr_acc', 'underlying_dbtr_agt',
+        'underlying_cdtr_name', 'underlying_cdtr_acc', 'underlying_cdtr_agt',
+    )),
+    'camt.053': ('swift_input_camt053', ('stmt_id', 'elctrnc_seq_nb', 'acct_id', 'acct_ccy')),
+    'camt.054': ('swift_input_camt054', ('ntfctn_id', 'acct_id', 'acct_ccy')),
+    'camt.056': ('swift_input_camt056', (
+        'case_id', 'case_assgnr', 'orgnl_msg_nm_id',
+        'orgnl_instr_id', 'orgnl_end_to_end_id', 'orgnl_tx_id', 'orgnl_uetr',
+        'cxl_rsn_cd', 'cxl_rsn_addtl_inf',
+    )),
+}
+
+def insert_attributes(cursor, msg_type, rows):
+    """Insert type-specific attributes for many documents with one statement.
+
+    Args:
+        rows: list of (swift_input_id, fields dict)
+    """
+    if msg_type not in ATTRIBUTE_TABLES or not rows:
+        return 0
+    table, columns = ATTRIBUTE_TABLES[msg_type]
+    row_sql = '(' + ', '.join(['%s'] * (len(columns) + 1)) + ')'
+    params = []
+    for swift_input_id, fields in rows:
+        params.append(swift_input_id)
+        params.extend(fields.get(col) for col in columns)
+    cursor.execute(f"""
+        INSERT INTO {table} (id, {', '.join(columns)})
+        VALUES {', '.join([row_sql] * len(rows))}
+    """, params)
+    return len(rows)
+
+# Batch pacs.008/pacs.009: rows are written in chunks of this size
+BATCH_INSERT_SIZE = 500
+
+# swift_input columns filled from the extracted fields, per message type
+BATCH_FIELD_COLUMNS = {
+    'pacs.008': (
+        'amount', 'currency_code', 'dval', 'code', 'msg_id', 'instr_id', 'uetr',
+        'snd_mid_bank', 'snd_mid_bank_name', 'snd_mid_bank_acc', 'error',
+    ),
+    'pacs.009': (
+        'amount', 'currency_code', 'dval', 'code', 'msg_id', 'instr_id', 'uetr', 'error',
+    ),
+}
+
+# Message element under Document, used to keep batch projections on the file paths
+BATCH_MSG_ROOTS = {
+    'pacs.008': 'FIToFICstmrCdtTrf',
+    'pacs.009': 'FICdtTrf',
+}
+
+# Start state per process type, looked up once per run
+START_STATE_IDS = {}
+
+def get_start_state_id(cursor, type_code):
+    """Return process_state.id of the start state for a process type (cached)."""
+    if type_code not in START_STATE_IDS:
+        cursor.execute("""
+            SELECT ps.id
+            FROM process_state ps
+            JOIN process_type pt ON ps.type_id = pt.id
+            WHERE pt.code = %s AND ps.start = true
+            LIMIT 1
+        """, (type_code,))
+        rows = fetchall(cursor)
+        START_STATE_IDS[type_code] = rows[0].get('id') if rows else None
+    return START_STATE_IDS[type_code]
+
+def create_processes(cursor, doc_ids, type_code):
+    """Create start-state processes for many documents in one statement."""
+    state_id = get_start_state_id(cursor, type_code)
+    if not doc_ids or state_id is None:
+        return 0
+    cursor.execute("""
+        INSERT INTO process (doc_id, state_id)
+        SELECT d.id, %s FROM unnest(%s::uuid[]) AS d(id)
+    """, (state_id, [str(i) for i in doc_ids]))
+    return len(doc_ids)
+
+def create_entry_processes(cursor, swift_input_id):
+    """Create TRN processes for all entries of a camt.053 in one INSERT ... SELECT.
+
+    Entries that already have a process are skipped, so a re-run is harmless.
+
+    Returns:
+        number of processes created
+    """
+    state_id = get_start_state_id(cursor, 'TRN')
+    if state_id is None:
+        logger.warning('  No start state for TRN, entry processes not created')
+        return 0
+    cursor.execute("""
+        INSERT INTO process (doc_id, state_id)
+        SELECT n.id, %s
+        FROM swift_stmt_ntry n
+        WHERE n.swift_input_id = %s
+          AND NOT EXISTS (SELECT 1 FROM process p WHERE p.doc_id = n.id)
+    """, (state_id, swift_input_id))
+    return cursor.rowcount
+
+def _peek_group_header(source):
+    """Read GrpHdr (MsgId, NbOfTxs, CtrlSum) without parsing the transactions.
+
+    source is the XML text or a binary stream (open_input_file).
+    """
+    for _, el in ET.iterparse(io.StringIO(source) if isinstance(source, str) else source):
+        if isinstance(el.tag, str) and (el.tag.endswith('}GrpHdr') or el.tag == 'GrpHdr'):
+            nb_of_txs = _find_child_text_local(el, 'NbOfTxs')
+            return {
+                'msg_id': _find_child_text_local(el, 'MsgId'),
+                'nb_of_txs': int(nb_of_txs) if nb_of_txs and nb_of_txs.isdigit() else None,
+                'ctrl_sum': _find_child_text_local(el, 'CtrlSum'),
+            }
+    return None
+
+def _flush_batch_rows(cursor, msg_type, rows):
+    """Insert buffered transactions, their attributes and processes with one statement each.
+
+    Args:
+        rows: list of (swift_input row tuple starting with id, fields dict)
+    """
+    columns = ('id', 'file_name', 'state', 'content', 'imported', 'msg_type', 'batch_id', 'parsed') + BATCH_FIELD_COLUMNS[msg_type]
+    row_sql = '(' + ', '.join('%s::jsonb' if col == 'parsed' else '%s' for col in columns) + ')'
+    params = []
+    for row, _ in rows:
+        params.extend(row)
+    cursor.execute(f"""
+        INSERT INTO swift_input ({', '.join(columns)})
+        VALUES {', '.join([row_sql] * len(rows))}
+    """, params)
+    ids = [row[0] for row, _ in rows]
+    insert_attributes(cursor, msg_type, [(row[0], fields) for row, fields in rows])
+    create_processes(cursor, ids, msg_type)
+    return ids
+
+def import_payment_batch(cursor, filename, content, msg_type, current_date, header, validation_error=None, source=None):
+    """Import a multi-transaction pacs.008/pacs.009: one swift_input row and process per CdtTrfTxInf.
+
+    Transactions are streamed with iterparse from source (a binary stream of
+    the file, open_input_file; the content text when None) and cleared after
+    extraction, so the parse holds one transaction at a time. The text itself
+    is still held once: it is stored in swift_input_batch. Rows are written in
+    chunks of BATCH_INSERT_SIZE and NbOfTxs/CtrlSum are checked against
+    running totals. The stream is parsed to the end, so XML that is malformed
+    after the header raises ValueError; the caller rolls back the rows
+    already written.
+
+    Returns:
+        list of swift_input ids of the transactions
+    """
+    logger.debug('  Batch %s: NbOfTxs=%s, CtrlSum=%s', msg_type, header['nb_of_txs'], header['ctrl_sum'])
+    extract = process_pacs008 if msg_type == 'pacs.008' else process_pacs009
+    field_columns = BATCH_FIELD_COLUMNS[msg_type]
+
+    cursor.execute("""
+        INSERT INTO swift_input_batch (file_name, msg_type, msg_id, content, imported, nb_of_txs, ctrl_sum, validation_error)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+        RETURNING id
+    """, (filename, msg_type, header['msg_id'], content, current_date,
+          header['nb_of_txs'], header['ctrl_sum'], validation_error))
+    batch_id = fetchall(cursor)[0].get('id')
+
+    ids = []
+    rows = []
+    tx_count = 0
+    tx_errors = 0
+    tx_units = 0
+    grp_hdr = None
+    grp_hdr_projection = None
     try:
-        xml_content = '''<?xml version="1.0" encoding="UTF-8"?>
-<Envelope xmlns="urn:swift:xsd:envelope">
-	<head:AppHdr xmlns:head="urn:iso:std:iso:20022:tech:xsd:head.001.001.02">
-		<head:Fr><head:FIId><head:FinInstnId><head:BICFI>RZBRROBUXXX</head:BICFI></head:FinInstnId></head:FIId></head:Fr>
-		<head:To><head:FIId><head:FinInstnId><head:BICFI>GEBABEBBXXX</head:BICFI></head:FinInstnId></head:FIId></head:To>
-		<head:BizMsgIdr>cmt054bizmsgidr-002</head:BizMsgIdr>
-		<head:MsgDefIdr>camt.054.001.08</head:MsgDefIdr>
-		<head:BizSvc>swift.cbprplus.02</head:BizSvc>
-		<head:CreDt>2022-10-20T11:30:00+02:00</head:CreDt>
-	</head:AppHdr>
-	<camt:Document xmlns:camt="urn:iso:std:iso:20022:tech:xsd:camt.054.001.08">
-		<camt:BkToCstmrDbtCdtNtfctn>
-			<camt:GrpHdr>
-				<camt:MsgId>cmt054bizmsgidr-002</camt:MsgId>
-				<camt:CreDtTm>2022-10-20T11:30:00+02:00</camt:CreDtTm>
-			</camt:GrpHdr>
-			<camt:Ntfctn>
-				<camt:Id>cmt054NtfctnId-001</camt:Id>
-				<camt:Acct>
-					<camt:Id><camt:Othr><camt:Id>9875687</camt:Id></camt:Othr></camt:Id>
-					<camt:Ccy>RON</camt:Ccy>
-				</camt:Acct>
-				<camt:Ntry>
-					<camt:NtryRef>cmt054NtryRef001</camt:NtryRef>
-					<camt:Amt Ccy="RON">591636</camt:Amt>
-					<camt:CdtDbtInd>CRDT</camt:CdtDbtInd>
-					<camt:Sts><camt:Cd>BOOK</camt:Cd></camt:Sts>
-					<camt:BkTxCd>
-						<camt:Domn>
-							<camt:Cd>PMNT</camt:Cd>
-							<camt:Fmly>
-								<camt:Cd>RCDT</camt:Cd>
-								<camt:SubFmlyCd>XBCT</camt:SubFmlyCd>
-							</camt:Fmly>
-						</camt:Domn>
-					</camt:BkTxCd>
-					<camt:NtryDtls>
-						<camt:TxDtls>
-							<camt:Refs>
-								<camt:InstrId>pacs9bizmsgidr02</camt:InstrId>
-								<camt:EndToEndId>pcs008bzmsgidr-1</camt:EndToEndId>
-								<camt:UETR>7a562c67-ca16-48ba-b074-65581be6f001</camt:UETR>
-							</camt:Refs>
-							<camt:Amt Ccy="RON">591636</camt:Amt>
-							<camt:CdtDbtInd>CRDT</camt:CdtDbtInd>
-							<camt:RltdDts>
-								<camt:IntrBkSttlmDt>2022-10-20</camt:IntrBkSttlmDt>
-							</camt:RltdDts>
-						</camt:TxDtls>
-					</camt:NtryDtls>
-				</camt:Ntry>
-			</camt:Ntfctn>
-		</camt:BkToCstmrDbtCdtNtfctn>
-	</camt:Document>
-</Envelope>'''
-        if WORK_FROM_MEMORY:
-            MEMORY_FILES[filename] = xml_content
-            logger.debug(f'Successfully stored camt.054 XML in memory: {filename}')
+        for _, el in ET.iterparse(io.StringIO(content) if source is None else source):
+            if not isinstance(el.tag, str):
+                continue
+            localname = el.tag.rsplit('}', 1)[-1]
+            if localname == 'GrpHdr':
+                grp_hdr = el
+                grp_hdr_projection = _project_element(el)
+            elif localname == 'CdtTrfTxInf':
+                # Extract from GrpHdr + this transaction only
+                tx_root = ET.Element('Document')
+                if grp_hdr is not None:
+                    tx_root.append(grp_hdr)
+                tx_root.append(el)
+                fields = extract(None, root=tx_root)
+                if fields.get('error'):
+                    tx_errors += 1
+                    if log_sampled(tx_errors, logging.ERROR):
+                        logger.error('  ✗ Transaction %s parsing errors: %s', tx_count + 1, fields['error'])
+
+                amt_el = _find_first_by_localname(el, 'IntrBkSttlmAmt')
+                units = _amount_to_units((amt_el.text or '').strip()) if amt_el is not None else None
+                tx_units += units or 0
+                tx_count += 1
+
+                # Same paths as a single-transaction file of this type
+                parsed = json.dumps(
+                    {'Document': {BATCH_MSG_ROOTS[msg_type]: {'GrpHdr': grp_hdr_projection, 'CdtTrfTxInf': _project_element(el)}}},
+                    ensure_ascii=False, separators=(',', ':')
+                )
+
+                # Ids are generated here so attributes need no RETURNING round trip
+                row = (
+                    (str(uuid.uuid4()), filename, 'LOADED', ET.tostring(el, encoding='unicode'), current_date, msg_type, batch_id, parsed)
+                    + tuple(fields.get(col) for col in field_columns)
+                )
+                rows.append((row, fields))
+                el.clear()
+                if len(rows) >= BATCH_INSERT_SIZE:
+                    ids.extend(_flush_batch_rows(cursor, msg_type, rows))
+                    rows = []
+    except ET.ParseError as e:
+        raise ValueError(f'Malformed XML after {tx_count} transaction(s): {e}') from e
+    if rows:
+        ids.extend(_flush_batch_rows(cursor, msg_type, rows))
+
+    problems = []
+    if header['nb_of_txs'] is not None and header['nb_of_txs'] != tx_count:
+        problems.append(f'NbOfTxs={header["nb_of_txs"]}, transactions found: {tx_count}')
+    ctrl_units = _amount_to_units(header['ctrl_sum'])
+    if ctrl_units is not None and ctrl_units != tx_units:
+        problems.append(f'CtrlSum={header["ctrl_sum"]}, sum of IntrBkSttlmAmt: {_format_units(tx_units)}')
+    batch_check = 'MISMATCH' if problems else 'OK'
+    if problems:
+        logger.warning('  ✗ Batch control mismatch: %s', '; '.join(problems))
+
+    cursor.execute("""
+        UPDATE swift_input_batch
+        SET tx_count = %s, tx_sum = %s, batch_check = %s, batch_check_details = %s
+        WHERE id = %s
+    """, (tx_count, _units_to_decimal(tx_units), batch_check, '\n'.join(problems) or None, batch_id))
+
+    logger.debug('  ✓ Batch imported: %s transaction(s), %s with parsing errors, check %s', tx_count, tx_errors, batch_check)
+    return ids
+
+# Rows that belong to the swift_input ids selected by {ids}, deleted child-first
+PURGE_DEPENDENTS = (
+    # TRN processes of statement entries, then the documents' own processes
+    "DELETE FROM process WHERE doc_id IN (SELECT n.id FROM swift_stmt_ntry n WHERE n.swift_input_id IN ({ids}))",
+    "DELETE FROM process WHERE doc_id IN ({ids})",
+    "DELETE FROM swift_recon_link WHERE payment_id IN ({ids})",
+    """DELETE FROM swift_recon_link l USING swift_entry_tx_dtls d, swift_stmt_ntry n
+       WHERE l.tx_source = 'camt.053' AND l.tx_dtls_id = d.id AND d.ntry_id = n.id AND n.swift_input_id IN ({ids})""",
+    """DELETE FROM swift_recon_link l USING swift_ntfctn_tx_dtls d, swift_ntfctn_ntry n
+       WHERE l.tx_source = 'camt.054' AND l.tx_dtls_id = d.id AND d.ntry_id = n.id AND n.swift_input_id IN ({ids})""",
+    "DELETE FROM swift_recon_unmatched WHERE swift_input_id IN ({ids})",
+    "DELETE FROM swift_entry_tx_dtls d USING swift_stmt_ntry n WHERE d.ntry_id = n.id AND n.swift_input_id IN ({ids})",
+    "DELETE FROM swift_ntfctn_tx_dtls d USING swift_ntfctn_ntry n WHERE d.ntry_id = n.id AND n.swift_input_id IN ({ids})",
+    "DELETE FROM swift_stmt_ntry WHERE swift_input_id IN ({ids})",
+    "DELETE FROM swift_stmt_bal WHERE swift_input_id IN ({ids})",
+    "DELETE FROM swift_ntfctn_ntry WHERE swift_input_id IN ({ids})",
+    "DELETE FROM swift_pmt_sts WHERE swift_input_id IN ({ids})",
+    # Kept rows that only point at a purged message
+    "UPDATE swift_input_camt056 SET orgnl_swift_input_id = NULL WHERE orgnl_swift_input_id IN ({ids})",
+    "UPDATE swift_account_ledger SET stmt_swift_input_id = NULL WHERE stmt_swift_input_id IN ({ids})",
+    "UPDATE swift_account_movement SET swift_input_id = NULL WHERE swift_input_id IN ({ids})",
+) + tuple(f"DELETE FROM {table} WHERE id IN ({{ids}})" for table, _ in ATTRIBUTE_TABLES.values())
+
+def _retention_cutoff(now, months):
+    """First day of the month `months` before now: everything imported earlier expires."""
+    year, month = now.year, now.month - months
+    while month <= 0:
+        month += 12
+        year -= 1
+    return datetime(year, month, 1)
+
+def _delete_dependents(cursor, ids_sql, params=None):
+    """Delete rows of all PURGE_DEPENDENTS for the swift_input ids selected by ids_sql."""
+    for sql in PURGE_DEPENDENTS:
+        cursor.execute(sql.format(ids=ids_sql), params)
+
+def _is_partitioned(cursor):
+    cursor.execute("""
+        SELECT 1 AS partitioned FROM pg_partitioned_table WHERE partrelid = 'public.swift_input'::regclass
+    """)
+    return bool(fetchall(cursor))
+
+def purge_partitions(cursor, cutoff):
+    """Drop swift_input partitions whose upper bound is not after cutoff.
+
+    Dependents are deleted PURGE_BATCH_SIZE messages per transaction, in id
+    order; once all of a partition's are gone it is detached and dropped. A
+    partition not done within PURGE_MAX_BATCHES is finished next run.
+
+    Returns:
+        list of dropped partition names
+    """
+    cursor.execute("""
+        SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) AS bound
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'public.swift_input'::regclass
+    """)
+    dropped = []
+    batches = 0
+    for row in fetchall(cursor):
+        relname, bound = row.get('relname'), row.get('bound') or ''
+        match = re.search(r"TO \('(\d{4}-\d{2}-\d{2})", bound)
+        if not match or datetime.strptime(match.group(1), '%Y-%m-%d') > cutoff:
+            continue
+        logger.info('  Dropping partition %s (%s)', relname, bound)
+        last_id = None
+        while True:
+            if batches >= PURGE_MAX_BATCHES:
+                logger.info('  Partition %s is finished next run (%s batch(es) this run)', relname, batches)
+                return dropped
+            cursor.execute(f"""
+                SELECT id FROM public.{relname} WHERE %(last_id)s::uuid IS NULL OR id > %(last_id)s::uuid
+                ORDER BY id LIMIT %(limit)s
+            """, {'last_id': last_id, 'limit': PURGE_BATCH_SIZE})
+            ids = [str(r.get('id')) for r in fetchall(cursor)]
+            if not ids:
+                break
+            _delete_dependents(cursor, 'SELECT unnest(%(ids)s::uuid[])', {'ids': ids})
+            cursor.connection.commit()
+            batches += 1
+            last_id = ids[-1]
+        cursor.execute(f'ALTER TABLE public.swift_input DETACH PARTITION public.{relname}')
+        cursor.execute(f'DROP TABLE public.{relname}')
+        cursor.connection.commit()
+        dropped.append(relname)
+    return dropped
+
+def purge_in_batches(cursor, cutoff, table='swift_input'):
+    """Delete messages imported before cutoff, PURGE_BATCH_SIZE per transaction.
+
+    At most PURGE_MAX_BATCHES are deleted per run; the rest goes next run.
+    On a partitioned swift_input, table is swift_input_default: it has no
+    upper bound, so purge_partitions never drops it.
+
+    Returns:
+        number of swift_input rows deleted
+    """
+    deleted = 0
+    for _ in range(PURGE_MAX_BATCHES):
+        cursor.execute(f"""
+            SELECT id FROM public.{table} WHERE imported < %s ORDER BY imported LIMIT %s
+        """, (cutoff, PURGE_BATCH_SIZE))
+        ids = [str(r.get('id')) for r in fetchall(cursor)]
+        if not ids:
+            break
+        params = {'ids': ids}
+        _delete_dependents(cursor, 'SELECT unnest(%(ids)s::uuid[])', params)
+        cursor.execute(f'DELETE FROM public.{table} WHERE id = ANY(%(ids)s::uuid[])', params)
+        cursor.connection.commit()
+        deleted += len(ids)
+        logger.debug('  Purged %s message(s) so far', deleted)
+    return deleted
+
+def maintain_storage():
+    """Create upcoming swift_input partitions and purge messages past RETENTION_MONTHS."""
+    with initDbSession(database='default').cursor() as c:
+        partitioned = _is_partitioned(c)
+        if partitioned:
+            # Rows already in the DEFAULT partition for a new month block its
+            # partition (check_violation): logged, the purge still runs
+            try:
+                c.execute('SELECT public.swift_input_create_partitions(2) AS created')
+                created = (fetchall(c) or [{}])[0].get('created')
+                c.connection.commit()
+                if created:
+                    logger.info('  Created %s swift_input partition(s)', created)
+            except Exception as e:
+                c.connection.rollback()
+                logger.error('  ✗ swift_input partitions not created: %s', e)
+
+        if not RETENTION_MONTHS:
+            return
+
+        cutoff = _retention_cutoff(datetime.now(), RETENTION_MONTHS)
+        logger.info('  Purging messages imported before %s (retention %s months)', cutoff.date(), RETENTION_MONTHS)
+        if partitioned:
+            dropped = purge_partitions(c, cutoff)
+            logger.info('  ✓ Dropped %s partition(s)', len(dropped))
+            deleted = purge_in_batches(c, cutoff, 'swift_input_default')
+            logger.info('  ✓ Purged %s message(s) from swift_input_default', deleted)
         else:
-            camt054_file_path = os.path.join(FOLDER_IN, filename)
-            with open(camt054_file_path, 'w', encoding='utf-8') as f:
-                f.write(xml_content)
-            logger.debug(f'Successfully created camt.054 XML file: {camt054_file_path}')
+            deleted = purge_in_batches(c, cutoff)
+            logger.info('  ✓ Purged %s message(s)', deleted)
+
+        # Batch headers whose transactions are all gone
+        c.execute("""
+            DELETE FROM swift_input_batch b
+            WHERE b.imported < %s
+              AND NOT EXISTS (SELECT 1 FROM swift_input si WHERE si.batch_id = b.id)
+        """, (cutoff,))
+        c.connection.commit()
+
+# Stages timed per file; run-level stages (reconcile, payment_status, commit) have no file
+IMPORT_STAGES = (
+    'read', 'detect', 'validate', 'parse', 'extract', 'insert', 'process', 'file_move',
+    'reconcile', 'payment_status', 'commit',
+)
+
+# Slowest files kept in swift_import_run.slowest_files
+IMPORT_RUN_SLOWEST = 10
+
+class ImportRunStats:
+    """Stage timings of one read_and_import_files run.
+
+    The loop calls lap(stage) after each step, so the time since the
+    previous lap goes to that stage; laps of the same stage within a file
+    add up. SQL time is collected separately by TimedCursor, which splits
+    steps that both parse and write (camt details, batches).
+    """
+
+    def __init__(self):
+        self.started = datetime.now()
+        self._t0 = time.perf_counter()
+        self.files = []
+        self.run_stages = {}
+        self.current = None
+        self._lap = self._t0
+        self.sql_statements = 0
+        self.sql_seconds = 0.0
+        self._uncommitted = 0  # index of the first file in self.files not committed yet
+
+    def start_file(self, filename):
+        self.end_file()
+        self.current = {
+            'file': filename, 'msg_type': None, 'bytes': 0, 'outcome': None, 'items': 1, 'arrival': None,
+            'sql': 0.0, 'statements': 0,
+            'stages': {}, 't0': time.perf_counter(),
+        }
+        self._lap = self.current['t0']
+
+    def describe(self, **info):
+        """Set msg_type, bytes, outcome or items of the current file."""
+        if self.current is not None:
+            self.current.update(info)
+
+    def end_file(self):
+        """Close the current file and log its one-line summary."""
+        f = self.current
+        if f is not None:
+            f['seconds'] = time.perf_counter() - f.pop('t0')
+            self.files.append(f)
+            self.current = None
+            logger.info(
+                '<<< %s: %s %s, %s bytes, %s item(s), %.1f ms, %s SQL',
+                f['file'], f['msg_type'] or '-', f['outcome'] or '-', f['bytes'], f['items'],
+                f['seconds'] * 1000, f['statements']
+            )
+        self._lap = time.perf_counter()
+
+    def committed(self):
+        """Arrival-to-commit latency of the imported files the last commit made visible."""
+        now = time.time()
+        pending = self.files[self._uncommitted:] + ([self.current] if self.current is not None else [])
+        for f in pending:
+            if f['outcome'] == 'imported' and f['arrival'] is not None and 'latency' not in f:
+                f['latency'] = now - f['arrival']
+        self._uncommitted = len(self.files)
+
+    def lap(self, stage):
+        """Add the time since the previous lap (or the file start) to stage."""
+        now = time.perf_counter()
+        stages = self.current['stages'] if self.current is not None else self.run_stages
+        stages[stage] = stages.get(stage, 0.0) + now - self._lap
+        self._lap = now
+
+    def add_sql(self, seconds):
+        self.sql_statements += 1
+        self.sql_seconds += seconds
+        if self.current is not None:
+            self.current['statements'] += 1
+            self.current['sql'] += seconds
+
+    def summary(self):
+        """Per-stage count/total/p50/p95/max in ms and the slowest files."""
+        self.end_file()
+
+        def ms(value):
+            return round(value * 1000, 3)
+
+        def percentile(values, p):
+            return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+        stages = {}
+        for stage in IMPORT_STAGES:
+            values = sorted(f['stages'][stage] for f in self.files if stage in f['stages'])
+            if stage in self.run_stages:
+                values = sorted(values + [self.run_stages[stage]])
+            if values:
+                stages[stage] = {
+                    'count': len(values), 'total_ms': ms(sum(values)),
+                    'p50_ms': ms(percentile(values, 50)), 'p95_ms': ms(percentile(values, 95)),
+                    'max_ms': ms(values[-1]),
+                }
+        sql = sorted(f['sql'] for f in self.files)
+        if sql:
+            stages['sql'] = {
+                'count': self.sql_statements, 'total_ms': ms(self.sql_seconds),
+                'p50_ms': ms(percentile(sql, 50)), 'p95_ms': ms(percentile(sql, 95)), 'max_ms': ms(sql[-1]),
+            }
+
+        # Arrival (file mtime / spool put) to commit, per message type
+        latency = {}
+        for msg_type in sorted({f['msg_type'] for f in self.files if 'latency' in f and f['msg_type']}):
+            values = sorted(f['latency'] for f in self.files if f['msg_type'] == msg_type and 'latency' in f)
+            latency[msg_type] = {
+                'count': len(values), 'p50_ms': ms(percentile(values, 50)),
+                'p95_ms': ms(percentile(values, 95)), 'max_ms': ms(values[-1]),
+            }
+
+        slowest = sorted(self.files, key=lambda f: f['seconds'], reverse=True)[:IMPORT_RUN_SLOWEST]
+        return {
+            'started': self.started,
+            'duration_ms': ms(time.perf_counter() - self._t0),
+            'files': len(self.files),
+            'bytes': sum(f['bytes'] for f in self.files),
+            'sql_statements': self.sql_statements,
+            'sql_ms': ms(self.sql_seconds),
+            'stages': stages,
+            'latency': latency,
+            'slowest_files': [
+                {
+                    'file': f['file'], 'msg_type': f['msg_type'], 'bytes': f['bytes'],
+                    'ms': ms(f['seconds']), 'sql_ms': ms(f['sql']), 'statements': f['statements'],
+                    'stages': {stage: ms(v) for stage, v in f['stages'].items()},
+                }
+                for f in slowest
+            ],
+        }
+
+class TimedCursor:
+    """Cursor wrapper adding the time of every execute() to ImportRunStats."""
+
+    def __init__(self, cursor, stats):
+        self._cursor = cursor
+        self._stats = stats
+
+    def execute(self, sql, params=None):
+        started = time.perf_counter()
+        try:
+            return self._cursor.execute(sql, params)
+        finally:
+            self._stats.add_sql(time.perf_counter() - started)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+def save_import_run(summary, imported, skipped, errors, checkpoint=None):
+    """Store the run summary (and the checkpoint of a run stopped on its budget) in swift_import_run; returns its id (None on failure)."""
+    try:
+        with initDbSession(database='default').cursor() as c:
+            c.execute("""
+                INSERT INTO swift_import_run (
+                    started, finished, duration_ms, files, imported, skipped, errors, bytes,
+                    sql_statements, sql_ms, stages, latency, slowest_files, checkpoint
+                )
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s::jsonb, %s::jsonb, %s::jsonb, %s::jsonb)
+                RETURNING id
+            """, (
+                summary['started'], datetime.now(), summary['duration_ms'], summary['files'],
+                imported, skipped, errors, summary['bytes'],
+                summary['sql_statements'], summary['sql_ms'],
+                json.dumps(summary['stages']), json.dumps(summary['latency']),
+                json.dumps(summary['slowest_files'], ensure_ascii=False),
+                json.dumps(checkpoint, ensure_ascii=False) if checkpoint else None,
+            ))
+            run_id = fetchall(c)[0].get('id')
+            c.connection.commit()
+            return run_id
     except Exception as e:
-        logger.error(f'Error creating camt.054 XML: {e}')
+        logger.error('Import run statistics not saved: %s', e)
+        return None
+
+# Handlers per message type, all called as fn(content, swift_input_id, cursor, root=parsed):
+# pacs.002/008/009 and camt.056 return the extracted fields (swift_input_id and cursor
+# are not used), camt.053/camt.054 write their balances/entries and return counts
+MESSAGE_HANDLERS = {
+    'pacs.002': process_pacs002,
+    'pacs.008': process_pacs008,
+    'pacs.009': process_pacs009,
+    'camt.053': process_camt053,
+    'camt.054': process_camt054,
+    'camt.056': process_camt056,
+}
+
+_SNIFF_TYPE = re.compile(r'\b(?:pacs|camt|pain|admi)\.\d{3}')
+
+def parse_priority_classes(value):
+    """{'camt.056': 0, 'pacs.008': 1, ...} from 'camt.056 > pacs.008, pacs.009 > camt.054 > camt.053'."""
+    ranks = {}
+    for rank, group in enumerate((value or '').split('>')):
+        for msg_type in group.split(','):
+            if msg_type.strip():
+                ranks.setdefault(msg_type.strip(), rank)
+    return ranks
+
+def list_input_files():
+    """Files waiting in MEMORY_FILES or FOLDER_IN."""
+    if WORK_FROM_MEMORY:
+        return MEMORY_FILES.keys()
+    return [f for f in os.listdir(FOLDER_IN) if os.path.isfile(os.path.join(FOLDER_IN, f))]
 
-    # Create camt.056 XML example file
-    logger.debug('Creating camt.056 XML test file...')
-    filename = 'camt056_example.xml'
+def open_input_file(filename):
+    """Binary stream of a waiting file: the file in FOLDER_IN or the spool entry."""
+    if WORK_FROM_MEMORY:
+        return MEMORY_FILES.open(filename)
+    return open(os.path.join(FOLDER_IN, filename), 'rb')
+
+def probe_input_file(filename):
+    """(head text, size, arrival epoch, producer priority) of a waiting file; None if it is gone."""
+    if WORK_FROM_MEMORY:
+        return MEMORY_FILES.probe(filename, PRIORITY_SNIFF_BYTES)
+    path = os.path.join(FOLDER_IN, filename)
     try:
-        xml_content = '''<?xml version="1.0" encoding="UTF-8"?>
-<Envelope xmlns="urn:swift:xsd:envelope">
-	<head:AppHdr xmlns:head="urn:iso:std:iso:20022:tech:xsd:head.001.001.02">
-		<head:Fr><head:FIId><head:FinInstnId><head:BICFI>MYMBGB2LXXX</head:BICFI></head:FinInstnId></head:FIId></head:Fr>
-		<head:To><head:FIId><head:FinInstnId><head:BICFI>INGBROBUXXX</head:BICFI></head:FinInstnId></head:FIId></head:To>
-		<head:BizMsgIdr>cmt056bizmsgidr-001</head:BizMsgIdr>
-		<head:MsgDefIdr>camt.056.001.08</head:MsgDefIdr>
-		<head:BizSvc>swift.cbprplus.02</head:BizSvc>
-		<head:CreDt>2022-10-20T12:00:00+00:00</head:CreDt>
-	</head:AppHdr>
-	<camt:Document xmlns:camt="urn:iso:std:iso:20022:tech:xsd:camt.056.001.08">
-		<camt:FIToFIPmtCxlReq>
-			<camt:Assgnmt>
-				<camt:Id>CASE-2022-10-20-001</camt:Id>
-				<camt:Assgnr>
-					<camt:Agt>
-						<camt:FinInstnId>
-							<camt:BICFI>MYMBGB2LXXX</camt:BICFI>
-						</camt:FinInstnId>
-					</camt:Agt>
-				</camt:Assgnr>
-				<camt:Assgne>
-					<camt:Agt>
-						<camt:FinInstnId>
-							<camt:BICFI>INGBROBUXXX</camt:BICFI>
-						</camt:FinInstnId>
-					</camt:Agt>
-				</camt:Assgne>
-				<camt:CreDtTm>2022-10-20T12:00:00+00:00</camt:CreDtTm>
-			</camt:Assgnmt>
-			<camt:Undrlyg>
-				<camt:TxInf>
-					<camt:OrgnlInstrId>pacs8bizmsgidr02</camt:OrgnlInstrId>
-					<camt:OrgnlEndToEndId>pacs008EndToEndId-001</camt:OrgnlEndToEndId>
-					<camt:OrgnlTxId>TX-2022-10-20-001</camt:OrgnlTxId>
-					<camt:OrgnlUETR>7a562c67-ca16-48ba-b074-65581be6f001</camt:OrgnlUETR>
-					<camt:CxlRsnInf>
-						<camt:Rsn>
-							<camt:Cd>DUPL</camt:Cd>
-						</camt:Rsn>
-						<camt:AddtlInf>Duplicate payment detected</camt:AddtlInf>
-					</camt:CxlRsnInf>
-				</camt:TxInf>
-			</camt:Undrlyg>
-		</camt:FIToFIPmtCxlReq>
-	</camt:Document>
-</Envelope>'''
-        if WORK_FROM_MEMORY:
-            MEMORY_FILES[filename] = xml_content
-            logger.debug(f'Successfully stored camt.056 XML in memory: {filename}')
-        else:
-            camt056_file_path = os.path.join(FOLDER_IN, filename)
-            with open(camt056_file_path, 'w', encoding='utf-8') as f:
-                f.write(xml_content)
-            logger.debug(f'Successfully created camt.056 XML file: {camt056_file_path}')
+        stat = os.stat(path)
+        with open(path, 'rb') as f:
+            head = f.read(PRIORITY_SNIFF_BYTES)
+    except OSError:
+        return None
+    return head.decode('utf-8', 'ignore'), stat.st_size, stat.st_mtime, 0
+
+def finish_input_file(filename, outcome, error=None):
+    """Take a handled file out of the input, once its transaction is committed.
+
+    Imported files are deleted; skipped and failed ones move to FOLDER_OUT,
+    a failed one with FILENAME.error.txt. In memory mode the spool entry is
+    discarded.
+    """
+    if WORK_FROM_MEMORY:
+        MEMORY_FILES.discard(filename)
+        logger.debug('  Removed from memory: %s', filename)
+        return
+    file_path = os.path.join(FOLDER_IN, filename)
+    try:
+        if outcome == 'imported':
+            os.remove(file_path)
+            logger.debug('  Deleted file from input folder: %s', filename)
+            return
+        dest_file_path = os.path.join(FOLDER_OUT, filename)
+        shutil.move(file_path, dest_file_path)
+        logger.debug('  Moved to: %s', dest_file_path)
+        if error is not None:
+            error_file_path = os.path.join(FOLDER_OUT, f'{filename}.error.txt')
+            with open(error_file_path, 'w', encoding='utf-8') as err_f:
+                err_f.write(f'Error processing file: {filename}\n')
+                err_f.write(f'Timestamp: {datetime.now()}\n')
+                err_f.write(f'\nError: {error}\n')
     except Exception as e:
-        logger.error(f'Error creating camt.056 XML: {e}')
+        logger.error('  Failed to move file %s: %s', filename, e)
+
+class ImportScheduler:
+    """Processing order of one run: priority class, aging, rescans.
+
+    Files are classified without parsing: the message type is sniffed from
+    the first PRIORITY_SNIFF_BYTES, files over PRIORITY_BULK_BYTES go to the
+    last class, and a spool priority moves a file up that many classes.
+    Every class is FIFO by arrival. The next file is the class head with the
+    best class after aging (one class up per PRIORITY_AGING_SECONDS waited),
+    so bulk statements yield to urgent traffic but are never starved. The
+    input is listed again every PRIORITY_RESCAN_SECONDS, so urgent files
+    arriving during a long run overtake the bulk still waiting.
+    """
 
-    # Create error test file
-    logger.debug('Creating error test file...')
-    filename = 'error_test.xml'
+    def __init__(self, files, rescan=None, classes=None, aging_seconds=None):
+        self.ranks = parse_priority_classes(classes or PRIORITY_CLASSES)
+        self.last_rank = max(self.ranks.values(), default=0)
+        self.aging_seconds = aging_seconds or PRIORITY_AGING_SECONDS
+        self.rescan = rescan
+        self.queues = {}  # rank -> deque of filenames in arrival order
+        self.info = {}    # filename -> {'msg_type', 'rank', 'arrival', 'size'}
+        self.seen = set()
+        self.add(files)
+
+    def classify(self, filename):
+        probe = probe_input_file(filename)
+        if probe is None:
+            return None
+        head, size, arrival, priority = probe
+        match = _SNIFF_TYPE.search(head)
+        msg_type = match.group(0) if match else None
+        rank = self.ranks.get(msg_type, self.last_rank)
+        if size > PRIORITY_BULK_BYTES:
+            rank = self.last_rank
+        return {'msg_type': msg_type, 'rank': max(0, rank - priority), 'arrival': arrival, 'size': size}
+
+    def add(self, files):
+        """Queue files not seen in this run."""
+        new = []
+        for filename in files:
+            if filename in self.seen:
+                continue
+            self.seen.add(filename)
+            info = self.classify(filename)
+            if info is not None:
+                self.info[filename] = info
+                new.append((info['arrival'], filename))
+        for _, filename in sorted(new):
+            self.queues.setdefault(self.info[filename]['rank'], deque()).append(filename)
+        self._scanned = time.monotonic()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.rescan is not None and time.monotonic() - self._scanned >= PRIORITY_RESCAN_SECONDS:
+            self.add(self.rescan())
+        now = time.time()
+        best = None
+        for rank, waiting in self.queues.items():
+            arrival = self.info[waiting[0]]['arrival']
+            key = (rank - int(max(0.0, now - arrival) // self.aging_seconds), arrival)
+            if best is None or key < best[0]:
+                best = (key, rank)
+        if best is None:
+            raise StopIteration
+        waiting = self.queues[best[1]]
+        filename = waiting.popleft()
+        if not waiting:
+            del self.queues[best[1]]
+        return filename
+
+    def waiting(self):
+        """Files queued but not taken yet, in class order."""
+        return [filename for rank in sorted(self.queues) for filename in self.queues[rank]]
+
+class RunBudget:
+    """Files, bytes and wall time one import run may take (None = no limit).
+
+    Checked before each file, so a file is never cut in half; the first file
+    is always taken, so one file over max_bytes cannot stall the input.
+    """
+
+    def __init__(self, max_files=None, max_bytes=None, max_seconds=None):
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+        self.files = 0
+        self.bytes = 0
+        self.started = time.monotonic()
+
+    def take(self, size):
+        """Count a file of size bytes; returns the exhausted limit instead if it does not fit."""
+        if self.files:
+            if self.max_files and self.files >= self.max_files:
+                return 'max_files'
+            if self.max_bytes and self.bytes + size > self.max_bytes:
+                return 'max_bytes'
+            if self.max_seconds and time.monotonic() - self.started >= self.max_seconds:
+                return 'max_seconds'
+        self.files += 1
+        self.bytes += size
+        return None
+
+def acquire_import_lock():
+    """Session holding the importer advisory lock; None if another run holds it."""
+    db = initDbSession(database='default')
+    with db.cursor() as c:
+        c.execute('SELECT pg_try_advisory_lock(%s) AS locked', (IMPORT_LOCK_KEY,))
+        locked = fetchall(c)[0].get('locked')
+        # Session-level lock: it outlives this transaction until release_import_lock()
+        c.connection.commit()
+    return db if locked else None
+
+def release_import_lock(db):
     try:
-        content = 'sample error file'
-        if WORK_FROM_MEMORY:
-            MEMORY_FILES[filename] = content
-            logger.debug(f'Successfully stored error test file in memory: {filename}')
-        else:
-            error_test_file_path = os.path.join(FOLDER_IN, filename)
-            with open(error_test_file_path, 'w', encoding='utf-8') as f:
-                f.write(content)
-            logger.debug(f'Successfully created error test file: {error_test_file_path}')
+        with db.cursor() as c:
+            # A failed run can leave the session in an aborted transaction,
+            # where the unlock would fail and the lock stay with the pooled session
+            c.connection.rollback()
+            c.execute('SELECT pg_advisory_unlock(%s)', (IMPORT_LOCK_KEY,))
+            c.connection.commit()
     except Exception as e:
-        logger.error(f'Error creating error test file: {e}')
+        # The lock goes with the session anyway when the process exits
+        logger.error('Import lock not released: %s', e)
 
-    # List contents
-    if WORK_FROM_MEMORY:
-        logger.debug(f'Files in MEMORY after creating test files: {len(MEMORY_FILES)} files')
-        for filename, content in MEMORY_FILES.items():
-            size = len(content)
-            logger.debug(f'  - {filename} ({size} bytes)')
-    else:
-        try:
-            contents_after = os.listdir(FOLDER_IN)
-            logger.debug(f'Files AFTER creating test files: {len(contents_after)} files')
-            for filename in contents_after:
-                file_path = os.path.join(FOLDER_IN, filename)
-                size = os.path.getsize(file_path) if os.path.isfile(file_path) else 0
-                logger.debug(f'  - {filename} ({size} bytes)')
-        except Exception as e:
-            logger.error(f'Cannot list directory: {e}')
+def load_import_checkpoint():
+    """(run id, checkpoint) of the last recorded run if it stopped on its budget, else None."""
+    try:
+        with initDbSession(database='default').cursor() as c:
+            c.execute("""
+                SELECT id, checkpoint
+                FROM swift_import_run
+                ORDER BY started DESC
+                LIMIT 1
+            """)
+            rows = fetchall(c)
+    except Exception as e:
+        logger.error('Import checkpoint not read: %s', e)
+        return None
+    if rows and rows[0].get('checkpoint'):
+        return rows[0]['id'], rows[0]['checkpoint']
+    return None
 
 def read_and_import_files():
     """Read all files from folder_in directory or memory and import to swift_input table"""
-    global FOLDER_IN, WORK_FROM_MEMORY, MEMORY_FILES
+    global FOLDER_IN, WORK_FROM_MEMORY, MEMORY_FILES, LAST_IMPORT_RUN_ID, LAST_IMPORT_CHECKPOINT
+
+    LAST_IMPORT_RUN_ID = None
+    LAST_IMPORT_CHECKPOINT = None
+    budget = RunBudget(RUN_MAX_FILES, RUN_MAX_BYTES, RUN_MAX_SECONDS)
+
+    resumed = load_import_checkpoint()
+    if resumed:
+        logger.info(
+            'Resuming after run %s (%s): %s file(s), %s bytes were left',
+            resumed[0], resumed[1].get('reason'), resumed[1].get('remaining'), resumed[1].get('remaining_bytes')
+        )
     
     if WORK_FROM_MEMORY:
         logger.debug('read_and_import_files: Working from MEMORY mode')
         
         # Get all files from memory
         files = list(MEMORY_FILES.keys())
-        logger.debug(f'Found {len(files)} files in MEMORY')
-        if files:
-            logger.debug(f'Files to process:')
+        spool = MEMORY_FILES.metrics()
+        logger.info(
+            'Spool: %s file(s), %s KiB compressed (%s KiB raw) of %s KiB, high water %s KiB, '
+            'refused %s, producers blocked %s ms, oldest %s s',
+            spool['depth'], spool['bytes'] // 1024, spool['raw_bytes'] // 1024, spool['max_bytes'] // 1024,
+            spool['high_water_bytes'] // 1024, spool['refused'], spool['blocked_ms'], spool['oldest_age_s']
+        )
+        if files and logger.isEnabledFor(logging.DEBUG):
+            logger.debug('Files to process:')
             for filename in files:
-                size = len(MEMORY_FILES[filename])
-                logger.debug(f'  - {filename} ({size} bytes)')
-        else:
+                logger.debug('  - %s (%s bytes)', filename, MEMORY_FILES.size(filename))
+        elif not files:
             logger.warning('No files found in memory!')
             return 0
     else:
-        logger.debug(f'read_and_import_files: Starting with path {FOLDER_IN}')
+        logger.debug('read_and_import_files: Starting with path %s', FOLDER_IN)
 
         if not os.path.exists(FOLDER_IN):
-            logger.error(f'Input directory not found: {FOLDER_IN}')
+            logger.error('Input directory not found: %s', FOLDER_IN)
             raise UserException({
                 'message': 'Input directory not found',
                 'description': f'Path: {FOLDER_IN}'
@@ -1570,18 +3175,18 @@ def read_and_import_files():
         # Get all files
         try:
             files = [f for f in os.listdir(FOLDER_IN) if os.path.isfile(os.path.join(FOLDER_IN, f))]
-            logger.debug(f'Found {len(files)} files in {FOLDER_IN}')
-            if files:
-                logger.debug(f'Files to process:')
+            logger.debug('Found %s files in %s', len(files), FOLDER_IN)
+            if files and logger.isEnabledFor(logging.DEBUG):
+                logger.debug('Files to process:')
                 for filename in files:
                     file_path = os.path.join(FOLDER_IN, filename)
                     size = os.path.getsize(file_path)
-                    logger.debug(f'  - {filename} ({size} bytes)')
-            else:
+                    logger.debug('  - %s (%s bytes)', filename, size)
+            elif not files:
                 logger.warning('No files found in directory!')
                 return 0
         except Exception as e:
-            logger.error(f'Error reading input directory: {e}')
+            logger.error('Error reading input directory: %s', e)
             raise UserException({
                 'message': 'Error reading input directory',
                 'description': f'Path: {FOLDER_IN}'
@@ -1590,100 +3195,177 @@ def read_and_import_files():
     imported_count = 0
     skipped_count = 0
     error_count = 0
+    imported_ids = []
+    # (swift_input_id, status) from pacs.002, applied to outgoing payments after the loop
+    pending_statuses = []
+    # (filename, outcome, error) handled in the open transaction: the files
+    # leave the input only after it is committed, so a failed commit retries them
+    finished = []
+    run_stats = ImportRunStats()
 
     with initDbSession(database='default').cursor() as c:
+        c = TimedCursor(c, run_stats)
         logger.info('=== Starting file processing loop ===')
-        logger.info(f'Database session initialized')
-        
-        for filename in files:
-            logger.info(f'')
-            logger.info(f'>>> Processing file: {filename}')
+        logger.info('Database session initialized')
 
+        # Best (lowest) priority class among the imported files not committed yet
+        uncommitted_rank = None
+
+        def commit():
+            """Commit the open transaction, then take its files out of the input."""
+            nonlocal uncommitted_rank
+            c.connection.commit()
+            uncommitted_rank = None
+            run_stats.committed()
+            run_stats.lap('commit')
+            for args in finished:
+                finish_input_file(*args)
+            finished.clear()
+            run_stats.lap('file_move')
+        
+        scheduler = ImportScheduler(files, rescan=list_input_files)
+        for filename in scheduler:
+            exhausted = budget.take(scheduler.info[filename]['size'])
+            if exhausted:
+                # Everything not taken stays in folder_in / the spool for the next run
+                remaining = [filename] + scheduler.waiting()
+                LAST_IMPORT_CHECKPOINT = {
+                    'reason': exhausted,
+                    'remaining': len(remaining),
+                    'remaining_bytes': sum(scheduler.info[f]['size'] for f in remaining),
+                    'next': remaining[:IMPORT_RUN_SLOWEST],
+                }
+                logger.warning(
+                    'Run budget reached (%s) after %s file(s), %s bytes: %s file(s) left for the next run',
+                    exhausted, budget.files, budget.bytes, len(remaining)
+                )
+                break
+
+            # Imported files of a more urgent class are made visible before a
+            # less urgent one (e.g. a bulk camt.053) starts
+            rank = scheduler.info[filename]['rank']
+            if uncommitted_rank is not None and rank > uncommitted_rank:
+                run_stats.end_file()
+                commit()
+
+            logger.debug('>>> Processing file: %s', filename)
+            run_stats.start_file(filename)
+            run_stats.describe(arrival=scheduler.info[filename]['arrival'])
+
+            # Everything a file writes is in its own savepoint: a failing
+            # statement rolls back that file only, the transaction goes on
+            savepoint = False
+            imported_before = imported_count
+            file_ids = []
+            file_statuses = []
             try:
                 # Read file content
                 if WORK_FROM_MEMORY:
                     content = MEMORY_FILES.get(filename, '')
                     if not content:
-                        logger.error(f'  File not found in memory: {filename}')
+                        logger.error('  File not found in memory: %s', filename)
                         error_count += 1
+                        run_stats.describe(outcome='error')
                         continue
                 else:
                     file_path = os.path.join(FOLDER_IN, filename)
                     with open(file_path, 'r', encoding='utf-8') as f:
                         content = f.read()
 
-                logger.debug(f'  File size: {len(content)} bytes')
+                logger.debug('  File size: %s bytes', len(content))
+                run_stats.lap('read')
 
                 current_date = datetime.now()
 
                 # Detect message type
                 msg_type = detect_message_type(content)
+                run_stats.describe(msg_type=msg_type, bytes=len(content))
+                run_stats.lap('detect')
 
                 # Check if message type is in our list
-                supported_types = ['pacs.008', 'pacs.009', 'camt.053', 'camt.054', 'camt.056']
-
-                if msg_type not in supported_types:
+                if msg_type not in MESSAGE_HANDLERS:
                     # Unknown or unsupported message type - silently move to folder_out
-                    logger.info(f'  ✗ Unsupported message type: {msg_type}, skipping file')
+                    logger.debug('  ✗ Unsupported message type: %s, skipping file', msg_type)
                     skipped_count += 1
-
-                    if WORK_FROM_MEMORY:
-                        # Just remove from memory
-                        MEMORY_FILES.pop(filename, None)
-                        logger.debug(f'  Removed from memory: {filename}')
-                    else:
-                        # Move to folder_out without noise
-                        file_path = os.path.join(FOLDER_IN, filename)
-                        dest_file_path = os.path.join(FOLDER_OUT, filename)
-                        try:
-                            shutil.move(file_path, dest_file_path)
-                            logger.debug(f'  Moved to: {dest_file_path}')
-                        except Exception as e:
-                            logger.error(f'  Failed to move file: {e}')
-                            pass  # Silently ignore errors
-
+                    run_stats.describe(outcome='skipped')
+                    # Moved to folder_out without noise
+                    finished.append((filename, 'skipped', None))
                     continue
 
                 # Process supported message types
-                logger.info(f'  ✓ Processing as {msg_type}')
+                logger.debug('  ✓ Processing as %s', msg_type)
+                c.execute('SAVEPOINT import_file')
+                savepoint = True
+
+                validation_error = validate_message(content)
+                if validation_error:
+                    logger.warning('  ✗ %s', validation_error)
+                run_stats.lap('validate')
+
+                # Multi-transaction pacs.008/pacs.009 go row per CdtTrfTxInf, parsed from the input stream
+                batch_header = None
+                if msg_type in ('pacs.008', 'pacs.009'):
+                    with open_input_file(filename) as source:
+                        batch_header = _peek_group_header(source)
+
+                # Single messages are parsed once for field extraction and swift_input.parsed
+                root = None
+                if not (batch_header and (batch_header['nb_of_txs'] or 0) > 1):
+                    try:
+                        root = ET.fromstring(content)
+                    except ET.ParseError:
+                        pass  # extractors record the parse error
+                parsed = build_projection(root)
+                run_stats.lap('parse')
 
                 # Extract fields based on message type
-                if msg_type == 'pacs.008':
-                    logger.info(f'  Extracting pacs.008 fields...')
-                    fields = process_pacs008(content)
+                if batch_header and (batch_header['nb_of_txs'] or 0) > 1:
+                    with open_input_file(filename) as source:
+                        batch_ids = import_payment_batch(
+                            c, filename, content, msg_type, current_date, batch_header, validation_error, source=source
+                        )
+                    run_stats.lap('extract')
+                    file_ids.extend(batch_ids)
+                    # Schema errors are stored on the batch row
+                    swift_input_id = None
+                    validation_error = None
+
+                    imported_count += 1
+                    run_stats.describe(outcome='imported', items=len(batch_ids))
+                    logger.debug('  ✓ Successfully imported %s batch file: %s', msg_type, filename)
+
+                elif msg_type == 'pacs.008':
+                    logger.debug('  Extracting pacs.008 fields...')
+                    fields = process_pacs008(content, root=root)
                     state_value = 'LOADED'
                     
                     # Check for parsing errors
                     if fields.get('error'):
-                        logger.error(f'  ✗ Parsing errors: {fields["error"]}')
+                        logger.error('  ✗ Parsing errors: %s', fields['error'])
+                    run_stats.lap('extract')
 
-                    # Insert into swift_input
+                    # Insert into swift_input (attributes go to swift_input_pacs008)
                     insert_sql = """
                         INSERT INTO swift_input (
-                            file_name, state, content, imported, msg_type,
-                            snd_name, rcv_name, amount, currency_code, dval,
-                            code, message, snd_acc, rcv_acc,
-                            snd_bank, snd_bank_name, snd_mid_bank, snd_mid_bank_name, snd_mid_bank_acc,
-                            rcv_bank, rcv_bank_name, error
+                            file_name, state, content, imported, msg_type, parsed,
+                            amount, currency_code, dval,
+                            code, msg_id, instr_id, uetr,
+                            snd_mid_bank, snd_mid_bank_name, snd_mid_bank_acc, error
                         )
-                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                        VALUES (%s, %s, %s, %s, %s, %s::jsonb, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
                         RETURNING id
                     """
                     c.execute(insert_sql, (
-                        filename, state_value, content, current_date, msg_type,
-                        fields.get('snd_name'), fields.get('rcv_name'),
+                        filename, state_value, content, current_date, msg_type, parsed,
                         fields.get('amount'), fields.get('currency_code'), fields.get('dval'),
-                        fields.get('code'), fields.get('message'),
-                        fields.get('snd_acc'), fields.get('rcv_acc'),
-                        fields.get('snd_bank'), fields.get('snd_bank_name'),
+                        fields.get('code'), fields.get('msg_id'), fields.get('instr_id'), fields.get('uetr'),
                         fields.get('snd_mid_bank'), fields.get('snd_mid_bank_name'), fields.get('snd_mid_bank_acc'),
-                        fields.get('rcv_bank'), fields.get('rcv_bank_name'),
                         fields.get('error')
                     ))
                     
                     # Get swift_input_id
                     result = c.fetchone()
-                    logger.debug(f'  Insert result type: {type(result)}, value: {result}')
+                    logger.debug('  Insert result type: %s, value: %s', type(result), result)
                     
                     if isinstance(result, dict):
                         swift_input_id = result.get('id')
@@ -1692,10 +3374,13 @@ def read_and_import_files():
                     else:
                         swift_input_id = result
                     
-                    logger.debug(f'  Got swift_input_id: {swift_input_id}')
+                    logger.debug('  Got swift_input_id: %s', swift_input_id)
+
+                    insert_attributes(c, msg_type, [(swift_input_id, fields)])
+                    run_stats.lap('insert')
                     
                     # Create process with start state
-                    logger.info(f'  Creating process for doc_id={swift_input_id}')
+                    logger.debug('  Creating process for doc_id=%s', swift_input_id)
                     c.execute("""
                         INSERT INTO process (doc_id, state_id)
                         SELECT %s, ps.id 
@@ -1704,49 +3389,43 @@ def read_and_import_files():
                         WHERE pt.code = %s AND ps.start = true
                         LIMIT 1
                     """, (swift_input_id, msg_type))
-                    logger.info(f'  ✓ Process created successfully')
+                    logger.debug('  ✓ Process created successfully')
+                    run_stats.lap('process')
                     
                     imported_count += 1
-                    logger.info(f'  ✓ Successfully imported {msg_type} file: {filename} with state LOADED')
+                    run_stats.describe(outcome='imported')
+                    logger.debug('  ✓ Successfully imported %s file: %s with state LOADED', msg_type, filename)
 
                 elif msg_type == 'pacs.009':
-                    logger.info(f'  Extracting pacs.009 fields...')
-                    fields = process_pacs009(content)
+                    logger.debug('  Extracting pacs.009 fields...')
+                    fields = process_pacs009(content, root=root)
                     state_value = 'LOADED'
                     
                     # Check for parsing errors
                     if fields.get('error'):
-                        logger.error(f'  ✗ Parsing errors: {fields["error"]}')
+                        logger.error('  ✗ Parsing errors: %s', fields['error'])
+                    run_stats.lap('extract')
 
-                    # Insert into swift_input with underlying fields
+                    # Insert into swift_input (agents and underlying go to swift_input_pacs009)
                     insert_sql = """
                         INSERT INTO swift_input (
-                            file_name, state, content, imported, msg_type,
-                            snd_name, rcv_name, amount, currency_code, dval,
-                            code, message, snd_bank, rcv_bank,
-                            instd_agt, instd_agt_name,
-                            underlying_dbtr_name, underlying_dbtr_acc, underlying_dbtr_agt,
-                            underlying_cdtr_name, underlying_cdtr_acc, underlying_cdtr_agt,
-                            error
+                            file_name, state, content, imported, msg_type, parsed,
+                            amount, currency_code, dval,
+                            code, msg_id, instr_id, uetr, error
                         )
-                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                        VALUES (%s, %s, %s, %s, %s, %s::jsonb, %s, %s, %s, %s, %s, %s, %s, %s)
                         RETURNING id
                     """
                     c.execute(insert_sql, (
-                        filename, state_value, content, current_date, msg_type,
-                        fields.get('snd_name'), fields.get('rcv_name'),
+                        filename, state_value, content, current_date, msg_type, parsed,
                         fields.get('amount'), fields.get('currency_code'), fields.get('dval'),
-                        fields.get('code'), fields.get('message'),
-                        fields.get('snd_bank'), fields.get('rcv_bank'),
-                        fields.get('instd_agt'), fields.get('instd_agt_name'),
-                        fields.get('underlying_dbtr_name'), fields.get('underlying_dbtr_acc'), fields.get('underlying_dbtr_agt'),
-                        fields.get('underlying_cdtr_name'), fields.get('underlying_cdtr_acc'), fields.get('underlying_cdtr_agt'),
+                        fields.get('code'), fields.get('msg_id'), fields.get('instr_id'), fields.get('uetr'),
                         fields.get('error')
                     ))
                     
                     # Get swift_input_id
                     result = c.fetchone()
-                    logger.debug(f'  Insert result type: {type(result)}, value: {result}')
+                    logger.debug('  Insert result type: %s, value: %s', type(result), result)
                     
                     if isinstance(result, dict):
                         swift_input_id = result.get('id')
@@ -1755,10 +3434,13 @@ def read_and_import_files():
                     else:
                         swift_input_id = result
                     
-                    logger.debug(f'  Got swift_input_id: {swift_input_id}')
+                    logger.debug('  Got swift_input_id: %s', swift_input_id)
+
+                    insert_attributes(c, msg_type, [(swift_input_id, fields)])
+                    run_stats.lap('insert')
                     
                     # Create process with start state
-                    logger.info(f'  Creating process for doc_id={swift_input_id}')
+                    logger.debug('  Creating process for doc_id=%s', swift_input_id)
                     c.execute("""
                         INSERT INTO process (doc_id, state_id)
                         SELECT %s, ps.id 
@@ -1767,14 +3449,17 @@ def read_and_import_files():
                         WHERE pt.code = %s AND ps.start = true
                         LIMIT 1
                     """, (swift_input_id, msg_type))
-                    logger.info(f'  ✓ Process created successfully')
+                    logger.debug('  ✓ Process created successfully')
+                    run_stats.lap('process')
                     
                     imported_count += 1
-                    logger.info(f'  ✓ Successfully imported {msg_type} file: {filename} with state LOADED')
+                    run_stats.describe(outcome='imported')
+                    logger.debug('  ✓ Successfully imported %s file: %s with state LOADED', msg_type, filename)
 
                 elif msg_type == 'camt.053':
                     # Extract basic info
-                    root = ET.fromstring(content)
+                    if root is None:
+                        root = ET.fromstring(content)
 
                     # Extract MsgId and StmtId
                     msg_id_el = _find_first_by_localname(root, 'MsgId')
@@ -1810,23 +3495,23 @@ def read_and_import_files():
                             ccy_el = _find_first_by_localname(acct_el, 'Ccy')
                             acct_ccy = (ccy_el.text or '').strip() if ccy_el is not None else None
 
+                    run_stats.lap('extract')
+
                     # Insert into swift_input
                     insert_sql = """
                         INSERT INTO swift_input (
-                            file_name, state, content, imported, msg_type,
-                            msg_id, stmt_id, elctrnc_seq_nb, acct_id, acct_ccy
+                            file_name, state, content, imported, msg_type, parsed, msg_id
                         )
-                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                        VALUES (%s, %s, %s, %s, %s, %s::jsonb, %s)
                         RETURNING id
                     """
                     c.execute(insert_sql, (
-                        filename, 'LOADED', content, current_date, msg_type,
-                        msg_id, stmt_id, elctrnc_seq_nb, acct_id, acct_ccy
+                        filename, 'LOADED', content, current_date, msg_type, parsed, msg_id
                     ))
 
                     # Get swift_input_id
                     result = c.fetchone()
-                    logger.debug(f'  Insert result type: {type(result)}, value: {result}')
+                    logger.debug('  Insert result type: %s, value: %s', type(result), result)
                     
                     if isinstance(result, dict):
                         swift_input_id = result.get('id')
@@ -1835,12 +3520,17 @@ def read_and_import_files():
                     else:
                         swift_input_id = result
                     
-                    logger.debug(f'  Got swift_input_id: {swift_input_id}')
+                    logger.debug('  Got swift_input_id: %s', swift_input_id)
 
-                    logger.debug(f'  Inserted swift_input record: id={swift_input_id}')
+                    insert_attributes(c, msg_type, [(swift_input_id, {
+                        'stmt_id': stmt_id, 'elctrnc_seq_nb': elctrnc_seq_nb, 'acct_id': acct_id, 'acct_ccy': acct_ccy,
+                    })])
+                    run_stats.lap('insert')
+
+                    logger.debug('  Inserted swift_input record: id=%s', swift_input_id)
 
                     # Create process with start state
-                    logger.info(f'  Creating process for doc_id={swift_input_id}')
+                    logger.debug('  Creating process for doc_id=%s', swift_input_id)
                     c.execute("""
                         INSERT INTO process (doc_id, state_id)
                         SELECT %s, ps.id 
@@ -1849,17 +3539,27 @@ def read_and_import_files():
                         WHERE pt.code = %s AND ps.start = true
                         LIMIT 1
                     """, (swift_input_id, msg_type))
-                    logger.info(f'  ✓ Process created successfully')
+                    logger.debug('  ✓ Process created successfully')
+                    run_stats.lap('process')
 
                     # Process camt.053 details
-                    counts = process_camt053(content, swift_input_id, c)
+                    counts = process_camt053(content, swift_input_id, c, root=root)
+                    run_stats.lap('extract')
+
+                    # Statement lines as TRN processes
+                    if TRN_PROCESSES and counts.get('entries'):
+                        created = create_entry_processes(c, swift_input_id)
+                        logger.debug('  ✓ Created %s TRN process(es) for statement entries', created)
+                        run_stats.lap('process')
 
                     imported_count += 1
-                    logger.debug(f'  Successfully imported camt.053 file: {filename}')
+                    run_stats.describe(outcome='imported', items=counts['entries'])
+                    logger.debug('  Successfully imported camt.053 file: %s', filename)
 
                 elif msg_type == 'camt.054':
                     # Extract basic info
-                    root = ET.fromstring(content)
+                    if root is None:
+                        root = ET.fromstring(content)
 
                     # Extract MsgId and NtfctnId
                     msg_id_el = _find_first_by_localname(root, 'MsgId')
@@ -1887,23 +3587,23 @@ def read_and_import_files():
                             ccy_el = _find_first_by_localname(acct_el, 'Ccy')
                             acct_ccy = (ccy_el.text or '').strip() if ccy_el is not None else None
 
+                    run_stats.lap('extract')
+
                     # Insert into swift_input
                     insert_sql = """
                         INSERT INTO swift_input (
-                            file_name, state, content, imported, msg_type,
-                            msg_id, ntfctn_id, acct_id, acct_ccy
+                            file_name, state, content, imported, msg_type, parsed, msg_id
                         )
-                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+                        VALUES (%s, %s, %s, %s, %s, %s::jsonb, %s)
                         RETURNING id
                     """
                     c.execute(insert_sql, (
-                        filename, 'LOADED', content, current_date, msg_type,
-                        msg_id, ntfctn_id, acct_id, acct_ccy
+                        filename, 'LOADED', content, current_date, msg_type, parsed, msg_id
                     ))
 
                     # Get swift_input_id
                     result = c.fetchone()
-                    logger.debug(f'  Insert result type: {type(result)}, value: {result}')
+                    logger.debug('  Insert result type: %s, value: %s', type(result), result)
                     
                     if isinstance(result, dict):
                         swift_input_id = result.get('id')
@@ -1912,12 +3612,15 @@ def read_and_import_files():
                     else:
                         swift_input_id = result
                     
-                    logger.debug(f'  Got swift_input_id: {swift_input_id}')
+                    logger.debug('  Got swift_input_id: %s', swift_input_id)
+
+                    insert_attributes(c, msg_type, [(swift_input_id, {'ntfctn_id': ntfctn_id, 'acct_id': acct_id, 'acct_ccy': acct_ccy})])
+                    run_stats.lap('insert')
 
-                    logger.debug(f'  Inserted swift_input record: id={swift_input_id}')
+                    logger.debug('  Inserted swift_input record: id=%s', swift_input_id)
 
                     # Create process with start state
-                    logger.info(f'  Creating process for doc_id={swift_input_id}')
+                    logger.debug('  Creating process for doc_id=%s', swift_input_id)
                     c.execute("""
                         INSERT INTO process (doc_id, state_id)
                         SELECT %s, ps.id 
@@ -1926,50 +3629,45 @@ def read_and_import_files():
                         WHERE pt.code = %s AND ps.start = true
                         LIMIT 1
                     """, (swift_input_id, msg_type))
-                    logger.info(f'  ✓ Process created successfully')
+                    logger.debug('  ✓ Process created successfully')
+                    run_stats.lap('process')
 
                     # Process camt.054 notification details
-                    counts = process_camt054(content, swift_input_id, c)
+                    counts = process_camt054(content, swift_input_id, c, root=root)
+                    run_stats.lap('extract')
 
                     imported_count += 1
-                    logger.debug(f'  Successfully imported camt.054 file: {filename}')
+                    run_stats.describe(outcome='imported', items=counts['entries'])
+                    logger.debug('  Successfully imported camt.054 file: %s', filename)
 
                 elif msg_type == 'camt.056':
                     # Extract cancellation request fields
-                    logger.info(f'  Extracting camt.056 fields...')
-                    fields = process_camt056(content)
+                    logger.debug('  Extracting camt.056 fields...')
+                    fields = process_camt056(content, root=root)
                     state_value = 'LOADED'
                     
                     # Check for parsing errors
                     if fields.get('error'):
-                        logger.error(f'  ✗ Parsing errors: {fields["error"]}')
+                        logger.error('  ✗ Parsing errors: %s', fields['error'])
+                    run_stats.lap('extract')
 
-                    # Insert into swift_input with cancellation fields
+                    # Insert into swift_input (cancellation fields go to swift_input_camt056)
                     insert_sql = """
                         INSERT INTO swift_input (
-                            file_name, state, content, imported, msg_type,
-                            case_id, case_assgnr,
-                            orgnl_msg_id, orgnl_msg_nm_id,
-                            orgnl_instr_id, orgnl_end_to_end_id, orgnl_tx_id, orgnl_uetr,
-                            cxl_rsn_cd, cxl_rsn_addtl_inf,
-                            error
+                            file_name, state, content, imported, msg_type, parsed,
+                            orgnl_msg_id, error
                         )
-                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                        VALUES (%s, %s, %s, %s, %s, %s::jsonb, %s, %s)
                         RETURNING id
                     """
                     c.execute(insert_sql, (
-                        filename, state_value, content, current_date, msg_type,
-                        fields.get('case_id'), fields.get('case_assgnr'),
-                        fields.get('orgnl_msg_id'), fields.get('orgnl_msg_nm_id'),
-                        fields.get('orgnl_instr_id'), fields.get('orgnl_end_to_end_id'),
-                        fields.get('orgnl_tx_id'), fields.get('orgnl_uetr'),
-                        fields.get('cxl_rsn_cd'), fields.get('cxl_rsn_addtl_inf'),
-                        fields.get('error')
+                        filename, state_value, content, current_date, msg_type, parsed,
+                        fields.get('orgnl_msg_id'), fields.get('error')
                     ))
                     
                     # Get swift_input_id
                     result = c.fetchone()
-                    logger.debug(f'  Insert result type: {type(result)}, value: {result}')
+                    logger.debug('  Insert result type: %s, value: %s', type(result), result)
                     
                     if isinstance(result, dict):
                         swift_input_id = result.get('id')
@@ -1978,10 +3676,13 @@ def read_and_import_files():
                     else:
                         swift_input_id = result
                     
-                    logger.debug(f'  Got swift_input_id: {swift_input_id}')
+                    logger.debug('  Got swift_input_id: %s', swift_input_id)
+
+                    insert_attributes(c, msg_type, [(swift_input_id, fields)])
+                    run_stats.lap('insert')
                     
                     # Create process with start state
-                    logger.info(f'  Creating process for doc_id={swift_input_id}')
+                    logger.debug('  Creating process for doc_id=%s', swift_input_id)
                     c.execute("""
                         INSERT INTO process (doc_id, state_id)
                         SELECT %s, ps.id 
@@ -1990,129 +3691,362 @@ def read_and_import_files():
                         WHERE pt.code = %s AND ps.start = true
                         LIMIT 1
                     """, (swift_input_id, msg_type))
-                    logger.info(f'  ✓ Process created successfully')
+                    logger.debug('  ✓ Process created successfully')
+                    run_stats.lap('process')
+
+                    # Link to the original payment
+                    match_cancellation(c, swift_input_id, fields)
+                    run_stats.lap('process')
                     
                     imported_count += 1
-                    logger.info(f'  ✓ Successfully imported {msg_type} file: {filename} with state LOADED')
+                    run_stats.describe(outcome='imported')
+                    logger.debug('  ✓ Successfully imported %s file: %s with state LOADED', msg_type, filename)
 
-                # Delete file from folder_in/memory after successful processing
-                if WORK_FROM_MEMORY:
-                    MEMORY_FILES.pop(filename, None)
-                    logger.debug(f'  Removed file from memory: {filename}')
-                else:
-                    file_path = os.path.join(FOLDER_IN, filename)
-                    try:
-                        os.remove(file_path)
-                        logger.debug(f'  Deleted file from input folder: {filename}')
-                    except Exception as del_err:
-                        logger.error(f'  Error deleting file: {del_err}')
+                elif msg_type == 'pacs.002':
+                    # Extract payment status report
+                    logger.debug('  Extracting pacs.002 fields...')
+                    fields = process_pacs002(content, root=root)
+
+                    if fields.get('error'):
+                        logger.error('  ✗ Parsing errors: %s', fields['error'])
+                    run_stats.lap('extract')
+
+                    insert_sql = """
+                        INSERT INTO swift_input (
+                            file_name, state, content, imported, msg_type, parsed,
+                            msg_id, orgnl_msg_id, error
+                        )
+                        VALUES (%s, %s, %s, %s, %s, %s::jsonb, %s, %s, %s)
+                        RETURNING id
+                    """
+                    c.execute(insert_sql, (
+                        filename, 'LOADED', content, current_date, msg_type, parsed,
+                        fields.get('msg_id'), fields.get('orgnl_msg_id'), fields.get('error')
+                    ))
+
+                    # Get swift_input_id
+                    result = c.fetchone()
+                    if isinstance(result, dict):
+                        swift_input_id = result.get('id')
+                    elif isinstance(result, (list, tuple)):
+                        swift_input_id = result[0]
+                    else:
+                        swift_input_id = result
+
+                    logger.debug('  Got swift_input_id: %s', swift_input_id)
+                    run_stats.lap('insert')
+
+                    # Create process with start state
+                    create_processes(c, [swift_input_id], msg_type)
+                    run_stats.lap('process')
+
+                    # Statuses go to swift_pmt_sts now and to outgoing payments after the loop
+                    statuses = fields.get('statuses') or []
+                    store_payment_statuses(c, swift_input_id, statuses)
+                    file_statuses.extend((swift_input_id, status) for status in statuses)
+                    run_stats.lap('insert')
+
+                    imported_count += 1
+                    run_stats.describe(outcome='imported', items=len(statuses))
+                    logger.debug('  ✓ Successfully imported %s file: %s with %s status(es)', msg_type, filename, len(statuses))
+
+                # Record schema errors on the imported row
+                if validation_error:
+                    c.execute(
+                        'UPDATE swift_input SET validation_error = %s WHERE id = %s',
+                        (validation_error, swift_input_id)
+                    )
+                    run_stats.lap('insert')
+
+                if swift_input_id:
+                    file_ids.append(swift_input_id)
+
+                c.execute('RELEASE SAVEPOINT import_file')
+                imported_ids.extend(file_ids)
+                pending_statuses.extend(file_statuses)
+                # Deleted from folder_in/memory once committed
+                finished.append((filename, 'imported', None))
 
             except UnicodeDecodeError as e:
                 error_msg = 'UTF-8 decode failed'
-                logger.error(f'  ✗ ERROR in {filename}: {error_msg}')
+                logger.error('  ✗ ERROR in %s: %s', filename, error_msg)
+                if savepoint:
+                    c.execute('ROLLBACK TO SAVEPOINT import_file')
+                imported_count = imported_before
                 error_count += 1
-
-                if WORK_FROM_MEMORY:
-                    # Just remove from memory
-                    MEMORY_FILES.pop(filename, None)
-                    logger.debug(f'  Removed errored file from memory: {filename}')
-                else:
-                    # Move file with error to folder_out
-                    file_path = os.path.join(FOLDER_IN, filename)
-                    try:
-                        dest_file_path = os.path.join(FOLDER_OUT, filename)
-                        shutil.move(file_path, dest_file_path)
-
-                        error_file_path = os.path.join(FOLDER_OUT, f'{filename}.error.txt')
-                        with open(error_file_path, 'w', encoding='utf-8') as err_f:
-                            err_f.write(f'Error processing file: {filename}\\n')
-                            err_f.write(f'Timestamp: {datetime.now()}\\n')
-                            err_f.write(f'\\nError: {error_msg}\\n')
-                    except:
-                        pass
+                run_stats.describe(outcome='error')
+                # Moved to folder_out with the error once the transaction is committed
+                finished.append((filename, 'error', error_msg))
                 continue
 
             except Exception as e:
-                logger.error(f'  ✗ ERROR in {filename}: {str(e)}')
-                logger.error(f'    Type: {type(e).__name__}')
-                logger.error(f'    Traceback: {traceback.format_exc()}')
+                logger.error('  ✗ ERROR in %s: %s: %s', filename, type(e).__name__, e, exc_info=True)
+                if savepoint:
+                    c.execute('ROLLBACK TO SAVEPOINT import_file')
+                imported_count = imported_before
                 error_count += 1
-
-                if WORK_FROM_MEMORY:
-                    # Just remove from memory
-                    MEMORY_FILES.pop(filename, None)
-                    logger.debug(f'  Removed errored file from memory: {filename}')
-                else:
-                    # Move file with error to folder_out
-                    file_path = os.path.join(FOLDER_IN, filename)
-                    try:
-                        dest_file_path = os.path.join(FOLDER_OUT, filename)
-                        shutil.move(file_path, dest_file_path)
-
-                        error_file_path = os.path.join(FOLDER_OUT, f'{filename}.error.txt')
-                        tb = traceback.format_exc()
-                        with open(error_file_path, 'w', encoding='utf-8') as err_f:
-                            err_f.write(f'Error processing file: {filename}\\n')
-                            err_f.write(f'Timestamp: {datetime.now()}\\n')
-                            err_f.write(f'\\nError: {str(e)}\\n\\nTraceback:\\n{tb}')
-                    except:
-                        pass
+                run_stats.describe(outcome='error')
+                finished.append((filename, 'error', f'{e}\n\nTraceback:\n{traceback.format_exc()}'))
                 continue
 
-        # Commit transaction
-        if imported_count > 0:
-            c.connection.commit()
-            logger.debug(f'Transaction committed: {imported_count} files')
+            # Files of the first priority class (camt.056 by default) are
+            # committed right away instead of at the end of the run
+            if rank == 0:
+                commit()
+            elif imported_count > imported_before:
+                uncommitted_rank = rank if uncommitted_rank is None else min(uncommitted_rank, rank)
+
+        run_stats.end_file()
+
+        # camt.056 imported before their originals (this run or earlier ones)
+        if imported_ids:
+            c.execute('SAVEPOINT cancellation')
+            try:
+                rematch_cancellations(c, imported_ids)
+                c.execute('RELEASE SAVEPOINT cancellation')
+            except Exception as e:
+                c.execute('ROLLBACK TO SAVEPOINT cancellation')
+                logger.error('Cancellation matching failed: %s', e, exc_info=True)
+            run_stats.lap('reconcile')
+
+        # Reconcile new payments and statement entries; a failure must not lose the import
+        if imported_ids:
+            c.execute('SAVEPOINT reconcile')
+            try:
+                reconcile_imported(c, imported_ids)
+                c.execute('RELEASE SAVEPOINT reconcile')
+            except Exception as e:
+                c.execute('ROLLBACK TO SAVEPOINT reconcile')
+                logger.error('Reconciliation failed: %s', e, exc_info=True)
+            run_stats.lap('reconcile')
+
+        # Update outgoing payments with all pacs.002 statuses of the run at once
+        if pending_statuses:
+            c.execute('SAVEPOINT payment_status')
+            try:
+                status_counts = apply_payment_statuses(c, pending_statuses)
+                c.execute('RELEASE SAVEPOINT payment_status')
+                logger.info(
+                    'Payment statuses: %s, updated: %s, unmatched: %s',
+                    status_counts['statuses'], status_counts['updated'], status_counts['unmatched']
+                )
+            except Exception as e:
+                c.execute('ROLLBACK TO SAVEPOINT payment_status')
+                logger.error('Payment status update failed: %s', e, exc_info=True)
+            run_stats.lap('payment_status')
+
+        # Commit transaction; a run stopped on its budget commits what it took
+        if imported_count > 0 or finished:
+            commit()
+            logger.debug('Transaction committed: %s files', imported_count)
 
     logger.critical('💀'*30)
-    logger.critical(f'💀💀💀 CRITICAL: IMPORT SUMMARY 2025-10-26 💀💀💀')
-    logger.critical(f'🔴 IMPORTED: {imported_count} files')
-    logger.critical(f'⚠️  SKIPPED: {skipped_count} files')
-    logger.critical(f'💀 ERRORS: {error_count} FILES WITH CRITICAL PROBLEMS!!!')
+    logger.critical('💀💀💀 CRITICAL: IMPORT SUMMARY 2025-10-26 💀💀💀')
+    logger.critical('🔴 IMPORTED: %s files', imported_count)
+    logger.critical('⚠️  SKIPPED: %s files', skipped_count)
+    logger.critical('💀 ERRORS: %s FILES WITH CRITICAL PROBLEMS!!!', error_count)
     logger.critical('💀'*30)
 
+    # Stage timings of the run -> swift_import_run
+    run_summary = run_stats.summary()
+    run_id = save_import_run(run_summary, imported_count, skipped_count, error_count, LAST_IMPORT_CHECKPOINT)
+    LAST_IMPORT_RUN_ID = run_id
+    logger.info(
+        'Import run %s: %s file(s), %s bytes, %.0f ms, SQL %s statement(s) %.0f ms',
+        run_id, run_summary['files'], run_summary['bytes'], run_summary['duration_ms'],
+        run_summary['sql_statements'], run_summary['sql_ms']
+    )
+    for stage, values in run_summary['stages'].items():
+        logger.info(
+            '  %-15s total %10.1f ms  p50 %8.2f  p95 %8.2f  max %8.2f',
+            stage, values['total_ms'], values['p50_ms'], values['p95_ms'], values['max_ms']
+        )
+    for msg_type, values in run_summary['latency'].items():
+        logger.info(
+            '  latency %-9s %5s file(s)  p50 %10.1f ms  p95 %10.1f ms  max %10.1f ms',
+            msg_type, values['count'], values['p50_ms'], values['p95_ms'], values['max_ms']
+        )
+
+    return imported_count
+
+def parse_profile_modes(value):
+    """{'cpu', 'memory'} from swift_settings.profile / SWIFT_PROFILE ('cpu', 'memory', 'cpu,memory', 'all')."""
+    modes = {m.strip().lower() for m in re.split(r'[,;\s]+', value or '') if m.strip()}
+    if 'all' in modes:
+        modes = {'cpu', 'memory'}
+    unknown = modes - {'cpu', 'memory'}
+    if unknown:
+        logger.warning('Unknown profile mode(s) ignored: %s', ', '.join(sorted(unknown)))
+    return modes & {'cpu', 'memory'}
+
+def run_profiled(fn, modes):
+    """Run fn under cProfile and/or tracemalloc, then save_profile() for the recorded run."""
+    # Imported here: nothing of this is loaded when profiling is off
+    import cProfile
+    import tracemalloc
+
+    profiler = None
+    if 'memory' in modes:
+        tracemalloc.start(PROFILE_FRAMES)
+    if 'cpu' in modes:
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        return fn()
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        snapshot = None
+        peak = None
+        if 'memory' in modes:
+            snapshot = tracemalloc.take_snapshot()
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        try:
+            save_profile(LAST_IMPORT_RUN_ID, profiler, snapshot, peak)
+        except Exception as e:
+            logger.error('Profile not saved: %s', e, exc_info=True)
+
+def save_profile(run_id, profiler, snapshot, peak):
+    """Write stats files to PROFILE_FOLDER, log the top PROFILE_TOP entries and store them in swift_import_run.profile.
+
+    import-run-<id>.prof opens with pstats/snakeviz, import-run-<id>.tracemalloc
+    with tracemalloc.Snapshot.load().
+    """
+    import pstats
+    import tracemalloc
+
+    os.makedirs(PROFILE_FOLDER, exist_ok=True)
+    base = os.path.join(PROFILE_FOLDER, f'import-run-{run_id or datetime.now().strftime("%Y%m%d-%H%M%S")}')
+    profile = {'files': []}
+
+    if profiler is not None:
+        profiler.dump_stats(base + '.prof')
+        profile['files'].append(base + '.prof')
+        stats = pstats.Stats(profiler)
+        top = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)[:PROFILE_TOP]
+        profile['cpu_ms'] = round(stats.total_tt * 1000, 1)
+        profile['functions'] = [
+            {
+                'function': f'{os.path.basename(filename)}:{lineno}({name})',
+                'calls': calls, 'self_ms': round(self_time * 1000, 3), 'cum_ms': round(cum_time * 1000, 3),
+            }
+            for (filename, lineno, name), (_, calls, self_time, cum_time, _) in top
+        ]
+        logger.info('Profile: CPU %.0f ms, top %s function(s) by own time:', profile['cpu_ms'], len(top))
+        for f in profile['functions']:
+            logger.info('  %10.1f ms self %10.1f ms cum %9s calls  %s', f['self_ms'], f['cum_ms'], f['calls'], f['function'])
+
+    if snapshot is not None:
+        snapshot = snapshot.filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        ))
+        snapshot.dump(base + '.tracemalloc')
+        profile['files'].append(base + '.tracemalloc')
+        top = snapshot.statistics('lineno')[:PROFILE_TOP]
+        profile['peak_kib'] = round(peak / 1024, 1)
+        profile['allocations'] = [
+            {
+                'site': f'{os.path.basename(stat.traceback[0].filename)}:{stat.traceback[0].lineno}',
+                'kib': round(stat.size / 1024, 1), 'blocks': stat.count,
+            }
+            for stat in top
+        ]
+        logger.info('Profile: peak traced memory %.0f KiB, top %s allocation site(s) still held:', profile['peak_kib'], len(top))
+        for a in profile['allocations']:
+            logger.info('  %10.1f KiB %9s blocks  %s', a['kib'], a['blocks'], a['site'])
+
+    logger.info('Profile files: %s', ', '.join(profile['files']))
+    if run_id:
+        with initDbSession(database='default').cursor() as c:
+            c.execute(
+                'UPDATE swift_import_run SET profile = %s::jsonb WHERE id = %s',
+                (json.dumps(profile), run_id)
+            )
+            c.connection.commit()
+    return profile
+
+def run_once(maintenance=True):
+    """Import the waiting files, then storage maintenance; settings must be loaded.
+
+    Runs hold the importer advisory lock: a run that finds it taken (the
+    previous one is still working) does nothing.
+
+    Returns:
+        number of imported files
+    """
+    global LAST_IMPORT_CHECKPOINT
+
+    lock = acquire_import_lock()
+    if lock is None:
+        logger.warning('Another import run holds the lock, skipping this run')
+        LAST_IMPORT_CHECKPOINT = None
+        return 0
+
+    try:
+        # Read and import files
+        logger.info('Step 1: Reading and importing files...')
+        profile_modes = parse_profile_modes(PROFILE)
+        if profile_modes:
+            imported_count = run_profiled(read_and_import_files, profile_modes)
+        else:
+            imported_count = read_and_import_files()
+
+        # Partitions and retention; a failure here must not fail the import
+        if maintenance:
+            logger.info('Step 2: Storage maintenance...')
+            try:
+                maintain_storage()
+            except Exception as e:
+                logger.error('Storage maintenance failed: %s', e, exc_info=True)
+    finally:
+        release_import_lock(lock)
+
     return imported_count
 
 def main():
     """Main execution function"""
     global FOLDER_IN
 
+    # Handler I/O moves to a background thread for the whole run
+    log_listener = start_log_queue()
+
+    # IMMEDIATE TEST - CRITICAL is the highest level!
+    logger.critical('💀💀💀 CRITICAL: JOB STARTED - THIS MUST APPEAR!!! 💀💀💀')
+    logger.critical('🚨🚨🚨 CRITICAL LEVEL - HIGHEST PRIORITY 🚨🚨🚨')
+    logger.critical('🔴🔴🔴 DATE: 2025-10-26 TIME: NOW!!! 🔴🔴🔴')
+    logger.critical('⚡⚡⚡ IF YOU DON\'T SEE THIS - NOTHING WORKS ⚡⚡⚡')
+
     try:
         # Load settings
         load_settings_from_db()
 
         logger.info('='*80)
         logger.info('main: Starting SWIFT import process')
-        logger.info(f'Input folder: {FOLDER_IN}')
+        logger.info('Input folder: %s', FOLDER_IN)
         logger.info('='*80)
 
-        # Create test files
-        logger.info('Step 1: Creating test files...')
-        create_test_file()
-
-        # Read and import files
-        logger.info('Step 2: Reading and importing files...')
-        imported_count = read_and_import_files()
+        imported_count = run_once()
 
         logger.info('='*80)
         logger.info('Process completed successfully!')
-        logger.info(f'Total files imported: {imported_count}')
+        logger.info('Total files imported: %s', imported_count)
         logger.info('='*80)
 
     except UserException as e:
-        logger.error(f'User error: {e}')
+        logger.error('User error: %s', e)
         raise
     except Exception as e:
-        logger.error(f'Unexpected error: {e}')
+        logger.error('Unexpected error: %s', e)
         raise UserException({
             'message': 'Unexpected error in main process',
             'description': str(e)
         }).withError(e)
+    finally:
+        stop_log_queue(log_listener)
 
-main()
-
-
-
-
-
-
+# The cron scheduler executes this file and gets a run; swift_import.load_importer
+# sets AS_LIBRARY before executing it, so importing only defines the functions
+if not globals().get('AS_LIBRARY'):
+    main()
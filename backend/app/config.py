@@ -7,6 +7,11 @@ class Settings(BaseSettings):
         "DATABASE_URL",
         f"postgresql+asyncpg://{os.getenv('USER')}@localhost:5432/swift_processing"
     )
+    # Full SQL echo is for local debugging only; use the slow-query log in production
+    DB_ECHO: bool = False
+    # Log statements slower than this many milliseconds (0 disables the slow-query log)
+    SLOW_QUERY_THRESHOLD_MS: float = 0
+    METRICS_ENABLED: bool = True
     
     class Config:
         env_file = ".env"
@@ -19,4 +24,3 @@ class Settings(BaseSettings):
 
 
 settings = Settings()
-
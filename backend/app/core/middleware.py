@@ -0,0 +1,62 @@
+import time
+
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import (
+    HTTP_REQUESTS,
+    HTTP_REQUEST_DURATION,
+    HTTP_REQUEST_DB_QUERIES,
+    HTTP_REQUEST_DB_DURATION,
+    RequestStats,
+    current_request_stats,
+)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, status and SQL usage per route template."""
+
+    def __init__(self, app: ASGIApp, skip_paths=("/metrics",)):
+        self.app = app
+        self.skip_paths = set(skip_paths)
+
+    def _route_template(self, scope: Scope) -> str:
+        router = getattr(scope.get("app"), "router", None)
+        partial = None
+        for route in getattr(router, "routes", []):
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return getattr(route, "path", scope["path"])
+            if match == Match.PARTIAL and partial is None:
+                # Path matched, method did not (405): label it by the route
+                partial = getattr(route, "path", None)
+        # Unmatched paths are collapsed so random URLs cannot blow up label cardinality
+        return partial or "<unmatched>"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.skip_paths:
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        stats = RequestStats()
+        token = current_request_stats.set(stats)
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            current_request_stats.reset(token)
+            method = scope["method"]
+            route = self._route_template(scope)
+            HTTP_REQUESTS.inc(method=method, route=route, status=str(status_code))
+            HTTP_REQUEST_DURATION.observe(elapsed, method=method, route=route)
+            HTTP_REQUEST_DB_QUERIES.observe(stats.queries, method=method, route=route)
+            HTTP_REQUEST_DB_DURATION.observe(stats.query_time, method=method, route=route)
@@ -1,13 +1,56 @@
+import logging
+import time
+
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import declarative_base
 from app.config import settings
+from app.core.metrics import (
+    DB_QUERIES,
+    DB_QUERY_DURATION,
+    DB_SLOW_QUERIES,
+    current_request_stats,
+    register_pool_gauges,
+)
+
+slow_query_logger = logging.getLogger("app.sql.slow")
 
-engine = create_async_engine(settings.DATABASE_URL, echo=True)
+engine = create_async_engine(settings.DATABASE_URL, echo=settings.DB_ECHO)
 async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 Base = declarative_base()
 
 
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+@event.listens_for(engine.sync_engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start_times = conn.info.get("query_start_time")
+    if not start_times:
+        return
+    elapsed = time.perf_counter() - start_times.pop()
+
+    DB_QUERIES.inc()
+    DB_QUERY_DURATION.observe(elapsed)
+
+    stats = current_request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.query_time += elapsed
+
+    threshold_ms = settings.SLOW_QUERY_THRESHOLD_MS
+    if threshold_ms and elapsed * 1000 >= threshold_ms:
+        DB_SLOW_QUERIES.inc()
+        slow_query_logger.warning(
+            "Slow query (%.1f ms): %s | params: %r", elapsed * 1000, statement, parameters
+        )
+
+
+register_pool_gauges(engine.sync_engine.pool)
+
+
 async def get_db():
     async with async_session() as session:
         yield session
-
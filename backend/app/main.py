@@ -1,8 +1,12 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 import os
 
 from app.api.v1 import types, states, operations, save_all
+from app.config import settings
+from app.core.metrics import render_metrics
+from app.core.middleware import MetricsMiddleware
 
 app = FastAPI(title="Process Manager API", version="1.0.0")
 
@@ -26,6 +30,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(types.router, prefix="/api/v1", tags=["types"])
 app.include_router(states.router, prefix="/api/v1", tags=["states"])
@@ -37,3 +44,9 @@ app.include_router(save_all.router, prefix="/api/v1", tags=["save-all"])
 def health_check():
     return {"status": "ok"}
 
+
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    def metrics():
+        """Prometheus text exposition of request, SQL and pool metrics"""
+        return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
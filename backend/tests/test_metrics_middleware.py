@@ -0,0 +1,35 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.metrics import HTTP_REQUESTS
+from app.core.middleware import MetricsMiddleware
+
+
+def _app():
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/items/{item_id}")
+    def get_item(item_id: int):
+        return {"id": item_id}
+
+    return app
+
+
+def _count(method, route, status):
+    return HTTP_REQUESTS._values.get((method, route, status), 0)
+
+
+def test_requests_are_labelled_by_route_template():
+    client = TestClient(_app())
+    ok = _count("GET", "/items/{item_id}", "200")
+    not_allowed = _count("POST", "/items/{item_id}", "405")
+    unmatched = _count("GET", "<unmatched>", "404")
+
+    assert client.get("/items/1").status_code == 200
+    assert client.post("/items/1").status_code == 405
+    assert client.get("/nowhere").status_code == 404
+
+    assert _count("GET", "/items/{item_id}", "200") == ok + 1
+    assert _count("POST", "/items/{item_id}", "405") == not_allowed + 1
+    assert _count("GET", "<unmatched>", "404") == unmatched + 1
@@ -0,0 +1,9 @@
+"""Benchmarks and synthetic traffic for the JOB.py importer.
+
+    python -m bench.parsers                 # extractors over INCOME-DOCS + synthetic documents
+    python -m bench.parsers --compare bench/results/parsers-<old>.json
+    python -m bench.import_run              # read_and_import_files against the in-process DB stand-in
+    python -m bench.traffic --out-dir DIR   # seeded pacs.008/009, camt.053/054/056 files for folder_in
+
+Also available as python -m swift_import bench {parsers,import,traffic}.
+"""
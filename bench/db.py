@@ -0,0 +1,125 @@
+"""In-process stand-in for apng_core.db.initDbSession.
+
+Accepts the statements the importer sends, answers the few it reads back
+(RETURNING id, the start state lookup) and counts everything else. Round
+trip and commit latency can be simulated to see how the statement count of
+an import turns into wall time against a real server.
+"""
+import re
+import time
+import uuid
+from collections import Counter
+
+_STATEMENT_KIND = re.compile(
+    r'^\s*(INSERT\s+INTO|UPDATE|DELETE\s+FROM|SELECT|SAVEPOINT|RELEASE|ROLLBACK)\s*(\S*)',
+    re.IGNORECASE,
+)
+_RETURNING_ID = re.compile(r'RETURNING\s+id\s*$', re.IGNORECASE)
+
+
+class DbStats:
+    """Counters shared by all sessions of one benchmark run."""
+
+    def __init__(self):
+        self.statements = 0
+        self.rows_written = 0
+        self.by_kind = Counter()
+        self.commit_seconds = []
+
+    def snapshot(self):
+        return {
+            'statements': self.statements,
+            'rows_written': self.rows_written,
+            'commits': len(self.commit_seconds),
+            'by_kind': dict(self.by_kind.most_common()),
+        }
+
+
+def _kind(sql):
+    match = _STATEMENT_KIND.match(sql)
+    if not match:
+        return 'OTHER'
+    verb = ' '.join(match.group(1).upper().split())
+    if verb in ('SELECT', 'SAVEPOINT', 'RELEASE', 'ROLLBACK'):
+        return verb
+    return f'{verb} {match.group(2).split("(")[0]}'
+
+
+def _rows(sql, params):
+    """Rows written by an INSERT: unnest() array length or number of VALUES tuples."""
+    if 'unnest(' in sql and params:
+        values = params.values() if isinstance(params, dict) else params
+        lengths = [len(v) for v in values if isinstance(v, list)]
+        if lengths:
+            return max(lengths)
+    head, sep, tail = sql.partition('VALUES')
+    if sep:
+        return tail.count('), (') + 1
+    return 1
+
+
+class StandInCursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self.rowcount = 0
+        self.description = None
+        self._rows = []
+
+    def execute(self, sql, params=None):
+        stats = self.connection.stats
+        kind = _kind(sql)
+        stats.statements += 1
+        stats.by_kind[kind] += 1
+        if self.connection.rtt:
+            time.sleep(self.connection.rtt)
+
+        self._rows = []
+        self.rowcount = 0
+        if kind.startswith('INSERT'):
+            self.rowcount = _rows(sql, params)
+            stats.rows_written += self.rowcount
+            if _RETURNING_ID.search(sql.strip()):
+                self._rows = [{'id': str(uuid.uuid4())} for _ in range(self.rowcount)]
+        elif kind.startswith(('UPDATE', 'DELETE')):
+            stats.rows_written += 1
+        elif kind == 'SELECT' and 'ps.start = true' in sql:
+            self._rows = [{'id': str(uuid.uuid4())}]
+
+    def fetchone(self):
+        return self._rows.pop(0) if self._rows else None
+
+    def fetchall(self):
+        rows, self._rows = self._rows, []
+        return rows
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class StandInConnection:
+    def __init__(self, stats, rtt, commit_latency):
+        self.stats = stats
+        self.rtt = rtt
+        self.commit_latency = commit_latency
+
+    def cursor(self):
+        return StandInCursor(self)
+
+    def commit(self):
+        started = time.perf_counter()
+        if self.commit_latency:
+            time.sleep(self.commit_latency)
+        self.stats.commit_seconds.append(time.perf_counter() - started)
+
+    def rollback(self):
+        pass
+
+
+def session_factory(stats, rtt_ms=0.0, commit_ms=0.0):
+    """Replacement for initDbSession recording into stats."""
+    def initDbSession(**kwargs):
+        return StandInConnection(stats, rtt_ms / 1000, commit_ms / 1000)
+    return initDbSession
@@ -0,0 +1,130 @@
+"""End-to-end import benchmark: generated files through read_and_import_files.
+
+The real import loop runs in memory mode against the in-process database
+stand-in (bench.db), once per message type and once for the whole mix.
+Reported per run: files/s, rows/s, statements per file (total and by
+statement kind) and commit latency. --rtt-ms/--commit-ms add simulated
+network round trip and commit time so statement count shows up in wall time.
+
+    python -m bench.import_run
+    python -m bench.import_run --files 200 --mix pacs.008:6,camt.054:3,camt.053:1,camt.056:1 --rtt-ms 0.3 --commit-ms 2
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+
+from bench.db import DbStats, session_factory
+from bench.loader import load_job
+from bench.parsers import RESULTS_DIR, _git_commit
+from bench.traffic import DEFAULT_MIX, TrafficGenerator, parse_mix
+from swift_import import ImportContext, ImportSettings
+
+
+def generate_files(count, mix, entries, seed):
+    """count files drawn from mix {msg_type: weight} with entries per camt.053/camt.054."""
+    files = {}
+    TrafficGenerator(seed=seed).fill(files, count, mix=mix, entries=(entries, entries))
+    return files
+
+
+def run_import(job, files, rtt_ms, commit_ms):
+    """Import files through read_and_import_files; returns the run metrics."""
+    stats = DbStats()
+    ImportContext(
+        settings=ImportSettings(work_from_memory=True),
+        job=job,
+        db_session=session_factory(stats, rtt_ms, commit_ms),
+        memory_files=dict(files),
+    ).activate()
+    job.START_STATE_IDS.clear()
+
+    size = sum(len(content.encode('utf-8')) for content in files.values())
+    started = time.perf_counter()
+    imported = job.read_and_import_files()
+    elapsed = time.perf_counter() - started
+
+    snapshot = stats.snapshot()
+    commits = sorted(stats.commit_seconds)
+    return {
+        'files': len(files),
+        'imported': imported,
+        'bytes': size,
+        'seconds': round(elapsed, 6),
+        'files_per_s': round(len(files) / elapsed, 2),
+        'rows_per_s': round(snapshot['rows_written'] / elapsed, 1),
+        'mib_per_s': round(size / elapsed / 2**20, 3),
+        'statements': snapshot['statements'],
+        'statements_per_file': round(snapshot['statements'] / len(files), 2),
+        'rows_written': snapshot['rows_written'],
+        'commits': snapshot['commits'],
+        'commit_ms_mean': round(sum(commits) / len(commits) * 1000, 3) if commits else None,
+        'commit_ms_max': round(commits[-1] * 1000, 3) if commits else None,
+        'by_kind_per_file': {kind: round(n / len(files), 2) for kind, n in snapshot['by_kind'].items()},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--files', type=int, default=100, help='files per run (default: %(default)s)')
+    parser.add_argument('--mix', default=','.join(f'{t}:{w}' for t, w in DEFAULT_MIX.items()),
+                        help='type:weight list (default: %(default)s)')
+    parser.add_argument('--entries', type=int, default=20,
+                        help='entries per camt.053/camt.054 (default: %(default)s)')
+    parser.add_argument('--rtt-ms', type=float, default=0.0, help='simulated round trip per statement')
+    parser.add_argument('--commit-ms', type=float, default=0.0, help='simulated commit time')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--log-level', default='WARNING', help='level of the cron logger (default: %(default)s)')
+    parser.add_argument('--out', help='results file (default: bench/results/import-<timestamp>.json)')
+    args = parser.parse_args(argv)
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+
+    job = load_job()
+    cron = logging.getLogger('cron')
+    cron.setLevel(args.log_level.upper())
+    cron.handlers = [logging.NullHandler()]
+    cron.propagate = False
+
+    runs = [(msg_type, {msg_type: 1}) for msg_type in mix] + [('mix', mix)]
+    results = []
+    for name, run_mix in runs:
+        files = generate_files(args.files, run_mix, args.entries, args.seed)
+        result = {'run': name}
+        result.update(run_import(job, files, args.rtt_ms, args.commit_ms))
+        results.append(result)
+
+    out = args.out or os.path.join(RESULTS_DIR, f'import-{datetime.now():%Y%m%d-%H%M%S}.json')
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, 'w', encoding='utf-8') as f:
+        json.dump({
+            'meta': {
+                'benchmark': 'import',
+                'timestamp': datetime.now().isoformat(timespec='seconds'),
+                'git_commit': _git_commit(),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'args': {k: v for k, v in vars(args).items() if k != 'out'},
+            },
+            'results': results,
+        }, f, ensure_ascii=False, indent=1)
+
+    print(f'{"run":<10} {"files":>6} {"files/s":>9} {"rows/s":>10} {"stmts/file":>11} {"commits":>8} {"commit ms":>10}')
+    for r in results:
+        print(
+            f'{r["run"]:<10} {r["files"]:>6} {r["files_per_s"]:>9.1f} {r["rows_per_s"]:>10.1f} '
+            f'{r["statements_per_file"]:>11.2f} {r["commits"]:>8} {r["commit_ms_mean"] or 0:>10.3f}'
+        )
+        for kind, per_file in r['by_kind_per_file'].items():
+            print(f'{"":<12}{kind:<40} {per_file:>8.2f}/file')
+    print(f'\nResults: {out}', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
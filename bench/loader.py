@@ -0,0 +1,97 @@
+"""Load JOB.py and object method scripts without running them."""
+import json
+import logging
+import os
+import sys
+import types
+import uuid
+
+from swift_import.loader import JOB_PATH, load_importer
+
+
+class NullCursor:
+    """Cursor that accepts every statement and returns generated ids.
+
+    Lets the camt.053/camt.054 extractors and the batch import, which write
+    to the database, run without one; `statements` counts the round trips.
+    """
+
+    def __init__(self):
+        self.statements = 0
+        self.rowcount = 0
+        self.description = None
+
+    def execute(self, sql, params=None):
+        self.statements += 1
+
+    def fetchone(self):
+        return (str(uuid.uuid4()),)
+
+    def fetchall(self):
+        return [{'id': str(uuid.uuid4())}]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+def _install_platform_stand_ins():
+    """Register apng_core modules when running outside the platform."""
+    try:
+        import apng_core.db  # noqa: F401
+        import apng_core.exceptions  # noqa: F401
+        return
+    except ImportError:
+        pass
+
+    class UserException(Exception):
+        def withError(self, error):
+            self.__cause__ = error
+            return self
+
+    def initDbSession(**kwargs):
+        raise RuntimeError('No database outside the platform')
+
+    def fetchall(cursor):
+        return cursor.fetchall()
+
+    def fetchone(cursor):
+        return cursor.fetchone()
+
+    def getUser():
+        raise RuntimeError('No user outside the platform')
+
+    package = types.ModuleType('apng_core')
+    db = types.ModuleType('apng_core.db')
+    db.initDbSession = initDbSession
+    db.fetchall = fetchall
+    db.fetchone = fetchone
+    exceptions = types.ModuleType('apng_core.exceptions')
+    exceptions.UserException = UserException
+    auth = types.ModuleType('apng_core.auth')
+    auth.getUser = getUser
+    package.db = db
+    package.exceptions = exceptions
+    package.auth = auth
+    sys.modules.update({
+        'apng_core': package, 'apng_core.db': db, 'apng_core.exceptions': exceptions, 'apng_core.auth': auth,
+    })
+
+
+def load_object_script(path, method):
+    """Definitions of an object method script (swift.objects/*.json), without its main execution part."""
+    _install_platform_stand_ins()
+    with open(path, encoding='utf-8') as f:
+        script = json.load(f)['methods'][method]['script']['py']
+    namespace = {'__name__': f'{os.path.basename(path)}.{method}'}
+    exec(compile(script.split('\n# Main execution\n')[0], f'{path}:{method}', 'exec'), namespace)
+    return types.SimpleNamespace(**namespace)
+
+
+def load_job(path=JOB_PATH, log_level=logging.WARNING):
+    """JOB.py executed afresh as a library module (no main() run), with platform stand-ins if needed."""
+    _install_platform_stand_ins()
+    logging.getLogger('cron').setLevel(log_level)
+    return load_importer(path, fresh=True)
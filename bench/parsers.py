@@ -0,0 +1,291 @@
+"""Extractor benchmark: INCOME-DOCS corpus and synthetic documents of growing size.
+
+Every stage reports msgs/s, µs per message, tracemalloc peak per message and
+the peak RSS of the process that ran it (each stage runs in a forked child so
+RSS is not carried over from the previous one). Results are written as JSON
+so two runs can be compared with --compare.
+
+    python -m bench.parsers
+    python -m bench.parsers --sizes 10,1000 --types camt.053 --no-corpus
+    python -m bench.parsers --compare bench/results/parsers-20261019-120000.json
+"""
+import argparse
+import glob
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from xml.etree import ElementTree as ET
+
+from bench.loader import REPO_DIR, NullCursor, load_job
+from bench.traffic import SIZED, TrafficGenerator
+
+CORPUS_GLOB = os.path.join(REPO_DIR, 'INCOME-DOCS', '**', '*.xml')
+RESULTS_DIR = os.path.join(REPO_DIR, 'bench', 'results')
+DEFAULT_SIZES = (10, 1000, 50000)
+
+
+def _extractor(job, msg_type):
+    """Function running the production extraction path of msg_type on one document."""
+    now = datetime.now()
+
+    def with_cursor(process):
+        def run(content):
+            cursor = NullCursor()
+            process(content, 'bench', cursor)
+            return cursor.statements
+        return run
+
+    def pacs_payment(process):
+        def run(content):
+            header = job._peek_group_header(content)
+            if header and (header['nb_of_txs'] or 0) > 1:
+                cursor = NullCursor()
+                job.import_payment_batch(cursor, 'bench.xml', content, msg_type, now, header)
+                return cursor.statements
+            process(content)
+            return 0
+        return run
+
+    return {
+        'pacs.002': _no_statements(job.process_pacs002),
+        'pacs.008': pacs_payment(job.process_pacs008),
+        'pacs.009': pacs_payment(job.process_pacs009),
+        'camt.053': with_cursor(job.process_camt053),
+        'camt.054': with_cursor(job.process_camt054),
+        'camt.056': _no_statements(job.process_camt056),
+    }.get(msg_type)
+
+
+def _no_statements(fn):
+    """Stage that does not touch the database."""
+    def run(item):
+        fn(item)
+        return 0
+    return run
+
+
+def _rss_kib():
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def measure(fn, inputs, min_seconds):
+    """Time fn over inputs (repeated until min_seconds), then one tracemalloc pass."""
+    rss_start = _rss_kib()
+    fn(inputs[0])  # warm-up: caches, first-call imports
+
+    statements = 0
+    rounds = 0
+    started = time.perf_counter()
+    while True:
+        for item in inputs:
+            statements += fn(item)
+        rounds += 1
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_seconds:
+            break
+
+    peaks = []
+    tracemalloc.start()
+    try:
+        for item in inputs:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            fn(item)
+            peaks.append(tracemalloc.get_traced_memory()[1] - base)
+    finally:
+        tracemalloc.stop()
+
+    messages = len(inputs) * rounds
+    return {
+        'messages': messages,
+        'seconds': round(elapsed, 6),
+        'msgs_per_s': round(messages / elapsed, 2),
+        'us_per_msg': round(elapsed / messages * 1e6, 2),
+        'statements_per_msg': round(statements / messages, 2),
+        'alloc_peak_kib': round(max(peaks) / 1024, 1),
+        'alloc_mean_kib': round(sum(peaks) / len(peaks) / 1024, 1),
+        'rss_start_kib': rss_start,
+        # ru_maxrss is KiB on Linux, bytes on macOS
+        'peak_rss_kib': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // (1024 if sys.platform == 'darwin' else 1),
+    }
+
+
+def _measure_in_child(fn, inputs, min_seconds):
+    """Run measure() in a forked process so peak RSS belongs to this stage only."""
+    try:
+        ctx = multiprocessing.get_context('fork')
+    except ValueError:
+        return measure(fn, inputs, min_seconds)
+    reader, writer = ctx.Pipe(duplex=False)
+
+    def child():
+        try:
+            writer.send(measure(fn, inputs, min_seconds))
+        except BaseException as e:
+            writer.send({'error': f'{type(e).__name__}: {e}'})
+        finally:
+            writer.close()
+
+    process = ctx.Process(target=child)
+    process.start()
+    writer.close()
+    try:
+        result = reader.recv()
+    except EOFError:
+        result = {'error': f'stage process exited with code {process.exitcode}'}
+    process.join()
+    return result
+
+
+def load_corpus(job):
+    """INCOME-DOCS files grouped by detected message type."""
+    corpus = {}
+    for path in sorted(glob.glob(CORPUS_GLOB, recursive=True)):
+        try:
+            with open(path, encoding='utf-8') as f:
+                content = f.read()
+        except UnicodeDecodeError:
+            continue
+        corpus.setdefault(job.detect_message_type(content), []).append(content)
+    return corpus
+
+
+def build_cases(job, args):
+    """(source, msg_type, stage, size, fn, inputs) for every stage to measure."""
+    cases = []
+    types = set(args.types) if args.types else None
+
+    if not args.no_corpus:
+        corpus = load_corpus(job)
+        documents = [content for contents in corpus.values() for content in contents]
+        roots = []
+        for content in documents:
+            try:
+                roots.append(ET.fromstring(content))
+            except ET.ParseError:
+                pass
+        cases.append(('corpus', 'all', 'detect', 1, _no_statements(job.detect_message_type), documents))
+        cases.append(('corpus', 'all', 'parse', 1, _no_statements(ET.fromstring), documents))
+        cases.append(('corpus', 'all', 'projection', 1, _no_statements(job.build_projection), roots))
+        for msg_type in sorted(t for t in corpus if t):
+            extractor = _extractor(job, msg_type)
+            if extractor and (types is None or msg_type in types):
+                cases.append(('corpus', msg_type, 'extract', 1, extractor, corpus[msg_type]))
+
+    for msg_type, generate in SIZED.items():
+        if types is not None and msg_type not in types:
+            continue
+        for size in args.sizes:
+            content = generate(TrafficGenerator(seed=args.seed), size)
+            cases.append(('synthetic', msg_type, 'detect', size, _no_statements(job.detect_message_type), [content]))
+            cases.append(('synthetic', msg_type, 'extract', size, _extractor(job, msg_type), [content]))
+    return cases
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _key(result):
+    return (result['source'], result['msg_type'], result['stage'], result['size'])
+
+
+def print_results(results, baseline=None):
+    previous = {_key(r): r for r in baseline or []}
+    header = f'{"source":<10} {"type":<9} {"stage":<10} {"size":>6} {"msgs/s":>11} {"µs/msg":>12} {"stmts":>7} {"alloc KiB":>10} {"RSS KiB":>9}'
+    if previous:
+        header += f' {"vs base":>8}'
+    print(header)
+    for r in results:
+        if 'error' in r:
+            print(f'{r["source"]:<10} {r["msg_type"]:<9} {r["stage"]:<10} {r["size"]:>6}  ERROR {r["error"]}')
+            continue
+        line = (
+            f'{r["source"]:<10} {r["msg_type"]:<9} {r["stage"]:<10} {r["size"]:>6} '
+            f'{r["msgs_per_s"]:>11.1f} {r["us_per_msg"]:>12.1f} {r["statements_per_msg"]:>7.1f} '
+            f'{r["alloc_peak_kib"]:>10.1f} {r["peak_rss_kib"]:>9}'
+        )
+        old = previous.get(_key(r))
+        if old and 'us_per_msg' in old:
+            line += f' {r["us_per_msg"] / old["us_per_msg"]:>7.2f}x'
+        print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                        help='entries/transactions per synthetic document (default: %(default)s)')
+    parser.add_argument('--types', default='', help='only these message types, comma separated')
+    parser.add_argument('--no-corpus', action='store_true', help='skip INCOME-DOCS')
+    parser.add_argument('--seed', type=int, default=1, help='synthetic data seed (default: %(default)s)')
+    parser.add_argument('--min-seconds', type=float, default=1.0,
+                        help='repeat each stage at least this long (default: %(default)s)')
+    parser.add_argument('--in-process', action='store_true', help='do not fork per stage (peak RSS accumulates)')
+    parser.add_argument('--out', help='results file (default: bench/results/parsers-<timestamp>.json)')
+    parser.add_argument('--compare', help='earlier results file to compare µs/msg against')
+    args = parser.parse_args(argv)
+    args.sizes = [int(s) for s in args.sizes.split(',') if s]
+    args.types = [t for t in args.types.split(',') if t]
+
+    job = load_job()
+    logging.getLogger('cron').setLevel(logging.ERROR)
+
+    results = []
+    for source, msg_type, stage, size, fn, inputs in build_cases(job, args):
+        if not inputs:
+            continue
+        run = measure if args.in_process else _measure_in_child
+        result = {'source': source, 'msg_type': msg_type, 'stage': stage, 'size': size}
+        result.update(run(fn, inputs, args.min_seconds))
+        if 'msgs_per_s' in result and size > 1:
+            result['entries_per_s'] = round(result['msgs_per_s'] * size, 1)
+        results.append(result)
+        print(f'  {source} {msg_type} {stage} {size}: {result.get("us_per_msg", result.get("error"))}', file=sys.stderr)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+
+    out = args.out or os.path.join(RESULTS_DIR, f'parsers-{datetime.now():%Y%m%d-%H%M%S}.json')
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, 'w', encoding='utf-8') as f:
+        json.dump({
+            'meta': {
+                'benchmark': 'parsers',
+                'timestamp': datetime.now().isoformat(timespec='seconds'),
+                'git_commit': _git_commit(),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'args': {k: v for k, v in vars(args).items() if k not in ('out', 'compare')},
+            },
+            'results': results,
+        }, f, ensure_ascii=False, indent=1)
+
+    print_results(results, baseline)
+    print(f'\nResults: {out}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,409 @@
+"""Seeded synthetic SWIFT traffic: pacs.008/pacs.009 and camt.053/camt.054/camt.056.
+
+Every message gets unique MsgId/InstrId/EndToEndId/UETR. Amounts are
+log-normal, accounts are drawn from a fixed pool with Zipf weights (a few
+busy accounts, a long tail), and part of the camt.053/camt.054 entries and
+every camt.056 point at payments generated earlier, so reconciliation and
+cancellation matching get hits. The same seed gives the same files.
+
+    python -m bench.traffic --out-dir /data/swift/in --count 1000 --seed 7
+    python -m bench.traffic --out-dir /tmp/in --count 50 --mix camt.053:1 --entries 5000-50000
+
+From code (memory mode):
+
+    TrafficGenerator(seed=7).fill(job.MEMORY_FILES, 200)
+"""
+import argparse
+import os
+import random
+import sys
+import uuid
+from collections import Counter, deque
+from decimal import Decimal
+
+DEFAULT_MIX = {'pacs.008': 50, 'pacs.009': 10, 'camt.054': 25, 'camt.053': 10, 'camt.056': 5}
+DEFAULT_CURRENCIES = ('EUR', 'EUR', 'EUR', 'USD', 'USD', 'GBP')
+BICS = ('ABNAIE2D', 'AIBKIE2D', 'BNGRGRAA', 'BNPAGRAA', 'AEBAGRAA', 'DEUTDEFF', 'COBADEFF', 'BARCGB22', 'BSTDGR2T')
+CANCEL_REASONS = ('DUPL', 'CUST', 'FRAD', 'TECH', 'AGNT')
+TOWNS = (('Dublin', 'IE'), ('Chania', 'GR'), ('Athens', 'GR'), ('Frankfurt', 'DE'), ('London', 'GB'))
+
+ENVELOPE_OPEN = '<?xml version="1.0" encoding="UTF-8"?>\n<Envelope xmlns="urn:swift:xsd:envelope">\n'
+ENVELOPE_CLOSE = '</Envelope>\n'
+VALUE_DATE = '2022-10-20'
+
+
+def _app_hdr(msg_def_idr, biz_msg_idr, fr, to):
+    return (
+        '<head:AppHdr xmlns:head="urn:iso:std:iso:20022:tech:xsd:head.001.001.02">'
+        f'<head:Fr><head:FIId><head:FinInstnId><head:BICFI>{fr}</head:BICFI></head:FinInstnId></head:FIId></head:Fr>'
+        f'<head:To><head:FIId><head:FinInstnId><head:BICFI>{to}</head:BICFI></head:FinInstnId></head:FIId></head:To>'
+        f'<head:BizMsgIdr>{biz_msg_idr}</head:BizMsgIdr>'
+        f'<head:MsgDefIdr>{msg_def_idr}</head:MsgDefIdr>'
+        '<head:BizSvc>swift.cbprplus.02</head:BizSvc>'
+        f'<head:CreDt>{VALUE_DATE}T09:00:00+00:00</head:CreDt>'
+        '</head:AppHdr>\n'
+    )
+
+
+def _agent(tag, bic):
+    return f'<pacs:{tag}><pacs:FinInstnId><pacs:BICFI>{bic}</pacs:BICFI></pacs:FinInstnId></pacs:{tag}>'
+
+
+def _party(tag, name, town):
+    return (
+        f'<pacs:{tag}><pacs:Nm>{name}</pacs:Nm><pacs:PstlAdr><pacs:StrtNm>1 Main Street</pacs:StrtNm>'
+        f'<pacs:TwnNm>{town[0]}</pacs:TwnNm><pacs:Ctry>{town[1]}</pacs:Ctry></pacs:PstlAdr></pacs:{tag}>'
+    )
+
+
+def _account(tag, acc):
+    return f'<pacs:{tag}><pacs:Id><pacs:Othr><pacs:Id>{acc}</pacs:Id></pacs:Othr></pacs:Id></pacs:{tag}>'
+
+
+def _balance(code, amount, ccy):
+    ind = 'DBIT' if amount < 0 else 'CRDT'
+    return (
+        f'<camt:Bal><camt:Tp><camt:CdOrPrtry><camt:Cd>{code}</camt:Cd></camt:CdOrPrtry></camt:Tp>'
+        f'<camt:Amt Ccy="{ccy}">{abs(amount)}</camt:Amt><camt:CdtDbtInd>{ind}</camt:CdtDbtInd>'
+        f'<camt:Dt><camt:Dt>{VALUE_DATE}</camt:Dt></camt:Dt></camt:Bal>\n'
+    )
+
+
+class Payment:
+    """References of a generated pacs.008/pacs.009 transaction."""
+
+    __slots__ = ('msg_id', 'instr_id', 'end_to_end_id', 'uetr', 'amount', 'ccy')
+
+    def __init__(self, msg_id, instr_id, end_to_end_id, uetr, amount, ccy):
+        self.msg_id = msg_id
+        self.instr_id = instr_id
+        self.end_to_end_id = end_to_end_id
+        self.uetr = uetr
+        self.amount = amount
+        self.ccy = ccy
+
+
+class TrafficGenerator:
+    """Deterministic message source; one instance keeps ids unique across calls."""
+
+    def __init__(self, seed=1, accounts=50, currencies=DEFAULT_CURRENCIES, zipf=1.1, match_ratio=0.3):
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.match_ratio = match_ratio
+        self.currencies = currencies
+        self.sequence = 0
+        self.accounts = [f'{self.seed % 100:02d}{n:08d}' for n in self.rng.sample(range(10**8), accounts)]
+        self.account_weights = [1 / (rank + 1) ** zipf for rank in range(accounts)]
+        self.account_ccy = {acc: self.rng.choice(currencies) for acc in self.accounts}
+        self.statement_seq = Counter()
+        # Recent payments that statements, notifications and cancellations refer to
+        self.payments = deque(maxlen=5000)
+
+    # ------------------------------------------------------------------ values
+
+    def _next_id(self, prefix):
+        self.sequence += 1
+        return f'{prefix}-{self.seed}-{self.sequence:08d}'
+
+    def _uetr(self):
+        return str(uuid.UUID(int=self.rng.getrandbits(128), version=4))
+
+    def _amount(self):
+        # Log-normal: median ~1100, long tail up to the cap
+        value = min(self.rng.lognormvariate(7, 1.8), 50_000_000)
+        return Decimal(f'{max(value, 0.01):.2f}')
+
+    def _account(self):
+        return self.rng.choices(self.accounts, self.account_weights)[0]
+
+    def _payment_for(self, ccy):
+        """An earlier payment in ccy with probability match_ratio."""
+        if self.payments and self.rng.random() < self.match_ratio:
+            for _ in range(5):
+                payment = self.rng.choice(self.payments)
+                if payment.ccy == ccy:
+                    return payment
+        return None
+
+    # --------------------------------------------------------------- documents
+
+    def _credit_transfer(self, msg_type, transactions):
+        ns = 'pacs.008.001.08' if msg_type == 'pacs.008' else 'pacs.009.001.08'
+        root = 'FIToFICstmrCdtTrf' if msg_type == 'pacs.008' else 'FICdtTrf'
+        msg_id = self._next_id(msg_type.replace('.', '').upper())
+        ccy = self.rng.choice(self.currencies)
+        ctrl_sum = Decimal(0)
+        parts = []
+        for i in range(transactions):
+            payment = Payment(msg_id, f'{msg_id}-{i}', self._next_id('E2E'), self._uetr(), self._amount(), ccy)
+            self.payments.append(payment)
+            ctrl_sum += payment.amount
+            instg, instd, dbtr_agt, cdtr_agt = self.rng.sample(BICS, 4)
+            customer = [
+                _party('Dbtr', f'Debtor {self.rng.randint(1, 10**6)}', self.rng.choice(TOWNS)),
+                _account('DbtrAcct', self._account()),
+                _agent('DbtrAgt', dbtr_agt), _agent('CdtrAgt', cdtr_agt),
+                _party('Cdtr', f'Creditor {self.rng.randint(1, 10**6)}', self.rng.choice(TOWNS)),
+                _account('CdtrAcct', self._account()),
+            ]
+            if msg_type == 'pacs.009':
+                # Cover: banks as parties, customer transfer underneath
+                customer = [
+                    _agent('Dbtr', instg), _agent('DbtrAgt', dbtr_agt),
+                    _agent('CdtrAgt', cdtr_agt), _agent('Cdtr', instd),
+                    '<pacs:UndrlygCstmrCdtTrf>', *customer, '</pacs:UndrlygCstmrCdtTrf>',
+                ]
+            parts.append(''.join([
+                '<pacs:CdtTrfTxInf><pacs:PmtId>',
+                f'<pacs:InstrId>{payment.instr_id}</pacs:InstrId><pacs:EndToEndId>{payment.end_to_end_id}</pacs:EndToEndId>',
+                f'<pacs:UETR>{payment.uetr}</pacs:UETR></pacs:PmtId>',
+                f'<pacs:IntrBkSttlmAmt Ccy="{ccy}">{payment.amount}</pacs:IntrBkSttlmAmt>',
+                f'<pacs:IntrBkSttlmDt>{VALUE_DATE}</pacs:IntrBkSttlmDt>',
+                '<pacs:ChrgBr>DEBT</pacs:ChrgBr>' if msg_type == 'pacs.008' else '',
+                _agent('InstgAgt', instg), _agent('InstdAgt', instd),
+                *customer,
+                '</pacs:CdtTrfTxInf>\n',
+            ]))
+        return msg_id, ''.join([
+            ENVELOPE_OPEN,
+            _app_hdr(ns, msg_id, 'ABNAIE2D', 'AIBKIE2D'),
+            f'<pacs:Document xmlns:pacs="urn:iso:std:iso:20022:tech:xsd:{ns}"><pacs:{root}>\n',
+            f'<pacs:GrpHdr><pacs:MsgId>{msg_id}</pacs:MsgId><pacs:CreDtTm>{VALUE_DATE}T09:00:00+00:00</pacs:CreDtTm>',
+            f'<pacs:NbOfTxs>{transactions}</pacs:NbOfTxs><pacs:CtrlSum>{ctrl_sum}</pacs:CtrlSum>',
+            '<pacs:SttlmInf><pacs:SttlmMtd>INDA</pacs:SttlmMtd></pacs:SttlmInf></pacs:GrpHdr>\n',
+            *parts,
+            f'</pacs:{root}></pacs:Document>\n',
+            ENVELOPE_CLOSE,
+        ])
+
+    def pacs008(self, transactions=1):
+        """Customer credit transfer; a batch when transactions > 1. Returns (msg_id, xml)."""
+        return self._credit_transfer('pacs.008', transactions)
+
+    def pacs009(self, transactions=1):
+        """FI credit transfer (cover). Returns (msg_id, xml)."""
+        return self._credit_transfer('pacs.009', transactions)
+
+    def _entries(self, count, ccy):
+        """Entry XML list and booked total in units of ccy."""
+        parts = []
+        total = Decimal(0)
+        for i in range(count):
+            payment = self._payment_for(ccy)
+            if payment is not None:
+                amount, ind = payment.amount, 'CRDT'
+                refs = (payment.instr_id, payment.end_to_end_id, payment.uetr)
+            else:
+                amount, ind = self._amount(), self.rng.choice(('CRDT', 'DBIT'))
+                refs = (self._next_id('INSTR'), self._next_id('E2E'), self._uetr())
+            total += amount if ind == 'CRDT' else -amount
+            parts.append(''.join([
+                f'<camt:Ntry><camt:NtryRef>{self._next_id("NTRY")}</camt:NtryRef>',
+                f'<camt:Amt Ccy="{ccy}">{amount}</camt:Amt><camt:CdtDbtInd>{ind}</camt:CdtDbtInd>',
+                '<camt:Sts><camt:Cd>BOOK</camt:Cd></camt:Sts>',
+                f'<camt:BookgDt><camt:Dt>{VALUE_DATE}</camt:Dt></camt:BookgDt>',
+                f'<camt:ValDt><camt:Dt>{VALUE_DATE}</camt:Dt></camt:ValDt>',
+                f'<camt:AcctSvcrRef>{self._next_id("ASR")}</camt:AcctSvcrRef>',
+                '<camt:BkTxCd><camt:Domn><camt:Cd>PMNT</camt:Cd>',
+                '<camt:Fmly><camt:Cd>RCDT</camt:Cd><camt:SubFmlyCd>XBCT</camt:SubFmlyCd></camt:Fmly>',
+                '</camt:Domn></camt:BkTxCd>',
+                '<camt:NtryDtls><camt:TxDtls><camt:Refs>',
+                f'<camt:InstrId>{refs[0]}</camt:InstrId><camt:EndToEndId>{refs[1]}</camt:EndToEndId>',
+                f'<camt:UETR>{refs[2]}</camt:UETR>',
+                f'</camt:Refs><camt:Amt Ccy="{ccy}">{amount}</camt:Amt><camt:CdtDbtInd>{ind}</camt:CdtDbtInd>',
+                '</camt:TxDtls></camt:NtryDtls></camt:Ntry>\n',
+            ]))
+        return parts, total
+
+    def _acct(self, acct_id, ccy):
+        return (
+            f'<camt:Acct><camt:Id><camt:Othr><camt:Id>{acct_id}</camt:Id></camt:Othr></camt:Id>'
+            f'<camt:Ccy>{ccy}</camt:Ccy></camt:Acct>\n'
+        )
+
+    def camt053(self, entries):
+        """Statement of one account; CLBD = OPBD + booked entries. Returns (msg_id, xml)."""
+        msg_id = self._next_id('CAMT053')
+        acct_id = self._account()
+        ccy = self.account_ccy[acct_id]
+        self.statement_seq[acct_id] += 1
+        opening = self._amount()
+        parts, total = self._entries(entries, ccy)
+        return msg_id, ''.join([
+            ENVELOPE_OPEN,
+            _app_hdr('camt.053.001.08', msg_id, 'BNPAGRAA', 'BNGRGRAA'),
+            '<camt:Document xmlns:camt="urn:iso:std:iso:20022:tech:xsd:camt.053.001.08"><camt:BkToCstmrStmt>\n',
+            f'<camt:GrpHdr><camt:MsgId>{msg_id}</camt:MsgId><camt:CreDtTm>{VALUE_DATE}T16:00:00+01:00</camt:CreDtTm></camt:GrpHdr>\n',
+            f'<camt:Stmt><camt:Id>{self._next_id("STMT")}</camt:Id>',
+            f'<camt:ElctrncSeqNb>{self.statement_seq[acct_id]}</camt:ElctrncSeqNb>',
+            self._acct(acct_id, ccy),
+            _balance('OPBD', opening, ccy),
+            _balance('CLBD', opening + total, ccy),
+            *parts,
+            '</camt:Stmt></camt:BkToCstmrStmt></camt:Document>\n',
+            ENVELOPE_CLOSE,
+        ])
+
+    def camt054(self, entries):
+        """Debit/credit notification of one account. Returns (msg_id, xml)."""
+        msg_id = self._next_id('CAMT054')
+        acct_id = self._account()
+        ccy = self.account_ccy[acct_id]
+        parts, _ = self._entries(entries, ccy)
+        return msg_id, ''.join([
+            ENVELOPE_OPEN,
+            _app_hdr('camt.054.001.08', msg_id, 'BNPAGRAA', 'BNGRGRAA'),
+            '<camt:Document xmlns:camt="urn:iso:std:iso:20022:tech:xsd:camt.054.001.08"><camt:BkToCstmrDbtCdtNtfctn>\n',
+            f'<camt:GrpHdr><camt:MsgId>{msg_id}</camt:MsgId><camt:CreDtTm>{VALUE_DATE}T15:00:00+01:00</camt:CreDtTm></camt:GrpHdr>\n',
+            f'<camt:Ntfctn><camt:Id>{self._next_id("NTFCTN")}</camt:Id>',
+            self._acct(acct_id, ccy),
+            *parts,
+            '</camt:Ntfctn></camt:BkToCstmrDbtCdtNtfctn></camt:Document>\n',
+            ENVELOPE_CLOSE,
+        ])
+
+    def camt056(self):
+        """Cancellation request for an earlier payment (a fresh one if none yet). Returns (msg_id, xml)."""
+        if self.payments:
+            payment = self.rng.choice(self.payments)
+        else:
+            payment = Payment(self._next_id('PACS008'), self._next_id('INSTR'), self._next_id('E2E'),
+                              self._uetr(), self._amount(), self.rng.choice(self.currencies))
+        msg_id = self._next_id('CAMT056')
+        assgnr, assgne = self.rng.sample(BICS, 2)
+        return msg_id, ''.join([
+            ENVELOPE_OPEN,
+            _app_hdr('camt.056.001.08', msg_id, assgnr, assgne),
+            '<camt:Document xmlns:camt="urn:iso:std:iso:20022:tech:xsd:camt.056.001.08"><camt:FIToFIPmtCxlReq>\n',
+            f'<camt:Assgnmt><camt:Id>{self._next_id("CASE")}</camt:Id>',
+            f'<camt:Assgnr><camt:Agt><camt:FinInstnId><camt:BICFI>{assgnr}</camt:BICFI></camt:FinInstnId></camt:Agt></camt:Assgnr>',
+            f'<camt:Assgne><camt:Agt><camt:FinInstnId><camt:BICFI>{assgne}</camt:BICFI></camt:FinInstnId></camt:Agt></camt:Assgne>',
+            f'<camt:CreDtTm>{VALUE_DATE}T12:00:00+00:00</camt:CreDtTm></camt:Assgnmt>\n',
+            '<camt:Undrlyg><camt:OrgnlGrpInfAndSts>',
+            f'<camt:OrgnlMsgId>{payment.msg_id}</camt:OrgnlMsgId><camt:OrgnlMsgNmId>pacs.008.001.08</camt:OrgnlMsgNmId>',
+            '</camt:OrgnlGrpInfAndSts><camt:TxInf>',
+            f'<camt:OrgnlInstrId>{payment.instr_id}</camt:OrgnlInstrId>',
+            f'<camt:OrgnlEndToEndId>{payment.end_to_end_id}</camt:OrgnlEndToEndId>',
+            f'<camt:OrgnlUETR>{payment.uetr}</camt:OrgnlUETR>',
+            f'<camt:CxlRsnInf><camt:Rsn><camt:Cd>{self.rng.choice(CANCEL_REASONS)}</camt:Cd></camt:Rsn></camt:CxlRsnInf>',
+            '</camt:TxInf></camt:Undrlyg>\n',
+            '</camt:FIToFIPmtCxlReq></camt:Document>\n',
+            ENVELOPE_CLOSE,
+        ])
+
+    # ----------------------------------------------------------------- streams
+
+    def message(self, msg_type, size=1):
+        """(msg_id, xml) of msg_type; size = transactions or entries."""
+        if msg_type == 'pacs.008':
+            return self.pacs008(size)
+        if msg_type == 'pacs.009':
+            return self.pacs009(size)
+        if msg_type == 'camt.053':
+            return self.camt053(size)
+        if msg_type == 'camt.054':
+            return self.camt054(size)
+        if msg_type == 'camt.056':
+            return self.camt056()
+        raise ValueError(f'No generator for {msg_type}')
+
+    def messages(self, count, mix=None, entries=(1, 50), batch_ratio=0.0, batch_size=(2, 100)):
+        """Yield (filename, msg_type, xml) for count files drawn from mix {msg_type: weight}.
+
+        entries: (min, max) entries per camt.053/camt.054
+        batch_ratio: share of pacs.008/pacs.009 files that carry batch_size transactions
+        """
+        mix = mix or DEFAULT_MIX
+        types, weights = list(mix), list(mix.values())
+        for _ in range(count):
+            msg_type = self.rng.choices(types, weights)[0]
+            if msg_type in ('camt.053', 'camt.054'):
+                size = self.rng.randint(*entries)
+            elif msg_type in ('pacs.008', 'pacs.009') and self.rng.random() < batch_ratio:
+                size = self.rng.randint(*batch_size)
+            else:
+                size = 1
+            msg_id, content = self.message(msg_type, size)
+            yield f'{msg_type}_{msg_id}.xml', msg_type, content
+
+    def fill(self, store, count, **kwargs):
+        """Put count generated files into a memory store (dict or JOB.MemorySpool); returns counts by type.
+
+        A full spool raises SpoolFull: size it with MemorySpool(max_bytes=...).
+        """
+        counts = Counter()
+        for filename, msg_type, content in self.messages(count, **kwargs):
+            store[filename] = content
+            counts[msg_type] += 1
+        return counts
+
+    def write(self, folder, count, **kwargs):
+        """Write count files to folder; returns counts by type.
+
+        Each file is written under folder/.incoming and renamed into place, so
+        the importer (which only takes regular files of folder) never sees a
+        half-written document.
+        """
+        staging = os.path.join(folder, '.incoming')
+        os.makedirs(staging, exist_ok=True)
+        counts = Counter()
+        for filename, msg_type, content in self.messages(count, **kwargs):
+            tmp_path = os.path.join(staging, filename)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(content)
+            os.replace(tmp_path, os.path.join(folder, filename))
+            counts[msg_type] += 1
+        return counts
+
+
+# Fixed-size documents for the benchmarks: (generator, size) -> xml
+SIZED = {
+    'camt.053': lambda generator, size: generator.camt053(size)[1],
+    'camt.054': lambda generator, size: generator.camt054(size)[1],
+    'pacs.008': lambda generator, size: generator.pacs008(size)[1],
+}
+
+
+def parse_mix(text):
+    """'pacs.008:50,camt.053:5' -> {'pacs.008': 50, 'camt.053': 5}"""
+    mix = {}
+    for part in text.split(','):
+        msg_type, _, weight = part.strip().partition(':')
+        if msg_type not in DEFAULT_MIX:
+            raise ValueError(f'No generator for {msg_type}; known: {", ".join(DEFAULT_MIX)}')
+        mix[msg_type] = int(weight or 1)
+    return mix
+
+
+def _range(text):
+    low, _, high = text.partition('-')
+    return int(low), int(high or low)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--out-dir', required=True, help='folder to write to (folder_in of the importer)')
+    parser.add_argument('--count', type=int, default=100, help='files to generate (default: %(default)s)')
+    parser.add_argument('--mix', default=','.join(f'{t}:{w}' for t, w in DEFAULT_MIX.items()),
+                        help='type:weight list (default: %(default)s)')
+    parser.add_argument('--seed', type=int, default=1, help='same seed, same files (default: %(default)s)')
+    parser.add_argument('--accounts', type=int, default=50, help='account pool size (default: %(default)s)')
+    parser.add_argument('--entries', default='1-50', help='entries per camt.053/camt.054, N or MIN-MAX (default: %(default)s)')
+    parser.add_argument('--batch-ratio', type=float, default=0.0,
+                        help='share of pacs.008/pacs.009 files that are batches (default: %(default)s)')
+    parser.add_argument('--batch-size', default='2-100', help='transactions per batch, N or MIN-MAX (default: %(default)s)')
+    parser.add_argument('--match-ratio', type=float, default=0.3,
+                        help='share of camt entries that refer to a generated payment (default: %(default)s)')
+    args = parser.parse_args(argv)
+
+    generator = TrafficGenerator(seed=args.seed, accounts=args.accounts, match_ratio=args.match_ratio)
+    counts = generator.write(
+        args.out_dir, args.count, mix=parse_mix(args.mix), entries=_range(args.entries),
+        batch_ratio=args.batch_ratio, batch_size=_range(args.batch_size),
+    )
+    summary = ', '.join(f'{msg_type}: {n}' for msg_type, n in sorted(counts.items()))
+    print(f'{sum(counts.values())} file(s) written to {args.out_dir} ({summary})', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+-- ============================================================================
+-- Migration: Per-account ledger fed by camt.053 statements and camt.054 notifications
+-- Date: 2026-10-19
+-- ============================================================================
+
+-- 1. One row per account, currency and day
+CREATE TABLE IF NOT EXISTS public.swift_account_ledger (
+    acct_id text NOT NULL,
+    ccy text NOT NULL,
+    bal_date date NOT NULL,
+    opening_bal numeric,
+    stmt_movement numeric,
+    closing_bal numeric,
+    intraday_delta numeric DEFAULT 0 NOT NULL,
+    stmt_swift_input_id uuid,
+    updated timestamp DEFAULT now() NOT NULL,
+    CONSTRAINT swift_account_ledger_pkey PRIMARY KEY (acct_id, ccy, bal_date)
+);
+
+COMMENT ON TABLE public.swift_account_ledger IS
+    'Daily balances per account/currency: camt.053 OPBD/CLBD and booked camt.054 movements';
+COMMENT ON COLUMN public.swift_account_ledger.stmt_movement IS
+    'Sum of booked camt.053 entries (credits - debits)';
+COMMENT ON COLUMN public.swift_account_ledger.intraday_delta IS
+    'Sum of booked camt.054 entries for the day (credits - debits)';
+COMMENT ON COLUMN public.swift_account_ledger.stmt_swift_input_id IS
+    'camt.053 that provided the closing balance; NULL once it is purged';
+
+-- Lookup by document for the retention purge
+CREATE INDEX IF NOT EXISTS idx_swift_account_ledger_stmt_swift_input_id
+    ON public.swift_account_ledger (stmt_swift_input_id) WHERE stmt_swift_input_id IS NOT NULL;
+
+-- 2. Current position per account: one row, read without aggregation
+CREATE TABLE IF NOT EXISTS public.swift_account_position (
+    acct_id text NOT NULL,
+    ccy text NOT NULL,
+    booked_date date,
+    booked_bal numeric,
+    intraday_delta numeric DEFAULT 0 NOT NULL,
+    position numeric DEFAULT 0 NOT NULL,
+    updated timestamp DEFAULT now() NOT NULL,
+    CONSTRAINT swift_account_position_pkey PRIMARY KEY (acct_id, ccy)
+);
+
+COMMENT ON TABLE public.swift_account_position IS
+    'Latest position per account/currency = last statement closing balance + later camt.054 movements';
+COMMENT ON COLUMN public.swift_account_position.booked_bal IS
+    'CLBD of the latest camt.053 (NULL until the first statement arrives)';
+COMMENT ON COLUMN public.swift_account_position.intraday_delta IS
+    'Booked camt.054 movements dated after booked_date';
+
+-- 3. Permissions
+ALTER TABLE IF EXISTS public.swift_account_ledger OWNER TO postgres;
+ALTER TABLE IF EXISTS public.swift_account_position OWNER TO postgres;
+
+GRANT ALL ON TABLE public.swift_account_ledger TO apng;
+GRANT ALL ON TABLE public.swift_account_ledger TO postgres;
+GRANT ALL ON TABLE public.swift_account_position TO apng;
+GRANT ALL ON TABLE public.swift_account_position TO postgres;
+
+-- ============================================================================
+-- Summary of changes:
+-- 1. Added swift_account_ledger (acct_id, ccy, bal_date)
+-- 2. Added swift_account_position (acct_id, ccy)
+-- ============================================================================
@@ -0,0 +1,41 @@
+-- ============================================================================
+-- Migration: Address parsing cache for swiftOutcome.recalc
+-- Date: 2026-10-19
+-- ============================================================================
+
+-- 1. Parsed addresses keyed by normalised address string
+CREATE TABLE IF NOT EXISTS public.swift_address_cache (
+    norm_key text NOT NULL,
+    sample_address text,
+    source text NOT NULL,
+    postal_code text,
+    country text,
+    region text,
+    city text,
+    street text,
+    building text,
+    hit_count bigint DEFAULT 0 NOT NULL,
+    created timestamp DEFAULT now() NOT NULL,
+    last_hit timestamp,
+    CONSTRAINT swift_address_cache_pkey PRIMARY KEY (norm_key)
+);
+
+COMMENT ON TABLE public.swift_address_cache IS
+    'Memoized address parsing results used by swiftOutcome.recalc';
+COMMENT ON COLUMN public.swift_address_cache.norm_key IS
+    'Normalised address: upper case, single spaces, ", " between components';
+COMMENT ON COLUMN public.swift_address_cache.source IS
+    'Parser that produced the fields: RULES (local rule parser) or LLM (remote fallback)';
+COMMENT ON COLUMN public.swift_address_cache.hit_count IS
+    'Number of recalcs served from this cache row';
+
+-- 2. Permissions
+ALTER TABLE IF EXISTS public.swift_address_cache OWNER TO postgres;
+GRANT ALL ON TABLE public.swift_address_cache TO apng;
+GRANT ALL ON TABLE public.swift_address_cache TO postgres;
+
+-- ============================================================================
+-- Summary of changes:
+-- 1. Added swift_address_cache table (normalised address -> parsed fields)
+--    Wrong entries can be fixed in place or deleted to force a re-parse
+-- ============================================================================
@@ -0,0 +1,208 @@
+-- ============================================================================
+-- Migration: Per-message-type attribute tables (process_type.attributes_table)
+-- Date: 2026-10-19
+-- ============================================================================
+-- swift_input keeps what lists, matching and all forms share:
+--   file_name, state, content, imported, msg_type, msg_id, instr_id, code, uetr,
+--   amount, currency_code, dval, orgnl_msg_id, snd_mid_bank*, error, ...
+-- Type-specific columns move to one narrow table per type, id = swift_input.id
+
+-- 1. Attribute tables
+CREATE TABLE IF NOT EXISTS public.swift_input_pacs008 (
+    id uuid NOT NULL,
+    snd_name text,
+    rcv_name text,
+    message text,
+    snd_acc text,
+    rcv_acc text,
+    snd_bank text,
+    snd_bank_name text,
+    rcv_bank text,
+    rcv_bank_name text,
+    CONSTRAINT swift_input_pacs008_pkey PRIMARY KEY (id),
+    CONSTRAINT swift_input_pacs008_id_fkey FOREIGN KEY (id)
+        REFERENCES public.swift_input(id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS public.swift_input_pacs009 (
+    id uuid NOT NULL,
+    snd_name text,
+    rcv_name text,
+    message text,
+    snd_bank text,
+    rcv_bank text,
+    instd_agt text,
+    instd_agt_name text,
+    underlying_dbtr_name text,
+    underlying_dbtr_acc text,
+    underlying_dbtr_agt text,
+    underlying_cdtr_name text,
+    underlying_cdtr_acc text,
+    underlying_cdtr_agt text,
+    CONSTRAINT swift_input_pacs009_pkey PRIMARY KEY (id),
+    CONSTRAINT swift_input_pacs009_id_fkey FOREIGN KEY (id)
+        REFERENCES public.swift_input(id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS public.swift_input_camt053 (
+    id uuid NOT NULL,
+    stmt_id text,
+    elctrnc_seq_nb integer,
+    acct_id text,
+    acct_ccy text,
+    CONSTRAINT swift_input_camt053_pkey PRIMARY KEY (id),
+    CONSTRAINT swift_input_camt053_id_fkey FOREIGN KEY (id)
+        REFERENCES public.swift_input(id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS public.swift_input_camt054 (
+    id uuid NOT NULL,
+    ntfctn_id text,
+    acct_id text,
+    acct_ccy text,
+    CONSTRAINT swift_input_camt054_pkey PRIMARY KEY (id),
+    CONSTRAINT swift_input_camt054_id_fkey FOREIGN KEY (id)
+        REFERENCES public.swift_input(id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS public.swift_input_camt056 (
+    id uuid NOT NULL,
+    case_id text,
+    case_assgnr text,
+    orgnl_msg_nm_id text,
+    orgnl_instr_id text,
+    orgnl_end_to_end_id text,
+    orgnl_tx_id text,
+    orgnl_uetr text,
+    cxl_rsn_cd text,
+    cxl_rsn_addtl_inf text,
+    orgnl_swift_input_id uuid,
+    orgnl_match_key text,
+    CONSTRAINT swift_input_camt056_pkey PRIMARY KEY (id),
+    CONSTRAINT swift_input_camt056_id_fkey FOREIGN KEY (id)
+        REFERENCES public.swift_input(id) ON DELETE CASCADE
+);
+
+-- Per-type indexes
+CREATE INDEX IF NOT EXISTS swift_input_camt053_acct_idx
+    ON public.swift_input_camt053 (acct_id, acct_ccy);
+CREATE INDEX IF NOT EXISTS swift_input_camt054_acct_idx
+    ON public.swift_input_camt054 (acct_id, acct_ccy);
+CREATE INDEX IF NOT EXISTS swift_input_camt056_orgnl_idx
+    ON public.swift_input_camt056 (orgnl_swift_input_id) WHERE orgnl_swift_input_id IS NOT NULL;
+
+COMMENT ON TABLE public.swift_input_pacs008 IS 'pacs.008 attributes of swift_input (parties, accounts, agents)';
+COMMENT ON TABLE public.swift_input_pacs009 IS 'pacs.009 attributes of swift_input (agents, underlying customer transfer)';
+COMMENT ON TABLE public.swift_input_camt053 IS 'camt.053 attributes of swift_input (statement id, account)';
+COMMENT ON TABLE public.swift_input_camt054 IS 'camt.054 attributes of swift_input (notification id, account)';
+COMMENT ON TABLE public.swift_input_camt056 IS 'camt.056 attributes of swift_input (case, original references, reason, link to original)';
+
+-- 2. Copy existing rows
+INSERT INTO public.swift_input_pacs008 (id, snd_name, rcv_name, message, snd_acc, rcv_acc,
+                                        snd_bank, snd_bank_name, rcv_bank, rcv_bank_name)
+SELECT id, snd_name, rcv_name, message, snd_acc, rcv_acc,
+       snd_bank, snd_bank_name, rcv_bank, rcv_bank_name
+FROM public.swift_input WHERE msg_type = 'pacs.008'
+ON CONFLICT (id) DO NOTHING;
+
+INSERT INTO public.swift_input_pacs009 (id, snd_name, rcv_name, message, snd_bank, rcv_bank,
+                                        instd_agt, instd_agt_name,
+                                        underlying_dbtr_name, underlying_dbtr_acc, underlying_dbtr_agt,
+                                        underlying_cdtr_name, underlying_cdtr_acc, underlying_cdtr_agt)
+SELECT id, snd_name, rcv_name, message, snd_bank, rcv_bank,
+       instd_agt, instd_agt_name,
+       underlying_dbtr_name, underlying_dbtr_acc, underlying_dbtr_agt,
+       underlying_cdtr_name, underlying_cdtr_acc, underlying_cdtr_agt
+FROM public.swift_input WHERE msg_type = 'pacs.009'
+ON CONFLICT (id) DO NOTHING;
+
+INSERT INTO public.swift_input_camt053 (id, stmt_id, elctrnc_seq_nb, acct_id, acct_ccy)
+SELECT id, stmt_id, elctrnc_seq_nb, acct_id, acct_ccy
+FROM public.swift_input WHERE msg_type = 'camt.053'
+ON CONFLICT (id) DO NOTHING;
+
+INSERT INTO public.swift_input_camt054 (id, ntfctn_id, acct_id, acct_ccy)
+SELECT id, ntfctn_id, acct_id, acct_ccy
+FROM public.swift_input WHERE msg_type = 'camt.054'
+ON CONFLICT (id) DO NOTHING;
+
+INSERT INTO public.swift_input_camt056 (id, case_id, case_assgnr, orgnl_msg_nm_id,
+                                        orgnl_instr_id, orgnl_end_to_end_id, orgnl_tx_id, orgnl_uetr,
+                                        cxl_rsn_cd, cxl_rsn_addtl_inf, orgnl_swift_input_id, orgnl_match_key)
+SELECT id, case_id, case_assgnr, orgnl_msg_nm_id,
+       orgnl_instr_id, orgnl_end_to_end_id, orgnl_tx_id, orgnl_uetr,
+       cxl_rsn_cd, cxl_rsn_addtl_inf, orgnl_swift_input_id, orgnl_match_key
+FROM public.swift_input WHERE msg_type = 'camt.056'
+ON CONFLICT (id) DO NOTHING;
+
+-- 3. Route process types to their tables
+UPDATE public.process_type SET attributes_table = 'swift_input_pacs008' WHERE code = 'pacs.008';
+UPDATE public.process_type SET attributes_table = 'swift_input_pacs009' WHERE code = 'pacs.009';
+UPDATE public.process_type SET attributes_table = 'swift_input_camt053' WHERE code = 'camt.053';
+UPDATE public.process_type SET attributes_table = 'swift_input_camt054' WHERE code = 'camt.054';
+UPDATE public.process_type SET attributes_table = 'swift_input_camt056' WHERE code = 'camt.056';
+
+-- 4. Permissions
+ALTER TABLE IF EXISTS public.swift_input_pacs008 OWNER TO postgres;
+ALTER TABLE IF EXISTS public.swift_input_pacs009 OWNER TO postgres;
+ALTER TABLE IF EXISTS public.swift_input_camt053 OWNER TO postgres;
+ALTER TABLE IF EXISTS public.swift_input_camt054 OWNER TO postgres;
+ALTER TABLE IF EXISTS public.swift_input_camt056 OWNER TO postgres;
+
+GRANT ALL ON TABLE public.swift_input_pacs008 TO apng;
+GRANT ALL ON TABLE public.swift_input_pacs008 TO postgres;
+GRANT ALL ON TABLE public.swift_input_pacs009 TO apng;
+GRANT ALL ON TABLE public.swift_input_pacs009 TO postgres;
+GRANT ALL ON TABLE public.swift_input_camt053 TO apng;
+GRANT ALL ON TABLE public.swift_input_camt053 TO postgres;
+GRANT ALL ON TABLE public.swift_input_camt054 TO apng;
+GRANT ALL ON TABLE public.swift_input_camt054 TO postgres;
+GRANT ALL ON TABLE public.swift_input_camt056 TO apng;
+GRANT ALL ON TABLE public.swift_input_camt056 TO postgres;
+
+-- 5. Drop the moved columns from swift_input
+--    Run once nothing reads them any more (the legacy swiftIncome.job copy
+--    of the importer still writes them); VACUUM FULL / pg_repack afterwards
+--    to actually shrink existing rows
+-- ALTER TABLE public.swift_input
+--     DROP COLUMN IF EXISTS snd_name,
+--     DROP COLUMN IF EXISTS rcv_name,
+--     DROP COLUMN IF EXISTS message,
+--     DROP COLUMN IF EXISTS snd_acc,
+--     DROP COLUMN IF EXISTS rcv_acc,
+--     DROP COLUMN IF EXISTS snd_bank,
+--     DROP COLUMN IF EXISTS snd_bank_name,
+--     DROP COLUMN IF EXISTS rcv_bank,
+--     DROP COLUMN IF EXISTS rcv_bank_name,
+--     DROP COLUMN IF EXISTS instd_agt,
+--     DROP COLUMN IF EXISTS instd_agt_name,
+--     DROP COLUMN IF EXISTS underlying_dbtr_name,
+--     DROP COLUMN IF EXISTS underlying_dbtr_acc,
+--     DROP COLUMN IF EXISTS underlying_dbtr_agt,
+--     DROP COLUMN IF EXISTS underlying_cdtr_name,
+--     DROP COLUMN IF EXISTS underlying_cdtr_acc,
+--     DROP COLUMN IF EXISTS underlying_cdtr_agt,
+--     DROP COLUMN IF EXISTS stmt_id,
+--     DROP COLUMN IF EXISTS elctrnc_seq_nb,
+--     DROP COLUMN IF EXISTS acct_id,
+--     DROP COLUMN IF EXISTS acct_ccy,
+--     DROP COLUMN IF EXISTS ntfctn_id,
+--     DROP COLUMN IF EXISTS case_id,
+--     DROP COLUMN IF EXISTS case_assgnr,
+--     DROP COLUMN IF EXISTS orgnl_msg_nm_id,
+--     DROP COLUMN IF EXISTS orgnl_instr_id,
+--     DROP COLUMN IF EXISTS orgnl_end_to_end_id,
+--     DROP COLUMN IF EXISTS orgnl_tx_id,
+--     DROP COLUMN IF EXISTS orgnl_uetr,
+--     DROP COLUMN IF EXISTS cxl_rsn_cd,
+--     DROP COLUMN IF EXISTS cxl_rsn_addtl_inf,
+--     DROP COLUMN IF EXISTS orgnl_swift_input_id,
+--     DROP COLUMN IF EXISTS orgnl_match_key;
+
+-- ============================================================================
+-- Summary of changes:
+-- 1. Added swift_input_pacs008/pacs009/camt053/camt054/camt056 (id = swift_input.id)
+-- 2. Copied existing type-specific values into them
+-- 3. process_type.attributes_table points to the new tables
+-- 4. Optional: drop the moved columns from swift_input (step 5)
+-- ============================================================================
@@ -0,0 +1,46 @@
+-- ============================================================================
+-- Migration: Match camt.056 cancellation requests to the original payment
+-- Date: 2026-10-19
+-- ============================================================================
+
+-- 1. Original payment references of incoming pacs.008/pacs.009
+--    (uetr is added by db_migration_reconciliation.sql)
+ALTER TABLE public.swift_input
+    ADD COLUMN IF NOT EXISTS instr_id text;
+
+CREATE INDEX IF NOT EXISTS idx_swift_input_msg_id_instr_id
+    ON public.swift_input (msg_id, instr_id);
+
+-- 2. Link from camt.056 to the original payment
+ALTER TABLE public.swift_input
+    ADD COLUMN IF NOT EXISTS orgnl_swift_input_id uuid,
+    ADD COLUMN IF NOT EXISTS orgnl_match_key text;
+
+CREATE INDEX IF NOT EXISTS idx_swift_input_orgnl_swift_input_id
+    ON public.swift_input (orgnl_swift_input_id);
+
+COMMENT ON COLUMN public.swift_input.orgnl_swift_input_id IS
+    'camt.056: swift_input.id of the original pacs.008/pacs.009';
+COMMENT ON COLUMN public.swift_input.orgnl_match_key IS
+    'camt.056: key used to find the original - UETR, END_TO_END_ID or MSG_ID_INSTR_ID';
+
+-- 3. Optional state for the original payment process when a cancellation arrives
+ALTER TABLE public.swift_settings
+    ADD COLUMN IF NOT EXISTS cancel_state_code text;
+
+COMMENT ON COLUMN public.swift_settings.cancel_state_code IS
+    'process_state.code the original pacs.008/pacs.009 moves to on camt.056 (NULL = only link)';
+
+INSERT INTO public.process_state (type_code, code, name_en, name_ru, name_combined, color_code, allow_edit, allow_delete, start) VALUES
+('pacs.008', 'CANCEL_REQUESTED', 'Cancellation Requested', 'Запрошена отмена', 'Cancellation Requested (Запрошена отмена)', '#DC143C', false, false, false),
+('pacs.009', 'CANCEL_REQUESTED', 'Cancellation Requested', 'Запрошена отмена', 'Cancellation Requested (Запрошена отмена)', '#DC143C', false, false, false)
+ON CONFLICT (type_code, code) DO NOTHING;
+
+-- To enable: UPDATE public.swift_settings SET cancel_state_code = 'CANCEL_REQUESTED';
+
+-- ============================================================================
+-- Summary of changes:
+-- 1. Added swift_input.instr_id and (msg_id, instr_id) index
+-- 2. Added swift_input.orgnl_swift_input_id / orgnl_match_key
+-- 3. Added swift_settings.cancel_state_code and CANCEL_REQUESTED states
+-- ============================================================================
@@ -0,0 +1,51 @@
+-- ============================================================================
+-- Migration: Import run statistics written by JOB.py
+-- Date: 2026-10-19
+-- ============================================================================
+
+-- 1. One row per read_and_import_files() run
+CREATE TABLE IF NOT EXISTS public.swift_import_run (
+    id uuid DEFAULT gen_random_uuid() NOT NULL,
+    started timestamp NOT NULL,
+    finished timestamp NOT NULL,
+    duration_ms numeric,
+    files integer DEFAULT 0 NOT NULL,
+    imported integer DEFAULT 0 NOT NULL,
+    skipped integer DEFAULT 0 NOT NULL,
+    errors integer DEFAULT 0 NOT NULL,
+    bytes bigint DEFAULT 0 NOT NULL,
+    sql_statements integer DEFAULT 0 NOT NULL,
+    sql_ms numeric,
+    stages jsonb,
+    slowest_files jsonb,
+    CONSTRAINT swift_import_run_pkey PRIMARY KEY (id)
+);
+
+COMMENT ON TABLE public.swift_import_run IS
+    'Per-run timings of the cron importer (JOB.py): totals, per-stage distribution and the slowest files';
+COMMENT ON COLUMN public.swift_import_run.stages IS
+    '{"<stage>": {"count", "total_ms", "p50_ms", "p95_ms", "max_ms"}}; stages: read, detect, validate, parse, extract, insert, process, file_move, reconcile, payment_status, commit, sql';
+COMMENT ON COLUMN public.swift_import_run.slowest_files IS
+    'Top files by wall time: [{"file", "msg_type", "bytes", "ms", "sql_ms", "statements", "stages"}]';
+COMMENT ON COLUMN public.swift_import_run.sql_ms IS
+    'Time spent in cursor.execute() over the run (part of every stage that touches the database)';
+
+-- 2. Latest runs first
+CREATE INDEX IF NOT EXISTS idx_swift_import_run_started
+    ON public.swift_import_run (started DESC);
+
+-- 3. Permissions
+ALTER TABLE IF EXISTS public.swift_import_run OWNER TO postgres;
+
+GRANT ALL ON TABLE public.swift_import_run TO apng;
+GRANT ALL ON TABLE public.swift_import_run TO postgres;
+
+-- ============================================================================
+-- Summary of changes:
+-- 1. Added swift_import_run (id)
+-- 2. Added index on swift_import_run.started
+-- Example: stage p95 over the last day
+--   SELECT r.started, s.key AS stage, (s.value->>'p95_ms')::numeric AS p95_ms
+--   FROM swift_import_run r, jsonb_each(r.stages) s
+--   WHERE r.started > now() - interval '1 day' ORDER BY r.started, s.key;
+-- ============================================================================
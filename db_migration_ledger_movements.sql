@@ -0,0 +1,42 @@
+-- ============================================================================
+-- Migration: Idempotent camt.054 movements in the account ledger
+-- Date: 2026-10-19
+-- ============================================================================
+
+-- 1. Every booked camt.054 entry applied to swift_account_ledger/position, once
+CREATE TABLE IF NOT EXISTS public.swift_account_movement (
+    acct_id text NOT NULL,
+    ccy text NOT NULL,
+    movement_key text NOT NULL,
+    bal_date date NOT NULL,
+    amount numeric NOT NULL,
+    swift_input_id uuid,
+    created timestamp DEFAULT now() NOT NULL,
+    CONSTRAINT swift_account_movement_pkey PRIMARY KEY (acct_id, ccy, movement_key)
+);
+
+CREATE INDEX IF NOT EXISTS idx_swift_account_movement_date
+    ON public.swift_account_movement (acct_id, ccy, bal_date);
+CREATE INDEX IF NOT EXISTS idx_swift_account_movement_swift_input_id
+    ON public.swift_account_movement (swift_input_id) WHERE swift_input_id IS NOT NULL;
+
+COMMENT ON TABLE public.swift_account_movement IS
+    'Booked camt.054 entries already added to swift_account_ledger.intraday_delta; a key present here is not added again';
+COMMENT ON COLUMN public.swift_account_movement.movement_key IS
+    '<Ntfctn/Id or swift_input_id>/<NtryRef, AcctSvcrRef or entry number>: the same for a re-imported notification';
+COMMENT ON COLUMN public.swift_account_movement.amount IS
+    'Signed amount (credits positive, debits negative)';
+COMMENT ON COLUMN public.swift_account_movement.swift_input_id IS
+    'camt.054 that applied the movement; NULL once it is purged';
+
+-- 2. Permissions
+ALTER TABLE IF EXISTS public.swift_account_movement OWNER TO postgres;
+
+GRANT ALL ON TABLE public.swift_account_movement TO apng;
+GRANT ALL ON TABLE public.swift_account_movement TO postgres;
+
+-- ============================================================================
+-- Summary of changes:
+-- 1. Added swift_account_movement (acct_id, ccy, movement_key)
+-- Requires db_migration_account_ledger.sql
+-- ============================================================================
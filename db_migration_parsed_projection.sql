@@ -0,0 +1,25 @@
+-- ============================================================================
+-- Migration: Parsed message projection (swift_input.parsed)
+-- Date: 2026-10-19
+-- ============================================================================
+
+-- 1. JSON projection of the message written by JOB.py in the same pass
+--    that extracts the fields; detail screens and move_to_state_script read
+--    it instead of parsing swift_input.content again
+ALTER TABLE public.swift_input
+    ADD COLUMN IF NOT EXISTS parsed jsonb;
+
+COMMENT ON COLUMN public.swift_input.parsed IS
+    'Parsed message keyed by element local name: {"AppHdr": ..., "Document": ...}; repeated elements are arrays, attributes are "@Name", text of an element with attributes is "#text"';
+
+-- 2. Containment lookups, e.g.
+--    WHERE parsed @> '{"Document": {"FIToFICstmrCdtTrf": {"CdtTrfTxInf": {"PmtId": {"EndToEndId": "..."}}}}}'
+CREATE INDEX IF NOT EXISTS idx_swift_input_parsed
+    ON public.swift_input USING gin (parsed jsonb_path_ops);
+
+-- ============================================================================
+-- Summary of changes:
+-- 1. Added swift_input.parsed (jsonb)
+-- 2. Added GIN (jsonb_path_ops) index on swift_input.parsed
+-- Messages imported before this migration keep parsed = NULL
+-- ============================================================================
@@ -0,0 +1,141 @@
+-- ============================================================================
+-- Migration: Monthly range partitioning of swift_input by imported (optional)
+-- Date: 2026-10-19
+-- ============================================================================
+-- Run in a maintenance window, after db_migration_retention.sql.
+--
+-- No data is copied: the existing table becomes one partition covering
+-- everything up to the end of the current month, new months get their own
+-- partitions. The purge drops the old table as a whole once all of it is
+-- past the retention period, and monthly partitions after that.
+--
+-- A partitioned table can only have unique keys that include the partition
+-- key, so swift_input_pkey becomes (id, imported) and foreign keys that
+-- reference swift_input(id) are dropped. JOB.py deletes dependent rows
+-- itself before dropping a partition (PURGE_DEPENDENTS). Rows that land in
+-- swift_input_default have no month to drop with and are purged row by row.
+
+BEGIN;
+
+-- 1. Foreign keys referencing swift_input
+DO $$
+DECLARE
+    r record;
+BEGIN
+    FOR r IN
+        SELECT conrelid::regclass AS tbl, conname
+        FROM pg_constraint
+        WHERE contype = 'f' AND confrelid = 'public.swift_input'::regclass
+    LOOP
+        EXECUTE format('ALTER TABLE %s DROP CONSTRAINT %I', r.tbl, r.conname);
+    END LOOP;
+END $$;
+
+-- 2. Partition key must be NOT NULL
+UPDATE public.swift_input SET imported = now() WHERE imported IS NULL;
+ALTER TABLE public.swift_input ALTER COLUMN imported SET NOT NULL;
+ALTER TABLE public.swift_input ALTER COLUMN imported SET DEFAULT now();
+
+-- 3. Existing table becomes the first partition
+ALTER TABLE public.swift_input RENAME TO swift_input_legacy;
+
+CREATE TABLE public.swift_input (
+    LIKE public.swift_input_legacy INCLUDING DEFAULTS INCLUDING CONSTRAINTS
+) PARTITION BY RANGE (imported);
+
+DO $$
+BEGIN
+    EXECUTE format(
+        'ALTER TABLE public.swift_input ATTACH PARTITION public.swift_input_legacy FOR VALUES FROM (MINVALUE) TO (%L)',
+        date_trunc('month', now()) + interval '1 month'
+    );
+END $$;
+
+ALTER TABLE public.swift_input ADD CONSTRAINT swift_input_part_pkey PRIMARY KEY (id, imported);
+
+-- Every index of the old table is recreated on the parent under its own
+-- name (the legacy copy gets a _legacy suffix and is attached, not rebuilt),
+-- so it also exists on every new partition. Unique indexes cannot be
+-- recreated without the partition key and are covered by the new PK.
+DO $$
+DECLARE
+    r record;
+BEGIN
+    FOR r IN
+        SELECT ic.relname AS name, pg_get_indexdef(ix.indexrelid) AS def
+        FROM pg_index ix
+        JOIN pg_class ic ON ic.oid = ix.indexrelid
+        WHERE ix.indrelid = 'public.swift_input_legacy'::regclass
+          AND NOT ix.indisunique
+    LOOP
+        EXECUTE format('ALTER INDEX public.%I RENAME TO %I', r.name, left(r.name, 56) || '_legacy');
+        EXECUTE regexp_replace(r.def, ' ON (public\.)?swift_input_legacy ', ' ON public.swift_input ');
+    END LOOP;
+END $$;
+
+-- Plain id lookups used swift_input_pkey
+CREATE INDEX IF NOT EXISTS idx_swift_input_part_id
+    ON public.swift_input (id);
+-- Copied above once db_migration_retention.sql has been applied
+CREATE INDEX IF NOT EXISTS idx_swift_input_imported_brin
+    ON public.swift_input USING brin (imported);
+
+CREATE TABLE IF NOT EXISTS public.swift_input_default
+    PARTITION OF public.swift_input DEFAULT;
+
+-- 4. Monthly partitions swift_input_pYYYYMM; JOB.py calls this every run
+CREATE OR REPLACE FUNCTION public.swift_input_create_partitions(months_ahead integer DEFAULT 2)
+RETURNS integer
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    month_start date;
+    part_name text;
+    created integer := 0;
+BEGIN
+    FOR i IN 0..months_ahead LOOP
+        month_start := date_trunc('month', now()) + make_interval(months => i);
+        part_name := 'swift_input_p' || to_char(month_start, 'YYYYMM');
+        IF to_regclass('public.' || part_name) IS NULL THEN
+            BEGIN
+                EXECUTE format(
+                    'CREATE TABLE public.%I PARTITION OF public.swift_input FOR VALUES FROM (%L) TO (%L)',
+                    part_name, month_start, month_start + interval '1 month'
+                );
+                EXECUTE format('ALTER TABLE public.%I OWNER TO postgres', part_name);
+                created := created + 1;
+            EXCEPTION
+                WHEN invalid_object_definition THEN
+                    -- Month still covered by swift_input_legacy
+                    NULL;
+                WHEN check_violation THEN
+                    -- swift_input_default already holds rows of this month: they
+                    -- have to be moved out before the partition can be created
+                    RAISE WARNING 'Partition % not created: swift_input_default has rows from % on',
+                        part_name, month_start;
+            END;
+        END IF;
+    END LOOP;
+    RETURN created;
+END $$;
+
+SELECT public.swift_input_create_partitions(2);
+
+-- 5. Permissions
+ALTER TABLE IF EXISTS public.swift_input OWNER TO postgres;
+ALTER TABLE IF EXISTS public.swift_input_default OWNER TO postgres;
+GRANT ALL ON TABLE public.swift_input TO apng;
+GRANT ALL ON TABLE public.swift_input TO postgres;
+ALTER FUNCTION public.swift_input_create_partitions(integer) OWNER TO postgres;
+
+COMMIT;
+
+-- ============================================================================
+-- Summary of changes:
+-- 1. Dropped foreign keys referencing swift_input(id)
+-- 2. swift_input is partitioned by RANGE (imported), PK (id, imported)
+-- 3. Old table attached as swift_input_legacy, plus a DEFAULT partition;
+--    its indexes are recreated on the parent under their original names
+--    (msg_id/instr_id, orgnl_swift_input_id, parsed GIN, uetr, code, ...)
+-- 4. Added swift_input_create_partitions(months_ahead) for monthly partitions
+-- ============================================================================
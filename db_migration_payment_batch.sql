@@ -0,0 +1,64 @@
+-- ============================================================================
+-- Migration: Multi-transaction pacs.008 / pacs.009 batch ingestion
+-- Date: 2026-10-19
+-- ============================================================================
+
+-- 1. One row per batch file; transactions go to swift_input
+CREATE TABLE IF NOT EXISTS public.swift_input_batch (
+    id uuid DEFAULT gen_random_uuid() NOT NULL,
+    file_name text,
+    msg_type text,
+    msg_id text,
+    content text,
+    imported timestamp,
+    nb_of_txs integer,
+    ctrl_sum numeric,
+    tx_count integer,
+    tx_sum numeric,
+    batch_check text,
+    batch_check_details text,
+    validation_error text,
+    CONSTRAINT swift_input_batch_pkey PRIMARY KEY (id)
+);
+
+COMMENT ON TABLE public.swift_input_batch IS
+    'pacs.008/pacs.009 files with NbOfTxs > 1; every CdtTrfTxInf is a separate swift_input row';
+COMMENT ON COLUMN public.swift_input_batch.nb_of_txs IS
+    'GrpHdr/NbOfTxs as declared in the file';
+COMMENT ON COLUMN public.swift_input_batch.ctrl_sum IS
+    'GrpHdr/CtrlSum as declared in the file';
+COMMENT ON COLUMN public.swift_input_batch.tx_count IS
+    'Number of CdtTrfTxInf actually imported';
+COMMENT ON COLUMN public.swift_input_batch.tx_sum IS
+    'Sum of IntrBkSttlmAmt over the imported transactions';
+COMMENT ON COLUMN public.swift_input_batch.batch_check IS
+    'OK or MISMATCH (NbOfTxs/CtrlSum do not match the transactions)';
+COMMENT ON COLUMN public.swift_input_batch.batch_check_details IS
+    'Mismatch description, one problem per line';
+
+-- 2. Link transactions to their batch
+ALTER TABLE public.swift_input
+    ADD COLUMN IF NOT EXISTS batch_id uuid;
+
+ALTER TABLE public.swift_input
+    DROP CONSTRAINT IF EXISTS swift_input_batch_id_fkey;
+ALTER TABLE public.swift_input
+    ADD CONSTRAINT swift_input_batch_id_fkey FOREIGN KEY (batch_id)
+    REFERENCES public.swift_input_batch(id);
+
+CREATE INDEX IF NOT EXISTS swift_input_batch_id_idx
+    ON public.swift_input (batch_id) WHERE batch_id IS NOT NULL;
+
+COMMENT ON COLUMN public.swift_input.batch_id IS
+    'swift_input_batch the transaction came from (NULL for single-transaction files)';
+
+-- 3. Permissions
+ALTER TABLE IF EXISTS public.swift_input_batch OWNER TO postgres;
+GRANT ALL ON TABLE public.swift_input_batch TO apng;
+GRANT ALL ON TABLE public.swift_input_batch TO postgres;
+
+-- ============================================================================
+-- Summary of changes:
+-- 1. Added swift_input_batch table (batch file, declared and actual totals)
+-- 2. Added swift_input.batch_id with FK and partial index
+-- ============================================================================
@@ -0,0 +1,86 @@
+-- ============================================================================
+-- Migration: pacs.002 payment status reports and status of outgoing payments
+-- Date: 2026-10-19
+-- ============================================================================
+
+-- 1. pacs.002 process type and workflow
+INSERT INTO public.process_type (code, name_en, name_ru, name_combined, resource_url, attributes_table) VALUES
+('pacs.002', 'FI to FI Payment Status Report', 'Отчет о статусе платежа', 'FI to FI Payment Status Report (Отчет о статусе платежа)', '/aoa/ObjectTask?object=swiftInput&form=editForm&objectKey={id}', 'swift_input')
+ON CONFLICT (code) DO NOTHING;
+
+INSERT INTO public.process_state (id, type_code, code, name_en, name_ru, name_combined, color_code, allow_edit, allow_delete, start) VALUES
+('638ae2f8-6a29-4deb-8eb0-a388c71ebb65', 'pacs.002', 'LOADED', 'Loaded', 'Загружен', 'Loaded (Загружен)', '#FF8C00', true, true, true),
+('7bdd60e1-f2f5-487d-8529-14836edf7a43', 'pacs.002', 'PROCESSED', 'Processed', 'Обработан', 'Processed (Обработан)', '#8B0000', false, false, false)
+ON CONFLICT (id) DO NOTHING;
+
+INSERT INTO public.process_operation (id, type_code, code, name_en, name_ru, name_combined, icon, resource_url, availability_condition, cancel, to_state, move_to_state_script, workflow, database) VALUES
+('bd1a7408-4f58-401c-b87a-3760c1ef1344', 'pacs.002', 'MARK_AS_PROCESSED', 'Mark as Processed', 'Отметить как обработанный', 'Mark as Processed (Отметить как обработанный)', 'check', NULL, '{"target_state": "PROCESSED", "available_in_states": ["LOADED"]}', false, NULL, 'to_state="PROCESSED"', NULL, NULL),
+('af96a13a-2a09-4902-a393-a3b8235cda78', 'pacs.002', 'CANCEL_PROCESSING', 'Cancel Processing', 'Отменить обработку', 'Cancel Processing (Отменить обработку)', 'undo', NULL, '{"target_state": "LOADED", "available_in_states": ["PROCESSED"]}', true, NULL, 'to_state="LOADED"', NULL, NULL)
+ON CONFLICT (id) DO NOTHING;
+
+INSERT INTO public.process_operation_states (operation_id, state_id) VALUES
+('bd1a7408-4f58-401c-b87a-3760c1ef1344', '638ae2f8-6a29-4deb-8eb0-a388c71ebb65'),
+('af96a13a-2a09-4902-a393-a3b8235cda78', '7bdd60e1-f2f5-487d-8529-14836edf7a43')
+ON CONFLICT DO NOTHING;
+
+-- 2. One row per TxInfAndSts of an imported pacs.002
+CREATE TABLE IF NOT EXISTS public.swift_pmt_sts (
+    id uuid DEFAULT gen_random_uuid() NOT NULL,
+    swift_input_id uuid NOT NULL,
+    orgnl_msg_id text,
+    orgnl_instr_id text,
+    orgnl_end_to_end_id text,
+    orgnl_uetr text,
+    tx_sts text,
+    sts_rsn_cd text,
+    sts_rsn_addtl_inf text,
+    CONSTRAINT swift_pmt_sts_pkey PRIMARY KEY (id),
+    CONSTRAINT swift_pmt_sts_swift_input_id_fkey FOREIGN KEY (swift_input_id)
+        REFERENCES public.swift_input(id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS swift_pmt_sts_swift_input_id_idx
+    ON public.swift_pmt_sts (swift_input_id);
+CREATE INDEX IF NOT EXISTS swift_pmt_sts_orgnl_uetr_idx
+    ON public.swift_pmt_sts (orgnl_uetr) WHERE orgnl_uetr IS NOT NULL;
+
+COMMENT ON TABLE public.swift_pmt_sts IS
+    'Transaction statuses (TxInfAndSts) reported by pacs.002';
+COMMENT ON COLUMN public.swift_pmt_sts.tx_sts IS
+    'TxSts, or GrpSts when the transaction has no own status (ACTC, ACSP, ACSC, ACCC, RJCT, PDNG, ...)';
+
+-- 3. Status of outgoing payments, looked up by UETR / EndToEndId
+ALTER TABLE public.swift_out_fields
+    ADD COLUMN IF NOT EXISTS uetr text,
+    ADD COLUMN IF NOT EXISTS end_to_end_id text,
+    ADD COLUMN IF NOT EXISTS tx_sts text,
+    ADD COLUMN IF NOT EXISTS tx_sts_rsn text,
+    ADD COLUMN IF NOT EXISTS sts_swift_input_id uuid,
+    ADD COLUMN IF NOT EXISTS sts_updated timestamp;
+
+CREATE INDEX IF NOT EXISTS swift_out_fields_uetr_idx
+    ON public.swift_out_fields (uetr) WHERE uetr IS NOT NULL;
+CREATE INDEX IF NOT EXISTS swift_out_fields_end_to_end_id_idx
+    ON public.swift_out_fields (end_to_end_id) WHERE end_to_end_id IS NOT NULL;
+
+COMMENT ON COLUMN public.swift_out_fields.uetr IS
+    'UETR of the generated pacs.008 (lower case), written by swiftOutcome.recalcXML';
+COMMENT ON COLUMN public.swift_out_fields.end_to_end_id IS
+    'EndToEndId of the generated pacs.008';
+COMMENT ON COLUMN public.swift_out_fields.tx_sts IS
+    'Latest pacs.002 TxSts; a final status (ACSC, ACCC, RJCT, CANC) is not replaced by a non-final one';
+COMMENT ON COLUMN public.swift_out_fields.sts_swift_input_id IS
+    'pacs.002 (swift_input) that reported tx_sts';
+
+-- 4. Permissions
+ALTER TABLE IF EXISTS public.swift_pmt_sts OWNER TO postgres;
+GRANT ALL ON TABLE public.swift_pmt_sts TO apng;
+GRANT ALL ON TABLE public.swift_pmt_sts TO postgres;
+
+-- ============================================================================
+-- Summary of changes:
+-- 1. Added pacs.002 process type, states LOADED/PROCESSED and operations
+-- 2. Added swift_pmt_sts table (statuses of every imported pacs.002)
+-- 3. Added swift_out_fields.uetr/end_to_end_id (indexed) and status columns
+--    Rows generated before this migration get uetr on the next recalcXML
+-- ============================================================================
@@ -0,0 +1,38 @@
+-- ============================================================================
+-- Migration: Priority scheduling of incoming files
+-- Date: 2026-10-19
+-- ============================================================================
+
+-- 1. Processing order by message type (read by JOB.py; env SWIFT_PRIORITY_CLASSES overrides)
+ALTER TABLE public.swift_settings
+    ADD COLUMN IF NOT EXISTS priority_classes text,
+    ADD COLUMN IF NOT EXISTS priority_aging_seconds integer;
+
+COMMENT ON COLUMN public.swift_settings.priority_classes IS
+    'Priority classes, most urgent first: ''camt.056 > pacs.008, pacs.009, pacs.002 > camt.054 > camt.053''; unlisted types and files over 5 MB go last; NULL = this default';
+COMMENT ON COLUMN public.swift_settings.priority_aging_seconds IS
+    'A waiting file moves up one priority class per this many seconds; NULL = 300';
+
+-- 2. Arrival-to-commit latency of the run per message type
+ALTER TABLE public.swift_import_run
+    ADD COLUMN IF NOT EXISTS latency jsonb;
+
+COMMENT ON COLUMN public.swift_import_run.latency IS
+    '{"<msg_type>": {"count", "p50_ms", "p95_ms", "max_ms"}}: file arrival (mtime / spool put) to the commit of its transaction';
+
+-- 3. Unmatched camt.056 by original reference: a camt.056 is imported before
+--    the payments of its run, JOB.py matches it again when they arrive
+CREATE INDEX IF NOT EXISTS swift_input_camt056_unmatched_uetr_idx
+    ON public.swift_input_camt056 (lower(orgnl_uetr)) WHERE orgnl_swift_input_id IS NULL;
+CREATE INDEX IF NOT EXISTS swift_input_camt056_unmatched_e2e_idx
+    ON public.swift_input_camt056 (orgnl_end_to_end_id) WHERE orgnl_swift_input_id IS NULL;
+CREATE INDEX IF NOT EXISTS swift_input_camt056_unmatched_instr_idx
+    ON public.swift_input_camt056 (orgnl_instr_id) WHERE orgnl_swift_input_id IS NULL;
+
+-- ============================================================================
+-- Summary of changes:
+-- 1. Added swift_settings.priority_classes, swift_settings.priority_aging_seconds
+-- 2. Added swift_import_run.latency (jsonb)
+-- 3. Added partial indexes on unmatched swift_input_camt056 references
+-- Requires db_migration_import_runs.sql, db_migration_attribute_tables.sql
+-- ============================================================================
@@ -0,0 +1,28 @@
+-- ============================================================================
+-- Migration: On-demand profiling of one import run
+-- Date: 2026-10-19
+-- ============================================================================
+
+-- 1. Profiling switch (read by JOB.py; env SWIFT_PROFILE / SWIFT_PROFILE_DIR override)
+ALTER TABLE public.swift_settings
+    ADD COLUMN IF NOT EXISTS profile text,
+    ADD COLUMN IF NOT EXISTS profile_folder text;
+
+COMMENT ON COLUMN public.swift_settings.profile IS
+    'Profile the next import runs: cpu (cProfile), memory (tracemalloc), cpu,memory; NULL = off';
+COMMENT ON COLUMN public.swift_settings.profile_folder IS
+    'Folder for import-run-<swift_import_run.id>.prof/.tracemalloc; NULL = <tmp>/swift-profiles';
+
+-- 2. Profile summary of the run: stats file paths, top functions, top allocation sites
+ALTER TABLE public.swift_import_run
+    ADD COLUMN IF NOT EXISTS profile jsonb;
+
+COMMENT ON COLUMN public.swift_import_run.profile IS
+    '{"files": [...], "cpu_ms", "functions": [{"function", "calls", "self_ms", "cum_ms"}], "peak_kib", "allocations": [{"site", "kib", "blocks"}]}; NULL = run was not profiled';
+
+-- ============================================================================
+-- Summary of changes:
+-- 1. Added swift_settings.profile, swift_settings.profile_folder
+-- 2. Added swift_import_run.profile (jsonb)
+-- Requires db_migration_import_runs.sql
+-- ============================================================================
@@ -0,0 +1,100 @@
+-- ============================================================================
+-- Migration: UETR / EndToEndId reconciliation of pacs.008 with camt.053/054
+-- Date: 2026-10-19
+-- ============================================================================
+
+-- 1. UETR of incoming pacs.008 (EndToEndId is already stored in swift_input.code)
+ALTER TABLE public.swift_input
+    ADD COLUMN IF NOT EXISTS uetr uuid;
+
+-- 2. Hash indexes for equality probes by reference
+CREATE INDEX IF NOT EXISTS idx_swift_input_uetr
+    ON public.swift_input USING hash (uetr);
+CREATE INDEX IF NOT EXISTS idx_swift_input_code
+    ON public.swift_input USING hash (code);
+
+CREATE INDEX IF NOT EXISTS idx_swift_entry_tx_dtls_uetr
+    ON public.swift_entry_tx_dtls USING hash (uetr);
+CREATE INDEX IF NOT EXISTS idx_swift_entry_tx_dtls_end_to_end_id
+    ON public.swift_entry_tx_dtls USING hash (end_to_end_id);
+CREATE INDEX IF NOT EXISTS idx_swift_ntfctn_tx_dtls_uetr
+    ON public.swift_ntfctn_tx_dtls USING hash (uetr);
+CREATE INDEX IF NOT EXISTS idx_swift_ntfctn_tx_dtls_end_to_end_id
+    ON public.swift_ntfctn_tx_dtls USING hash (end_to_end_id);
+
+-- New tx details are found through their entries by swift_input_id
+CREATE INDEX IF NOT EXISTS idx_swift_stmt_ntry_swift_input_id
+    ON public.swift_stmt_ntry (swift_input_id);
+CREATE INDEX IF NOT EXISTS idx_swift_ntfctn_ntry_swift_input_id
+    ON public.swift_ntfctn_ntry (swift_input_id);
+CREATE INDEX IF NOT EXISTS idx_swift_entry_tx_dtls_ntry_id
+    ON public.swift_entry_tx_dtls (ntry_id);
+CREATE INDEX IF NOT EXISTS idx_swift_ntfctn_tx_dtls_ntry_id
+    ON public.swift_ntfctn_tx_dtls (ntry_id);
+
+-- 3. Match links: one payment per tx detail, a payment may be linked from camt.053 and camt.054
+CREATE TABLE IF NOT EXISTS public.swift_recon_link (
+    id uuid DEFAULT gen_random_uuid() NOT NULL,
+    payment_id uuid NOT NULL,
+    tx_source text NOT NULL,
+    tx_dtls_id uuid NOT NULL,
+    match_key text NOT NULL,
+    amount_match boolean,
+    created timestamp DEFAULT now() NOT NULL,
+    CONSTRAINT swift_recon_link_pkey PRIMARY KEY (id),
+    CONSTRAINT swift_recon_link_tx_key UNIQUE (tx_source, tx_dtls_id),
+    CONSTRAINT swift_recon_link_payment_fkey FOREIGN KEY (payment_id)
+        REFERENCES public.swift_input(id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS idx_swift_recon_link_payment_id
+    ON public.swift_recon_link (payment_id);
+
+COMMENT ON TABLE public.swift_recon_link IS
+    'Links between incoming pacs.008 (swift_input) and camt.053/054 transaction details';
+COMMENT ON COLUMN public.swift_recon_link.tx_source IS
+    'camt.053 (swift_entry_tx_dtls) or camt.054 (swift_ntfctn_tx_dtls)';
+COMMENT ON COLUMN public.swift_recon_link.match_key IS
+    'UETR or END_TO_END_ID';
+COMMENT ON COLUMN public.swift_recon_link.amount_match IS
+    'Amount and currency of the tx detail equal the payment';
+
+-- 4. Unmatched queue: payments without tx details and tx details without payments
+CREATE TABLE IF NOT EXISTS public.swift_recon_unmatched (
+    item_type text NOT NULL,
+    item_id uuid NOT NULL,
+    swift_input_id uuid NOT NULL,
+    uetr uuid,
+    end_to_end_id text,
+    amt numeric,
+    amt_ccy text,
+    queued timestamp DEFAULT now() NOT NULL,
+    CONSTRAINT swift_recon_unmatched_pkey PRIMARY KEY (item_type, item_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_swift_recon_unmatched_uetr
+    ON public.swift_recon_unmatched USING hash (uetr);
+CREATE INDEX IF NOT EXISTS idx_swift_recon_unmatched_end_to_end_id
+    ON public.swift_recon_unmatched USING hash (end_to_end_id);
+
+COMMENT ON TABLE public.swift_recon_unmatched IS
+    'Reconciliation items waiting for their counterpart; rows are removed once linked';
+COMMENT ON COLUMN public.swift_recon_unmatched.item_type IS
+    'pacs.008 (item_id = swift_input.id), camt.053 or camt.054 (item_id = tx details id)';
+
+-- 5. Permissions
+ALTER TABLE IF EXISTS public.swift_recon_link OWNER TO postgres;
+ALTER TABLE IF EXISTS public.swift_recon_unmatched OWNER TO postgres;
+
+GRANT ALL ON TABLE public.swift_recon_link TO apng;
+GRANT ALL ON TABLE public.swift_recon_link TO postgres;
+GRANT ALL ON TABLE public.swift_recon_unmatched TO apng;
+GRANT ALL ON TABLE public.swift_recon_unmatched TO postgres;
+
+-- ============================================================================
+-- Summary of changes:
+-- 1. Added swift_input.uetr (filled by the importer for pacs.008)
+-- 2. Added hash indexes on UETR/EndToEndId and lookup indexes on entries
+-- 3. Added swift_recon_link table (payment <-> tx detail)
+-- 4. Added swift_recon_unmatched table (items still waiting for a match)
+-- ============================================================================
@@ -0,0 +1,48 @@
+-- ============================================================================
+-- Migration: Retention policy and BRIN indexes on import time
+-- Date: 2026-10-19
+-- ============================================================================
+
+-- 1. Retention settings (read by JOB.py, step "Storage maintenance")
+ALTER TABLE public.swift_settings
+    ADD COLUMN IF NOT EXISTS retention_months integer,
+    ADD COLUMN IF NOT EXISTS purge_batch_size integer DEFAULT 1000;
+
+COMMENT ON COLUMN public.swift_settings.retention_months IS
+    'Messages imported before the first day of (current month - N months) are purged; NULL = keep forever';
+COMMENT ON COLUMN public.swift_settings.purge_batch_size IS
+    'Rows deleted per transaction when swift_input is not partitioned';
+
+-- 2. BRIN indexes: rows are appended in import order, so block ranges
+--    map to time ranges and the index stays a few pages in size
+CREATE INDEX IF NOT EXISTS idx_swift_input_imported_brin
+    ON public.swift_input USING brin (imported);
+
+DO $$
+DECLARE
+    t text;
+BEGIN
+    FOREACH t IN ARRAY ARRAY['swift_stmt_ntry', 'swift_ntfctn_ntry', 'swift_entry_tx_dtls', 'swift_ntfctn_tx_dtls'] LOOP
+        IF EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_schema = 'public' AND table_name = t AND column_name = 'created_at'
+        ) THEN
+            EXECUTE format('CREATE INDEX IF NOT EXISTS %I ON public.%I USING brin (created_at)',
+                           'idx_' || t || '_created_at_brin', t);
+        END IF;
+    END LOOP;
+END $$;
+
+-- Lookup of statement/notification balances by document for the purge
+CREATE INDEX IF NOT EXISTS idx_swift_stmt_bal_swift_input_id
+    ON public.swift_stmt_bal (swift_input_id);
+CREATE INDEX IF NOT EXISTS idx_swift_recon_unmatched_swift_input_id
+    ON public.swift_recon_unmatched (swift_input_id);
+
+-- ============================================================================
+-- Summary of changes:
+-- 1. Added swift_settings.retention_months and purge_batch_size
+-- 2. Added BRIN indexes on swift_input.imported and child created_at
+-- 3. Added swift_input_id indexes used by the purge
+-- Partitioning is optional: db_migration_partition_swift_input.sql
+-- ============================================================================
@@ -0,0 +1,33 @@
+-- ============================================================================
+-- Migration: Budgeted import runs with checkpoint and resume
+-- Date: 2026-10-19
+-- ============================================================================
+
+-- 1. Run budget (read by JOB.py; env SWIFT_RUN_MAX_FILES / SWIFT_RUN_MAX_BYTES / SWIFT_RUN_MAX_SECONDS override)
+ALTER TABLE public.swift_settings
+    ADD COLUMN IF NOT EXISTS run_max_files integer,
+    ADD COLUMN IF NOT EXISTS run_max_bytes bigint,
+    ADD COLUMN IF NOT EXISTS run_max_seconds numeric(10,1);
+
+COMMENT ON COLUMN public.swift_settings.run_max_files IS
+    'Files one import run may take; NULL = no limit';
+COMMENT ON COLUMN public.swift_settings.run_max_bytes IS
+    'Bytes of input one import run may take (the first file is always taken); NULL = no limit';
+COMMENT ON COLUMN public.swift_settings.run_max_seconds IS
+    'Wall time after which an import run takes no further file; 0 = no limit, NULL = 240';
+
+-- 2. Checkpoint of a run that stopped on its budget; the next run resumes from the files left
+ALTER TABLE public.swift_import_run
+    ADD COLUMN IF NOT EXISTS checkpoint jsonb;
+
+COMMENT ON COLUMN public.swift_import_run.checkpoint IS
+    '{"reason": "max_files|max_bytes|max_seconds", "remaining", "remaining_bytes", "next": [...]}; NULL = run imported everything waiting';
+
+-- Runs are serialized by pg_try_advisory_lock(0x5357494654) in JOB.py, no table needed
+
+-- ============================================================================
+-- Summary of changes:
+-- 1. Added swift_settings.run_max_files, run_max_bytes, run_max_seconds
+-- 2. Added swift_import_run.checkpoint (jsonb)
+-- Requires db_migration_import_runs.sql
+-- ============================================================================
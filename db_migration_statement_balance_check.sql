@@ -0,0 +1,25 @@
+-- ============================================================================
+-- Migration: camt.053 balance integrity check (opening + entries = closing)
+-- Date: 2026-10-19
+-- ============================================================================
+
+-- 1. Result of the check, filled by the importer for camt.053
+ALTER TABLE public.swift_input
+    ADD COLUMN IF NOT EXISTS balance_check text,
+    ADD COLUMN IF NOT EXISTS balance_check_details text;
+
+COMMENT ON COLUMN public.swift_input.balance_check IS
+    'camt.053: OK, MISMATCH, or NULL when the statement has no OPBD/PRCD + CLBD pair';
+COMMENT ON COLUMN public.swift_input.balance_check_details IS
+    'camt.053: per-currency difference for MISMATCH';
+
+-- 2. Mismatches are rare; keep them cheap to list
+CREATE INDEX IF NOT EXISTS idx_swift_input_balance_mismatch
+    ON public.swift_input (imported)
+    WHERE balance_check = 'MISMATCH';
+
+-- ============================================================================
+-- Summary of changes:
+-- 1. Added swift_input.balance_check / balance_check_details
+-- 2. Added partial index on statements with balance mismatch
+-- ============================================================================
@@ -0,0 +1,40 @@
+-- ============================================================================
+-- Migration: Statement entries (swift_stmt_ntry) as TRN processes
+-- Date: 2026-10-19
+-- ============================================================================
+
+-- 1. Switch, off by default
+ALTER TABLE public.swift_settings
+    ADD COLUMN IF NOT EXISTS trn_processes boolean DEFAULT false;
+
+COMMENT ON COLUMN public.swift_settings.trn_processes IS
+    'Create a TRN process for every camt.053 entry at import';
+
+-- 2. TRN workflow: LOADED is the start state
+UPDATE public.process_state
+SET start = true
+WHERE id = '09835826-3239-4cde-8fdd-112f8e39c494';  -- TRN LOADED
+
+-- Placeholder resource_url '1' was executed against Colvir on every run
+UPDATE public.process_operation
+SET resource_url = NULL, workflow = NULL, database = NULL
+WHERE id = '4742683f-144d-4e7d-9596-0e0f9debf090'  -- TRN PROCESS
+  AND resource_url = '1';
+
+INSERT INTO public.process_operation_states (operation_id, state_id) VALUES
+('4742683f-144d-4e7d-9596-0e0f9debf090', '09835826-3239-4cde-8fdd-112f8e39c494'),  -- PROCESS in LOADED
+('b07e6901-aacf-49bb-85c0-34c0fee379f3', '27b572c3-8bdf-42b7-bd43-999c3df7ba7d')   -- UNDO_PROCESS in PROCESSED
+ON CONFLICT (operation_id, state_id) DO NOTHING;
+
+-- 3. Existing statements: processes for entries that have none
+--    (run once after enabling trn_processes, optional)
+-- INSERT INTO public.process (doc_id, state_id)
+-- SELECT n.id, '09835826-3239-4cde-8fdd-112f8e39c494'
+-- FROM public.swift_stmt_ntry n
+-- WHERE NOT EXISTS (SELECT 1 FROM public.process p WHERE p.doc_id = n.id);
+
+-- ============================================================================
+-- Summary of changes:
+-- 1. Added swift_settings.trn_processes
+-- 2. TRN LOADED marked as start state, PROCESS/UNDO_PROCESS linked to states
+-- ============================================================================
@@ -0,0 +1,32 @@
+-- ============================================================================
+-- Migration: Optional XSD validation of incoming and generated messages
+-- Date: 2026-10-19
+-- ============================================================================
+
+-- 1. Folder with CBPR+ schemas named <MsgDefIdr>.xsd (empty = validation off)
+ALTER TABLE public.swift_settings
+    ADD COLUMN IF NOT EXISTS xsd_folder text;
+
+COMMENT ON COLUMN public.swift_settings.xsd_folder IS
+    'Folder with XSD files named by MsgDefIdr, e.g. pacs.008.001.08.xsd, head.001.001.02.xsd';
+
+-- 2. Schema errors of imported messages (the row is still imported)
+ALTER TABLE public.swift_input
+    ADD COLUMN IF NOT EXISTS validation_error text;
+
+COMMENT ON COLUMN public.swift_input.validation_error IS
+    'XSD validation errors of AppHdr/Document, NULL when valid or not validated';
+
+-- 3. Schema errors of pacs.008 generated by swiftOutcome.recalcXML
+ALTER TABLE public.swift_out_fields
+    ADD COLUMN IF NOT EXISTS validation_error text;
+
+COMMENT ON COLUMN public.swift_out_fields.validation_error IS
+    'XSD validation errors of the generated XML, NULL when valid or not validated';
+
+-- ============================================================================
+-- Summary of changes:
+-- 1. Added swift_settings.xsd_folder
+-- 2. Added swift_input.validation_error
+-- 3. Added swift_out_fields.validation_error
+-- ============================================================================
@@ -0,0 +1,21 @@
+"""Library and command line entry point for the JOB.py importer.
+
+JOB.py stays the single file the cron scheduler executes; this package
+imports it without starting a run and gives it explicit settings and a
+context object:
+
+    from swift_import import ImportContext, ImportSettings
+
+    context = ImportContext(ImportSettings(folder_in='/data/in', folder_out='/data/out', work_from_memory=False))
+    context.run_once()
+    context.handle(xml)        # {'msg_type', 'result', 'parsed'}
+
+    python -m swift_import run-once
+    python -m swift_import watch --interval 60
+    python -m swift_import bench import --files 200
+"""
+from swift_import.context import ImportContext
+from swift_import.loader import JOB_PATH, load_importer
+from swift_import.settings import ImportSettings
+
+__all__ = ['ImportContext', 'ImportSettings', 'JOB_PATH', 'load_importer']
@@ -0,0 +1,5 @@
+import sys
+
+from swift_import.cli import main
+
+sys.exit(main())
@@ -0,0 +1,98 @@
+"""Command line entry point: python -m swift_import {run-once,watch,bench}.
+
+run-once and watch load swift_settings through the platform database
+session (apng_core) and import from folder_in; --folder-in/--folder-out
+override the stored folders. bench runs the bench package without a
+database.
+"""
+import argparse
+import logging
+import sys
+import time
+
+from swift_import.context import ImportContext
+from swift_import.settings import ImportSettings
+
+BENCHMARKS = {
+    'parsers': 'bench.parsers',
+    'import': 'bench.import_run',
+    'traffic': 'bench.traffic',
+}
+
+
+def _settings(job, args):
+    # A standalone process has nobody filling MEMORY_FILES: always import from folder_in
+    return ImportSettings.from_db(job).replace(
+        folder_in=args.folder_in, folder_out=args.folder_out, profile=args.profile, work_from_memory=False,
+    )
+
+
+def run_once(args):
+    context = ImportContext()
+    context.settings = _settings(context.job, args)
+    imported = context.run_once(maintenance=not args.no_maintenance)
+    print(f'Imported: {imported}')
+    return 0
+
+
+def watch(args):
+    """run-once every --interval seconds; swift_settings are reloaded before each run.
+
+    A run that stopped on its budget is followed by the next one right away.
+    """
+    context = ImportContext()
+    log = logging.getLogger('cron')
+    try:
+        while True:
+            started = time.monotonic()
+            resume = False
+            try:
+                context.settings = _settings(context.job, args)
+                context.run_once(maintenance=not args.no_maintenance)
+                resume = bool(context.job.LAST_IMPORT_CHECKPOINT)
+            except Exception as e:
+                log.error('Import run failed: %s', e, exc_info=True)
+            if resume:
+                continue
+            time.sleep(max(0.0, args.interval - (time.monotonic() - started)))
+    except KeyboardInterrupt:
+        return 0
+
+
+def bench(args):
+    from importlib import import_module
+    return import_module(BENCHMARKS[args.benchmark]).main(args.args)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m swift_import', description=__doc__.splitlines()[0])
+    parser.add_argument('--log-level', default='INFO', help='level of the cron logger (default: %(default)s)')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    for name, handler, help_text in (
+        ('run-once', run_once, 'import the files waiting in folder_in and exit'),
+        ('watch', watch, 'run-once in a loop'),
+    ):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument('--folder-in', help='override swift_settings.folder_in')
+        command.add_argument('--folder-out', help='override swift_settings.folder_out')
+        command.add_argument('--profile', help='cpu, memory or cpu,memory (see swift_settings.profile)')
+        command.add_argument('--no-maintenance', action='store_true', help='skip partitions/retention')
+        command.set_defaults(handler=handler)
+    commands.choices['watch'].add_argument('--interval', type=float, default=60.0,
+                                           help='seconds between run starts (default: %(default)s)')
+
+    command = commands.add_parser('bench', help='benchmarks and synthetic traffic (bench package)')
+    command.add_argument('benchmark', choices=sorted(BENCHMARKS))
+    command.add_argument('args', nargs=argparse.REMAINDER, help='arguments of the benchmark (--help for its options)')
+    command.set_defaults(handler=bench)
+
+    args = parser.parse_args(argv)
+    if args.command != 'bench':
+        logging.basicConfig(format='%(asctime)s %(levelname)s %(message)s')
+        logging.getLogger('cron').setLevel(args.log_level.upper())
+    return args.handler(args) or 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
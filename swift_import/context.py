@@ -0,0 +1,70 @@
+"""One importer instance: settings, database session and memory files."""
+from xml.etree import ElementTree as ET
+
+from swift_import.loader import load_importer
+from swift_import.settings import ImportSettings
+
+
+class ImportContext:
+    """Explicit state for the JOB.py importer.
+
+    JOB.py keeps its configuration in module globals; the context owns it
+    and writes it into the module before every call, so several contexts
+    (tests, benchmark runs) can take turns on one loaded module and a worker
+    process only has to build its own context.
+
+    Args:
+        settings: ImportSettings; default = what the module globals hold
+        job: loaded JOB.py module; default = load_importer()
+        db_session: replacement for apng_core.db.initDbSession (e.g. bench.db.session_factory);
+            default = the module's own, also after another context replaced it
+        memory_files: MemorySpool for work_from_memory mode (a dict is copied into a new one)
+    """
+
+    def __init__(self, settings=None, job=None, db_session=None, memory_files=None):
+        self.job = job or load_importer()
+        self.settings = (settings or ImportSettings.from_module(self.job)).resolve(self.job)
+        self.db_session = db_session
+        if memory_files is None or isinstance(memory_files, dict):
+            spool = self.job.MemorySpool()
+            spool.update(memory_files or {})
+            memory_files = spool
+        self.memory_files = memory_files
+
+    def activate(self):
+        """Put this context's state into the module; returns the module."""
+        job = self.job
+        self.settings.apply(job)
+        job.initDbSession = self.db_session or getattr(job, 'LOADED_DB_SESSION', job.initDbSession)
+        job.MEMORY_FILES = self.memory_files
+        return job
+
+    def run_once(self, maintenance=True):
+        """Import the waiting files (and run storage maintenance); returns the imported count."""
+        job = self.activate()
+        listener = job.start_log_queue()
+        try:
+            return job.run_once(maintenance=maintenance)
+        finally:
+            job.stop_log_queue(listener)
+
+    def handle(self, content, cursor=None, swift_input_id=None):
+        """Detect the type, parse once and run its handler.
+
+        Returns {'msg_type', 'result', 'parsed'}: result is the extracted fields,
+        or the counts for camt.053/camt.054, which write their entries through
+        cursor for swift_input_id. parsed is the swift_input.parsed projection.
+        """
+        job = self.activate()
+        msg_type = job.detect_message_type(content)
+        handler = job.MESSAGE_HANDLERS.get(msg_type)
+        if handler is None:
+            raise ValueError(f'Unsupported message type: {msg_type}')
+        if cursor is None and msg_type in ('camt.053', 'camt.054'):
+            raise ValueError(f'{msg_type} handler writes its entries and needs a cursor')
+        root = ET.fromstring(content)
+        return {
+            'msg_type': msg_type,
+            'result': handler(content, swift_input_id, cursor, root=root),
+            'parsed': job.build_projection(root),
+        }
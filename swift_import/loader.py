@@ -0,0 +1,38 @@
+"""Import JOB.py as a module without starting an import run."""
+import importlib.util
+import os
+import sys
+
+from swift_import.settings import ImportSettings
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+JOB_PATH = os.path.join(REPO_DIR, 'JOB.py')
+MODULE_NAME = 'swift_job'
+
+
+def load_importer(path=JOB_PATH, fresh=False):
+    """JOB.py as the module swift_job, executed once per process.
+
+    AS_LIBRARY is set before the module body runs, so the trailing main()
+    is skipped. The module is registered in sys.modules: forked workers
+    inherit it and pickled references to its functions resolve.
+    fresh=True executes the file again with clean globals.
+    """
+    module = sys.modules.get(MODULE_NAME)
+    if module is not None and not fresh:
+        return module
+
+    spec = importlib.util.spec_from_file_location(MODULE_NAME, path)
+    module = importlib.util.module_from_spec(spec)
+    module.AS_LIBRARY = True
+    sys.modules[MODULE_NAME] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        sys.modules.pop(MODULE_NAME, None)
+        raise
+    # As loaded, before any context changes the globals: what unset
+    # ImportSettings fields and a context without db_session go back to
+    module.LOADED_SETTINGS = ImportSettings.from_module(module)
+    module.LOADED_DB_SESSION = module.initDbSession
+    return module
@@ -0,0 +1,69 @@
+"""Importer settings as an object instead of JOB.py module globals."""
+from dataclasses import dataclass, fields, replace
+from typing import Optional
+
+
+class _ModuleDefault:
+    def __repr__(self):
+        return 'MODULE_DEFAULT'
+
+
+# Field not set: the value JOB.py defines (job.LOADED_SETTINGS)
+MODULE_DEFAULT = _ModuleDefault()
+
+
+@dataclass(frozen=True)
+class ImportSettings:
+    """swift_settings values and run switches used by JOB.py.
+
+    Every field maps to the upper-case module global of the same name
+    (folder_in -> FOLDER_IN), which is where the importer reads it. Fields
+    left unset take the value JOB.py defines, as loaded, so the defaults
+    live in one place.
+    """
+
+    folder_in: Optional[str] = MODULE_DEFAULT
+    folder_out: Optional[str] = MODULE_DEFAULT
+    work_from_memory: bool = MODULE_DEFAULT
+    xsd_folder: Optional[str] = MODULE_DEFAULT
+    cancel_state_code: Optional[str] = MODULE_DEFAULT
+    trn_processes: bool = MODULE_DEFAULT
+    retention_months: Optional[int] = MODULE_DEFAULT
+    purge_batch_size: int = MODULE_DEFAULT
+    profile: Optional[str] = MODULE_DEFAULT
+    profile_folder: Optional[str] = MODULE_DEFAULT
+    priority_classes: str = MODULE_DEFAULT
+    priority_aging_seconds: int = MODULE_DEFAULT
+    run_max_files: Optional[int] = MODULE_DEFAULT
+    run_max_bytes: Optional[int] = MODULE_DEFAULT
+    run_max_seconds: Optional[float] = MODULE_DEFAULT
+
+    @classmethod
+    def from_module(cls, job):
+        """Settings currently held by the module globals."""
+        return cls(**{f.name: getattr(job, f.name.upper()) for f in fields(cls)})
+
+    @classmethod
+    def from_db(cls, job):
+        """Load swift_settings through the importer (also creates the folders in file mode)."""
+        job.load_settings_from_db()
+        return cls.from_module(job)
+
+    def resolve(self, job):
+        """Copy with unset fields taken from the module as loaded."""
+        defaults = getattr(job, 'LOADED_SETTINGS', None) or self.from_module(job)
+        return replace(self, **{
+            f.name: getattr(defaults, f.name) for f in fields(self) if getattr(self, f.name) is MODULE_DEFAULT
+        })
+
+    def apply(self, job):
+        """Write the settings into the module globals."""
+        settings = self.resolve(job)
+        if job.XSD_FOLDER != settings.xsd_folder:
+            job.XSD_VALIDATORS.clear()
+        for f in fields(settings):
+            setattr(job, f.name.upper(), getattr(settings, f.name))
+
+    def replace(self, **changes):
+        """Copy with changes; None values are ignored (unset command line options)."""
+        return replace(self, **{k: v for k, v in changes.items() if v is not None})
@@ -0,0 +1,154 @@
+import random
+import threading
+import time
+import zlib
+
+import pytest
+
+from bench.loader import load_job
+
+
+@pytest.fixture(scope='module')
+def job():
+    return load_job()
+
+
+def _content(seed, size=2000):
+    """Text that barely compresses, so compressed sizes are predictable."""
+    rng = random.Random(seed)
+    return ''.join(rng.choice('0123456789abcdef') for _ in range(size))
+
+
+def _compressed_size(job, content):
+    return len(zlib.compress(content.encode('utf-8'), job.MEMORY_SPOOL_LEVEL))
+
+
+def _full_spool(job):
+    first, second = _content(1), _content(2)
+    spool = job.MemorySpool(max_bytes=_compressed_size(job, first) + _compressed_size(job, second))
+    spool.put('a.xml', first)
+    spool.put('b.xml', second)
+    return spool, first
+
+
+def test_refused_replacement_keeps_the_old_entry(job):
+    spool, first = _full_spool(job)
+    used = spool.bytes
+
+    with pytest.raises(job.SpoolFull):
+        spool.put('a.xml', _content(3, size=4000), block=False)
+
+    assert spool.get('a.xml') == first
+    assert spool.keys() == ['a.xml', 'b.xml']
+    assert spool.bytes == used
+    assert spool.refused == 1
+
+
+def test_replacement_counts_the_replaced_bytes_as_room(job):
+    spool, first = _full_spool(job)
+    used = spool.bytes
+
+    spool.put('a.xml', first, block=False)
+
+    assert spool.keys() == ['b.xml', 'a.xml']
+    assert spool.bytes == used
+
+
+def test_blocking_put_times_out_on_a_full_spool(job):
+    spool, _ = _full_spool(job)
+
+    with pytest.raises(job.SpoolFull):
+        spool.put('c.xml', _content(3), timeout=0.05)
+
+    assert spool.blocked_seconds >= 0.05
+    assert 'c.xml' not in spool.keys()
+
+
+def test_blocking_put_waits_for_a_discard(job):
+    spool, _ = _full_spool(job)
+    timer = threading.Timer(0.05, spool.discard, ('a.xml',))
+    timer.start()
+    try:
+        spool.put('c.xml', _content(3, size=1000), timeout=5)
+    finally:
+        timer.cancel()
+
+    assert spool.keys() == ['b.xml', 'c.xml']
+
+
+def _scheduler(job, monkeypatch, files, **kwargs):
+    """ImportScheduler over {filename: (msg_type, seconds waited, size, spool priority)}."""
+    now = time.time()
+    probes = {
+        filename: (f'<MsgDefIdr>{msg_type}.001.08</MsgDefIdr>', size, now - waited, priority)
+        for filename, (msg_type, waited, size, priority) in files.items()
+    }
+    monkeypatch.setattr(job, 'probe_input_file', probes.get)
+    return job.ImportScheduler(list(files), **kwargs)
+
+
+def test_files_come_out_by_class_then_arrival(job, monkeypatch):
+    scheduler = _scheduler(job, monkeypatch, {
+        'statement.xml': ('camt.053', 3, 1000, 0),
+        'payment-2.xml': ('pacs.008', 1, 1000, 0),
+        'payment-1.xml': ('pacs.008', 2, 1000, 0),
+        'cancel.xml': ('camt.056', 0, 1000, 0),
+        'status.xml': ('pacs.002', 0, 1000, 0),
+    })
+
+    assert list(scheduler) == ['cancel.xml', 'payment-1.xml', 'payment-2.xml', 'status.xml', 'statement.xml']
+
+
+def test_bulk_files_go_last_and_spool_priority_moves_up(job, monkeypatch):
+    scheduler = _scheduler(job, monkeypatch, {
+        'bulk-payments.xml': ('pacs.008', 2, job.PRIORITY_BULK_BYTES + 1, 0),
+        'statement.xml': ('camt.053', 1, 1000, 0),
+        'urgent-statement.xml': ('camt.053', 0, 1000, 3),
+    })
+
+    assert list(scheduler) == ['urgent-statement.xml', 'bulk-payments.xml', 'statement.xml']
+
+
+def test_waiting_files_age_into_better_classes(job, monkeypatch):
+    scheduler = _scheduler(job, monkeypatch, {
+        'payment.xml': ('pacs.008', 0, 1000, 0),
+        'old-statement.xml': ('camt.053', 200, 1000, 0),
+    }, aging_seconds=60)
+
+    assert list(scheduler) == ['old-statement.xml', 'payment.xml']
+
+
+def test_files_gone_before_classification_are_skipped(job, monkeypatch):
+    scheduler = _scheduler(job, monkeypatch, {'payment.xml': ('pacs.008', 0, 1000, 0)})
+    scheduler.add(['vanished.xml'])
+
+    assert list(scheduler) == ['payment.xml']
+
+
+def test_budget_always_takes_the_first_file(job):
+    budget = job.RunBudget(max_files=1, max_bytes=100, max_seconds=1)
+    budget.started -= 10
+
+    assert budget.take(1000) is None
+    assert budget.files == 1
+
+
+@pytest.mark.parametrize('limits, sizes, reason', [
+    ({'max_files': 2}, [10, 10, 10], 'max_files'),
+    ({'max_bytes': 100}, [60, 30, 20], 'max_bytes'),
+])
+def test_budget_refuses_the_file_over_the_limit(job, limits, sizes, reason):
+    budget = job.RunBudget(**limits)
+
+    results = [budget.take(size) for size in sizes]
+
+    assert results == [None, None, reason]
+    assert (budget.files, budget.bytes) == (2, sum(sizes[:2]))
+
+
+def test_budget_stops_after_max_seconds(job):
+    budget = job.RunBudget(max_seconds=1)
+    assert budget.take(10) is None
+    budget.started -= 1
+
+    assert budget.take(10) == 'max_seconds'
@@ -0,0 +1,57 @@
+import os
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+
+from bench.loader import load_object_script
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+SWIFT_OUTCOME = os.path.join(os.path.dirname(TESTS_DIR), 'swift.objects', 'ao', 'swiftOutcome.json')
+CREATED = datetime(2026, 10, 19, 9, 30, 15)
+
+PAYMENT = {
+    'DEP_ID': 1,
+    'ID': 42,
+    'INSTR_IDN': None,
+    'REFER': 'REF-2026-0042',
+    'UETR_CODE': None,
+    'DVAL': date(2026, 10, 20),
+    'AMOUNT': Decimal('1250.50'),
+    'VAL_CODE': 'USD',
+    'SND_BANK': 'KICBKG22XXX',
+    'RCV_BANK': 'CHASUS33XXX',
+    'SND_NAME': 'Alpha & Omega LLC',
+    'SND_ACC': 'KG21123000000000000001',
+    'RCV_NAME': 'Beta <Trading> Inc',
+    'RCV_ACC': '400012345',
+    'MESSAGE': 'Invoice 17/2026 "services"',
+}
+
+ADDRESS = {
+    'snd_street': 'Chuy Avenue', 'snd_building': '101', 'snd_postal_code': '720040',
+    'snd_city': 'Bishkek', 'snd_region': None, 'snd_country': 'KGZ',
+    'rcv_street': None, 'rcv_building': None, 'rcv_postal_code': None,
+    'rcv_city': 'New York', 'rcv_region': 'NY', 'rcv_country': 'US',
+}
+
+
+@pytest.fixture(scope='module')
+def recalc_xml():
+    return load_object_script(SWIFT_OUTCOME, 'recalcXML')
+
+
+def _golden(name):
+    with open(os.path.join(TESTS_DIR, 'golden', name), encoding='utf-8') as f:
+        return f.read()
+
+
+@pytest.mark.parametrize('pretty, name', [(True, 'pacs008_pretty.xml'), (False, 'pacs008_compact.xml')])
+def test_pacs008_matches_golden_file(recalc_xml, pretty, name):
+    assert recalc_xml.generate_pacs008_xml(PAYMENT, ADDRESS, CREATED, pretty) == _golden(name)
+
+
+@pytest.mark.parametrize('pretty, name', [(True, 'pacs008_pretty.xml'), (False, 'pacs008_compact.xml')])
+def test_pacs008_batch_matches_golden_file(recalc_xml, pretty, name):
+    addresses = {recalc_xml.payment_key('1', '42'): ADDRESS}
+    assert recalc_xml.generate_pacs008_batch([PAYMENT], addresses, CREATED, pretty) == [(('1', '42'), _golden(name))]
@@ -0,0 +1,53 @@
+import pytest
+
+from bench.loader import load_job
+
+UETR = '7a562c67-ca16-48ba-b074-65581be6f001'
+
+
+class StatusCursor:
+    """Cursor that records the UPDATE parameters and matches every UETR."""
+
+    def __init__(self):
+        self.params = []
+        self._rows = []
+
+    def execute(self, sql, params=None):
+        self.params.append(params)
+        self._rows = [{'uetr': u, 'end_to_end_id': e} for u, e in zip(params['uetrs'], params['e2e_ids'])]
+
+    def fetchall(self):
+        return self._rows
+
+
+@pytest.fixture(scope='module')
+def job():
+    return load_job()
+
+
+def _status(tx_sts, uetr=UETR):
+    return {'orgnl_uetr': uetr, 'orgnl_end_to_end_id': 'E2E-1', 'tx_sts': tx_sts, 'sts_rsn_cd': None}
+
+
+@pytest.mark.parametrize('order', [
+    ['ACSP', 'ACCC', 'ACSC'],
+    ['ACCC', 'ACSC', 'ACSP'],
+    ['ACSC', 'ACSP', 'PDNG'],
+])
+def test_final_status_is_not_replaced_by_a_later_interim_one(job, order):
+    cursor = StatusCursor()
+    pending = [('input-%d' % i, _status(sts)) for i, sts in enumerate(order)]
+
+    counts = job.apply_payment_statuses(cursor, pending)
+
+    final = [sts for sts in order if sts in job.FINAL_TX_STATUSES][-1]
+    assert cursor.params[0]['stss'] == [final]
+    assert counts == {'statuses': 1, 'updated': 1, 'unmatched': 0}
+
+
+def test_interim_statuses_keep_the_latest(job):
+    cursor = StatusCursor()
+
+    job.apply_payment_statuses(cursor, [('input-1', _status('PDNG')), ('input-2', _status('ACSP'))])
+
+    assert cursor.params[0]['stss'] == ['ACSP']